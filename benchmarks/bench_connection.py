@@ -0,0 +1,55 @@
+"""
+Benchmark of :func:`flask_mongoengine.MongoEngine.init_app` with many aliases.
+
+Connections created with ``connect=False``, so no database instance required.
+
+Usage::
+
+    python benchmarks/bench_connection.py
+"""
+import timeit
+
+import flask
+import mongoengine
+
+from flask_mongoengine import MongoEngine
+
+ALIASES = 50
+REPEAT = 5
+NUMBER = 20
+
+
+def make_settings(aliases: int = ALIASES) -> list:
+    """Generate connection settings list, mixing prefixed and camel case keys."""
+    return [
+        {
+            "MONGODB_ALIAS": f"alias_{index}",
+            "MONGODB_DB": f"flask_mongoengine_bench_{index}",
+            "HOST": "localhost",
+            "PORT": 27017,
+            "MAXPOOLSIZE": 10,
+            "serverSelectionTimeoutMS": 1000,
+            "CONNECT": False,
+        }
+        for index in range(aliases)
+    ]
+
+
+def init_app():
+    """Create and initialize new application, as application factory does."""
+    app = flask.Flask(__name__)
+    app.config["MONGODB_SETTINGS"] = make_settings()
+    MongoEngine().init_app(app)
+    mongoengine.disconnect_all()
+
+
+def main():
+    timings = timeit.repeat(init_app, repeat=REPEAT, number=NUMBER)
+    best = min(timings) / NUMBER * 1000
+    print(
+        f"init_app() with {ALIASES} aliases: {best:.3f}ms per call (best of {REPEAT})"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Microbenchmark of WTForm options generation for all fields of
+:mod:`flask_mongoengine.db_fields`: first (cold) access to
+:attr:`WtfFieldMixin.wtf_field_options`, generating options template, against next
+(warm) accesses, and :func:`WtfFieldMixin.to_wtf_field` calls, where supported.
+
+Database connection is not required.
+
+Usage::
+
+    python benchmarks/bench_fields.py
+"""
+import enum
+import timeit
+
+from flask_mongoengine import db_fields
+from flask_mongoengine.documents import Document, EmbeddedDocument
+
+REPEAT = 5
+NUMBER = 2000
+
+
+class Color(enum.Enum):
+    RED = "red"
+
+
+class Target(Document):
+    name = db_fields.StringField()
+
+
+class Embedded(EmbeddedDocument):
+    name = db_fields.StringField()
+
+
+# Minimal required arguments of fields, that can not be created without arguments.
+FIELD_KWARGS = {
+    "CachedReferenceField": {"document_type": Target},
+    "EmbeddedDocumentField": {"document_type": Embedded},
+    "EmbeddedDocumentListField": {"document_type": Embedded},
+    "EnumField": {"enum": Color},
+    "LazyReferenceField": {"document_type": Target},
+    "ListField": {"field": db_fields.StringField()},
+    "MapField": {"field": db_fields.StringField()},
+    "ReferenceField": {"document_type": Target},
+    "SortedListField": {"field": db_fields.StringField()},
+    "StringField": {"max_length": 100, "regex": r"\w+"},
+}
+
+
+def make_field(name: str):
+    field = getattr(db_fields, name)(required=True, **FIELD_KWARGS.get(name, {}))
+    field.name = "field"  # Set by document metaclass.
+    return field
+
+
+def best_of(function) -> float:
+    timings = timeit.repeat(function, repeat=REPEAT, number=NUMBER)
+    return min(timings) / NUMBER * 1_000_000
+
+
+def cold_options(field):
+    field.name = field.name  # Any settings change drops options template.
+    return field.wtf_field_options
+
+
+def main():
+    names = [name for name in db_fields.__all__ if name != "WtfFieldMixin"]
+    print(f"{'Field':<30} {'cold, us':>10} {'warm, us':>10} {'to_wtf_field, us':>17}")
+    for name in names:
+        field = make_field(name)
+        cold = best_of(lambda: cold_options(field))
+        warm = best_of(lambda: field.wtf_field_options)
+        try:
+            field.to_wtf_field()
+        except NotImplementedError:
+            to_wtf_field = "-"
+        else:
+            to_wtf_field = f"{best_of(field.to_wtf_field):.2f}"
+        print(f"{name:<30} {cold:>10.2f} {warm:>10.2f} {to_wtf_field:>17}")
+
+
+if __name__ == "__main__":
+    main()
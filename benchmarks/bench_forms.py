@@ -0,0 +1,66 @@
+"""
+Benchmark of form classes generation with :func:`WtfFormMixin.to_wtf_form`, for
+model with 60 fields, with and without generated classes cache.
+
+Database connection is not required.
+
+Usage::
+
+    python benchmarks/bench_forms.py
+"""
+import timeit
+
+from flask_mongoengine import MongoEngine
+from flask_mongoengine.documents import clear_form_cache
+
+FIELDS = 60
+REPEAT = 5
+NUMBER = 100
+
+db = MongoEngine()
+field_factories = [
+    lambda: db.StringField(max_length=100, required=True),
+    lambda: db.IntField(min_value=0, max_value=1000),
+    lambda: db.FloatField(min_value=0),
+    lambda: db.BooleanField(),
+    lambda: db.DateTimeField(),
+    lambda: db.EmailField(),
+]
+Model = type(
+    "Model",
+    (db.Document,),
+    {
+        f"field_{index}": field_factories[index % len(field_factories)]()
+        for index in range(FIELDS)
+    },
+)
+
+
+def bench(title: str, function) -> float:
+    timings = timeit.repeat(function, repeat=REPEAT, number=NUMBER)
+    best = min(timings) / NUMBER * 1000
+    print(f"{title}: {best:.3f}ms per form class (best of {REPEAT})")
+    return best
+
+
+def generate_without_cache():
+    clear_form_cache()
+    return Model.to_wtf_form(exclude=["id"])
+
+
+def main():
+    bench(f"to_wtf_form() without cache, {FIELDS} fields", generate_without_cache)
+    bench(
+        f"to_wtf_form() cached, {FIELDS} fields",
+        lambda: Model.to_wtf_form(exclude=["id"]),
+    )
+    bench(
+        "to_wtf_form() cached, with fields_kwargs",
+        lambda: Model.to_wtf_form(
+            exclude=["id"], fields_kwargs={"field_0": {"label": "First"}}
+        ),
+    )
+
+
+if __name__ == "__main__":
+    main()
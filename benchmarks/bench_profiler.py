@@ -0,0 +1,79 @@
+"""
+Benchmark of :class:`flask_mongoengine.profiler.MongoProfiler` overhead.
+
+Each request emits driver monitoring events for ``COMMANDS`` fake ``find``
+commands directly to registered listeners, so no database instance required and
+only profiler overhead is measured.
+
+Usage::
+
+    python benchmarks/bench_profiler.py
+"""
+import timeit
+from types import SimpleNamespace
+
+import flask
+
+from flask_mongoengine.profiler import MongoProfiler
+
+COMMANDS = 20
+REPEAT = 5
+NUMBER = 500
+
+
+def make_events(index: int):
+    """Pair of 'started' and 'succeeded' events for single fake command."""
+    started = SimpleNamespace(
+        request_id=index,
+        operation_id=index,
+        database_name="flask_mongoengine_bench",
+        command_name="find",
+        command={"find": "todo", "filter": {"_id": index}, "limit": 1},
+    )
+    succeeded = SimpleNamespace(
+        request_id=index, operation_id=index, duration_micros=500
+    )
+    return started, succeeded
+
+
+EVENTS = [make_events(index) for index in range(COMMANDS)]
+
+
+def make_app(sample_rate=None) -> flask.Flask:
+    """Application with single view, optionally profiled with given sample rate."""
+    app = flask.Flask(__name__)
+    listeners = []
+    if sample_rate is not None:
+        app.config["MONGO_PROFILER_SAMPLE_RATE"] = sample_rate
+        app.config["MONGO_PROFILER_DUMP_INTERVAL"] = 3600
+        listeners.append(MongoProfiler(app).listener)
+
+    @app.route("/")
+    def index():
+        for started, succeeded in EVENTS:
+            for listener in listeners:
+                listener.started(started)
+            for listener in listeners:
+                listener.succeeded(succeeded)
+        return "ok"
+
+    return app
+
+
+def bench(title: str, app: flask.Flask) -> float:
+    client = app.test_client()
+    timings = timeit.repeat(lambda: client.get("/"), repeat=REPEAT, number=NUMBER)
+    best = min(timings) / NUMBER * 1000
+    print(f"{title}: {best:.4f}ms per request (best of {REPEAT})")
+    return best
+
+
+def main():
+    baseline = bench("No profiler", make_app())
+    for sample_rate in (100, 10, 1):
+        timing = bench(f"Sample rate 1/{sample_rate}", make_app(sample_rate))
+        print(f"  overhead: {timing - baseline:+.4f}ms per request")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Benchmark of :func:`BaseQuerySet.values` and :func:`BaseQuerySet.raw_values_list`
+against documents iteration and ``as_pymongo()``.
+
+Requires MongoDB instance, configured with ``MONGODB_HOST`` environment variable
+(``mongodb://localhost:27017`` by default). Pass ``--mongomock`` to run with mongomock
+instead (absolute numbers are not representative).
+
+Usage::
+
+    python benchmarks/bench_values.py
+"""
+import os
+import sys
+import timeit
+
+import flask
+
+from flask_mongoengine import MongoEngine
+
+DOCUMENTS = 2000
+REPEAT = 5
+NUMBER = 3
+
+app = flask.Flask(__name__)
+settings = {
+    "db": "flask_mongoengine_bench",
+    "host": os.environ.get("MONGODB_HOST", "mongodb://localhost:27017"),
+}
+if "--mongomock" in sys.argv:
+    import mongomock
+
+    settings["mongo_client_class"] = mongomock.MongoClient
+app.config["MONGODB_SETTINGS"] = settings
+db = MongoEngine(app)
+
+
+class Todo(db.Document):
+    title = db.StringField(max_length=60)
+    text = db.StringField()
+    done = db.BooleanField(default=False)
+    comments = db.ListField(field=db.StringField())
+    comment_count = db.IntField()
+
+
+def bench(title: str, function) -> float:
+    timings = timeit.repeat(function, repeat=REPEAT, number=NUMBER)
+    best = min(timings) / NUMBER * 1000
+    print(f"{title}: {best:.3f}ms per {DOCUMENTS} documents (best of {REPEAT})")
+    return best
+
+
+def main():
+    Todo.drop_collection()
+    Todo.objects.insert(
+        [
+            Todo(title=f"todo {index}", text="text " * 50, comments=["a", "b"])
+            for index in range(DOCUMENTS)
+        ],
+        load_bulk=False,
+    )
+
+    bench("Documents iteration", lambda: [(t.id, t.title) for t in Todo.objects])
+    bench(
+        "Documents iteration with only()",
+        lambda: [(t.id, t.title) for t in Todo.objects.only("title")],
+    )
+    bench(
+        "as_pymongo() with only()",
+        lambda: [
+            (t["_id"], t["title"]) for t in Todo.objects.only("title").as_pymongo()
+        ],
+    )
+    bench("values()", lambda: Todo.objects.values("id", "title"))
+    bench("raw_values_list()", lambda: Todo.objects.raw_values_list("id", "title"))
+    Todo.drop_collection()
+
+
+if __name__ == "__main__":
+    main()
@@ -84,7 +84,16 @@ class MongoEngine:
         if app is not None:
             self.init_app(app, config)
 
-    def init_app(self, app, config=None):
+    def init_app(self, app, config=None, verify: bool = False):
+        """
+        Initialize extension and establish database connection(s).
+
+        :param app: Flask application instance.
+        :param config: DEPRECATED: Flat database configuration dictionary.
+        :param verify: Ping every connection and create indexes for all registered
+            documents on startup. Raises on any database error. Check
+            :func:`~flask_mongoengine.connection.verify_connections` for details.
+        """
         if not app or not isinstance(app, Flask):
             raise TypeError("Invalid Flask application instance")
 
@@ -123,6 +132,8 @@ class MongoEngine:
 
         # Obtain db connection(s)
         connections = create_connections(self.config)
+        if verify:
+            verify_connections(connections)
 
         # Store objects in application instance so that multiple apps do not
         # end up accessing the same objects.
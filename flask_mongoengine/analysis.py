@@ -0,0 +1,275 @@
+"""Database commands analysis helpers: fingerprints, repeated queries and explain."""
+__all__ = [
+    "ExplainSummary",
+    "RepeatedQuery",
+    "command_fingerprint",
+    "explain_command",
+    "find_query_origin",
+    "find_repeated_queries",
+]
+import sys
+from collections import Counter
+from dataclasses import dataclass
+from typing import Iterable, List, Optional
+
+from bson import json_util
+
+# Command keys, added by driver and not related to query shape.
+IGNORED_COMMAND_KEYS = {
+    "$clusterTime",
+    "$db",
+    "$readPreference",
+    "autocommit",
+    "lsid",
+    "readConcern",
+    "signature",
+    "startTransaction",
+    "txnNumber",
+    "writeConcern",
+}
+
+# Modules, that never considered as query origin.
+IGNORED_ORIGIN_MODULES = (
+    "bson",
+    "concurrent",
+    "contextlib",
+    "flask",
+    "flask_mongoengine",
+    "functools",
+    "jinja2",
+    "mongoengine",
+    "pymongo",
+    "threading",
+    "werkzeug",
+)
+
+# Commands, that support 'explain' and can be safely re-executed.
+EXPLAINABLE_COMMANDS = {"aggregate", "count", "find"}
+
+PLACEHOLDER = "?"
+
+
+def _replace_literals(value):
+    """Recursively replace all literal values with placeholder, keeping keys."""
+    if isinstance(value, dict):
+        return {key: _replace_literals(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        if not any(isinstance(item, (dict, list, tuple)) for item in value):
+            # Literal lists, like '$in' values, of any size match.
+            return [PLACEHOLDER] if value else []
+        # Documents lists, like pipeline stages or '$or' branches, keep shape of
+        # each element. Consecutive same shape elements, like inserted documents,
+        # are collapsed, so batches of any size match.
+        shapes = []
+        for item in value:
+            shape = _replace_literals(item)
+            if not shapes or shapes[-1] != shape:
+                shapes.append(shape)
+        return shapes
+    return PLACEHOLDER
+
+
+def command_fingerprint(database: str, command_name: str, command: dict) -> str:
+    """
+    Return query shape string, with all literal values replaced by placeholders.
+
+    Commands, that differ only by values, have same fingerprint::
+
+        command_fingerprint("db", "find", {"find": "user", "filter": {"_id": 1}})
+        # 'db.user find {"filter": {"_id": "?"}}'
+
+    :param database: Database name.
+    :param command_name: Database command name, like ``find`` or ``aggregate``.
+    :param command: Raw database command, as send to server.
+    """
+    command = command or {}
+    collection = command.get(command_name)
+    if command_name == "getMore":
+        collection = command.get("collection")
+    shape = {
+        key: _replace_literals(value)
+        for key, value in command.items()
+        if key != command_name and key not in IGNORED_COMMAND_KEYS
+    }
+    return f"{database}.{collection} {command_name} {json_util.dumps(shape)}"
+
+
+def _is_ignored_module(module_name: Optional[str]) -> bool:
+    """Check that module is a part of libraries, not user application code."""
+    if not module_name:
+        return False
+    return any(
+        module_name == ignored or module_name.startswith(f"{ignored}.")
+        for ignored in IGNORED_ORIGIN_MODULES
+    )
+
+
+def find_query_origin(skip: int = 1) -> Optional[str]:
+    """
+    Return first application code line in current call stack, as
+    ``"filename:line in function"``.
+
+    Libraries frames (pymongo, mongoengine, flask, etc.) are skipped, Jinja2
+    templates frames are kept, so dereferences made in templates loops are reported
+    with template name.
+
+    :param skip: Number of current call stack frames to skip.
+    """
+    # noinspection PyProtectedMember
+    frame = sys._getframe(skip)
+    while frame is not None:
+        if not _is_ignored_module(frame.f_globals.get("__name__")):
+            code = frame.f_code
+            return f"{code.co_filename}:{frame.f_lineno} in {code.co_name}"
+        frame = frame.f_back
+    return None
+
+
+@dataclass
+class RepeatedQuery:
+    """Group of same shape queries, executed many times in single request.
+
+    :param fingerprint: Query shape, check :func:`command_fingerprint`.
+    :param count: Number of queries in group.
+    :param total_time: Sum of queries execution time, in ms.
+    :param origin: Most common application code line, that initiated queries.
+    """
+
+    fingerprint: str
+    count: int
+    total_time: float
+    origin: Optional[str]
+
+
+def find_repeated_queries(queries: Iterable, threshold: int) -> List[RepeatedQuery]:
+    """
+    Group queries by fingerprint and return groups with at least ``threshold``
+    queries. Typical N+1 problem, like reference fields dereference in loop, looks
+    like many ``find`` commands with different ``_id`` filter values.
+
+    :param queries: Any iterable of
+        :class:`~flask_mongoengine.monitoring.RawQueryEvent` like objects.
+    :param threshold: Minimal number of same shape queries to report.
+    :return: Repeated queries groups, most repeated first.
+    """
+    groups = {}
+    for query in queries:
+        group = groups.setdefault(query.fingerprint, [0, 0.0, Counter()])
+        group[0] += 1
+        group[1] += query.time
+        if query.origin:
+            group[2][query.origin] += 1
+
+    repeated = [
+        RepeatedQuery(
+            fingerprint=fingerprint,
+            count=count,
+            total_time=total_time,
+            origin=origins.most_common(1)[0][0] if origins else None,
+        )
+        for fingerprint, (count, total_time, origins) in groups.items()
+        if count >= threshold
+    ]
+    return sorted(repeated, key=lambda item: item.count, reverse=True)
+
+
+@dataclass
+class ExplainSummary:
+    """Short summary of ``explain`` command output with ``executionStats``.
+
+    :param stages: Winning plan stages, from top to bottom, like
+        ``["FETCH", "IXSCAN"]``.
+    :param index_names: Names of indexes, used by winning plan.
+    :param keys_examined: Total index keys examined.
+    :param docs_examined: Total documents examined.
+    :param docs_returned: Number of returned documents.
+    :param execution_time: Server side execution time, in ms.
+    """
+
+    stages: List[str]
+    index_names: List[str]
+    keys_examined: Optional[int]
+    docs_examined: Optional[int]
+    docs_returned: Optional[int]
+    execution_time: Optional[int]
+
+    @property
+    def winning_stage(self) -> Optional[str]:
+        """Top stage of winning plan."""
+        return self.stages[0] if self.stages else None
+
+    @property
+    def is_collection_scan(self) -> bool:
+        """Winning plan includes full collection scan."""
+        return "COLLSCAN" in self.stages
+
+
+def _find_key(document, key: str):
+    """Depth-first search of first ``key`` value in nested explain output."""
+    if isinstance(document, dict):
+        if key in document:
+            return document[key]
+        items = document.values()
+    elif isinstance(document, list):
+        items = document
+    else:
+        return None
+    for item in items:
+        found = _find_key(item, key)
+        if found is not None:
+            return found
+    return None
+
+
+def _plan_stages(plan: Optional[dict], stages: list, index_names: list):
+    """Collect winning plan stages and index names, from top to bottom."""
+    if not plan:
+        return
+    # Slot based execution engine wraps classic plan.
+    plan = plan.get("queryPlan", plan)
+    if "stage" in plan:
+        stages.append(plan["stage"])
+    if "indexName" in plan:
+        index_names.append(plan["indexName"])
+    _plan_stages(plan.get("inputStage"), stages, index_names)
+    for input_stage in plan.get("inputStages", []):
+        _plan_stages(input_stage, stages, index_names)
+
+
+def explain_command(
+    client, database: str, command_name: str, command: dict
+) -> Optional[ExplainSummary]:
+    """
+    Re-execute command with ``explain`` in ``executionStats`` verbosity.
+
+    :param client: :class:`~pymongo.mongo_client.MongoClient` connected to server,
+        that executed original command.
+    :param database: Database name.
+    :param command_name: Original command name, only ``find``, ``aggregate`` and
+        ``count`` supported.
+    :param command: Original raw command, as send to server.
+    :return: Explain output summary or ``None`` for not supported command.
+    """
+    if command_name not in EXPLAINABLE_COMMANDS:
+        return None
+
+    explained = {
+        key: value for key, value in command.items() if key not in IGNORED_COMMAND_KEYS
+    }
+    # Command name must be first key of MongoDB command.
+    explained = {command_name: explained.pop(command_name), **explained}
+    output = client[database].command(
+        {"explain": explained, "verbosity": "executionStats"}
+    )
+
+    stages, index_names = [], []
+    _plan_stages(_find_key(output, "winningPlan"), stages, index_names)
+    stats = _find_key(output, "executionStats") or {}
+    return ExplainSummary(
+        stages=stages,
+        index_names=index_names,
+        keys_examined=stats.get("totalKeysExamined"),
+        docs_examined=stats.get("totalDocsExamined"),
+        docs_returned=stats.get("nReturned"),
+        execution_time=stats.get("executionTimeMillis"),
+    )
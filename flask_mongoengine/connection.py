@@ -1,15 +1,75 @@
 """Module responsible for connection setup."""
+import importlib.util
+import logging
+import re
+import time
 import warnings
-from typing import List
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Dict, List, Optional, Set, Type
+from urllib.parse import parse_qs
 
 import mongoengine
+from mongoengine.base.common import _document_registry
 
 __all__ = (
+    "CONNECTION_PROFILES",
     "create_connections",
     "get_connection_settings",
+    "get_effective_settings",
+    "verify_connections",
 )
+logger = logging.getLogger("flask_mongoengine")
 
 
+# Based on pymongo 4.1.1 settings.
+KNOWN_CAMEL_CASE_SETTINGS = {
+    "directconnection": "directConnection",
+    "maxpoolsize": "maxPoolSize",
+    "minpoolsize": "minPoolSize",
+    "maxidletimems": "maxIdleTimeMS",
+    "maxconnecting": "maxConnecting",
+    "sockettimeoutms": "socketTimeoutMS",
+    "connecttimeoutms": "connectTimeoutMS",
+    "serverselectiontimeoutms": "serverSelectionTimeoutMS",
+    "waitqueuetimeoutms": "waitQueueTimeoutMS",
+    "heartbeatfrequencyms": "heartbeatFrequencyMS",
+    "retrywrites": "retryWrites",
+    "retryreads": "retryReads",
+    "zlibcompressionlevel": "zlibCompressionLevel",
+    "uuidrepresentation": "uuidRepresentation",
+    "srvservicename": "srvServiceName",
+    "wtimeoutms": "wTimeoutMS",
+    "replicaset": "replicaSet",
+    "readpreference": "readPreference",
+    "readpreferencetags": "readPreferenceTags",
+    "maxstalenessseconds": "maxStalenessSeconds",
+    "authsource": "authSource",
+    "authmechanism": "authMechanism",
+    "authmechanismproperties": "authMechanismProperties",
+    "tlsinsecure": "tlsInsecure",
+    "tlsallowinvalidcertificates": "tlsAllowInvalidCertificates",
+    "tlsallowinvalidhostnames": "tlsAllowInvalidHostnames",
+    "tlscafile": "tlsCAFile",
+    "tlscertificatekeyfile": "tlsCertificateKeyFile",
+    "tlscrlfile": "tlsCRLFile",
+    "tlscertificatekeyfilepassword": "tlsCertificateKeyFilePassword",
+    "tlsdisableocspendpointcheck": "tlsDisableOCSPEndpointCheck",
+    "readconcernlevel": "readConcernLevel",
+}
+
+# Flat ``MONGODB_`` prefixed variables, used by other extension parts, not connection.
+NOT_CONNECTION_SETTINGS = {
+    "MONGODB_BATCH_REFERENCES",
+    "MONGODB_IDENTITY_MAP",
+    "MONGODB_QUERY_CACHE",
+    "MONGODB_REQUEST_BUDGET",
+    "MONGODB_REQUEST_BUDGET_RAISE",
+}
+
+
+@lru_cache(maxsize=512)
 def _get_name(setting_name: str) -> str:
     """
     Return known pymongo setting name, or lower case name for unknown.
@@ -21,55 +81,25 @@ def _get_name(setting_name: str) -> str:
     This function address this issue, and potentially address cases when pymongo will
     become case-sensitive in some settings by same reasons as mongoengine done.
 
-    Based on pymongo 4.1.1 settings.
-    """
-    KNOWN_CAMEL_CASE_SETTINGS = {
-        "directconnection": "directConnection",
-        "maxpoolsize": "maxPoolSize",
-        "minpoolsize": "minPoolSize",
-        "maxidletimems": "maxIdleTimeMS",
-        "maxconnecting": "maxConnecting",
-        "sockettimeoutms": "socketTimeoutMS",
-        "connecttimeoutms": "connectTimeoutMS",
-        "serverselectiontimeoutms": "serverSelectionTimeoutMS",
-        "waitqueuetimeoutms": "waitQueueTimeoutMS",
-        "heartbeatfrequencyms": "heartbeatFrequencyMS",
-        "retrywrites": "retryWrites",
-        "retryreads": "retryReads",
-        "zlibcompressionlevel": "zlibCompressionLevel",
-        "uuidrepresentation": "uuidRepresentation",
-        "srvservicename": "srvServiceName",
-        "wtimeoutms": "wTimeoutMS",
-        "replicaset": "replicaSet",
-        "readpreference": "readPreference",
-        "readpreferencetags": "readPreferenceTags",
-        "maxstalenessseconds": "maxStalenessSeconds",
-        "authsource": "authSource",
-        "authmechanism": "authMechanism",
-        "authmechanismproperties": "authMechanismProperties",
-        "tlsinsecure": "tlsInsecure",
-        "tlsallowinvalidcertificates": "tlsAllowInvalidCertificates",
-        "tlsallowinvalidhostnames": "tlsAllowInvalidHostnames",
-        "tlscafile": "tlsCAFile",
-        "tlscertificatekeyfile": "tlsCertificateKeyFile",
-        "tlscrlfile": "tlsCRLFile",
-        "tlscertificatekeyfilepassword": "tlsCertificateKeyFilePassword",
-        "tlsdisableocspendpointcheck": "tlsDisableOCSPEndpointCheck",
-        "readconcernlevel": "readConcernLevel",
-    }
-    _setting_name = KNOWN_CAMEL_CASE_SETTINGS.get(setting_name.lower())
-    return setting_name.lower() if _setting_name is None else _setting_name
+    Results are memoized, as same settings names are resolved for every alias of
+    every application, created by application factory.
+    """
+    lower_name = setting_name.lower()
+    return KNOWN_CAMEL_CASE_SETTINGS.get(lower_name, lower_name)
+
+
+@lru_cache(maxsize=512)
+def _get_key(setting_name: str) -> str:
+    """Return setting name without ``MONGODB_`` prefix, resolved by :func:`_get_name`."""
+    # Replace with k.lower().removeprefix("mongodb_") when python 3.8 support ends.
+    if setting_name.lower().startswith("mongodb_"):
+        return _get_name(setting_name[8:])
+    return _get_name(setting_name)
 
 
 def _sanitize_settings(settings: dict) -> dict:
     """Remove ``MONGODB_`` prefix from dict values, to correct bypass to mongoengine."""
-    resolved_settings = {}
-    for k, v in settings.items():
-        # Replace with k.lower().removeprefix("mongodb_") when python 3.8 support ends.
-        key = _get_name(k[8:]) if k.lower().startswith("mongodb_") else _get_name(k)
-        resolved_settings[key] = v
-
-    return resolved_settings
+    return {_get_key(k): v for k, v in settings.items()}
 
 
 def get_connection_settings(config: dict) -> List[dict]:
@@ -92,7 +122,11 @@ def get_connection_settings(config: dict) -> List[dict]:
             DeprecationWarning,
             stacklevel=2,
         )
-        config = {k: v for k, v in config.items() if k.lower().startswith("mongodb_")}
+        config = {
+            k: v
+            for k, v in config.items()
+            if k.lower().startswith("mongodb_") and k not in NOT_CONNECTION_SETTINGS
+        }
         return [_sanitize_settings(config)]
 
     # Sanitize all the settings living under a "MONGODB_SETTINGS" config var
@@ -106,10 +140,110 @@ def get_connection_settings(config: dict) -> List[dict]:
     return [_sanitize_settings(settings)]
 
 
-def create_connections(config: dict):
+# Driver tuning presets, selected by ``MONGODB_PROFILE`` config variable or by
+# ``profile`` key of individual connection settings. Explicit settings always
+# take precedence over preset values.
+CONNECTION_PROFILES = {
+    "low_latency": {
+        "compressors": ["snappy", "zstd", "zlib"],
+        "maxPoolSize": 100,
+        "minPoolSize": 10,
+        "maxIdleTimeMS": 60000,
+        "connectTimeoutMS": 2000,
+        "serverSelectionTimeoutMS": 2000,
+        "socketTimeoutMS": 5000,
+        "retryReads": True,
+        "retryWrites": True,
+    },
+    "bulk": {
+        "compressors": ["zstd", "zlib", "snappy"],
+        "maxPoolSize": 20,
+        "minPoolSize": 0,
+        "maxIdleTimeMS": 300000,
+        "connectTimeoutMS": 10000,
+        "serverSelectionTimeoutMS": 30000,
+        "socketTimeoutMS": 600000,
+        "retryReads": True,
+        "retryWrites": True,
+    },
+    "cross_region": {
+        "compressors": ["zstd", "snappy", "zlib"],
+        "maxPoolSize": 50,
+        "minPoolSize": 5,
+        "maxIdleTimeMS": 120000,
+        "connectTimeoutMS": 10000,
+        "serverSelectionTimeoutMS": 15000,
+        "socketTimeoutMS": 30000,
+        "retryReads": True,
+        "retryWrites": True,
+    },
+}
+
+# Python modules required by pymongo for each wire compressor.
+_COMPRESSORS_MODULES = {"snappy": "snappy", "zstd": "zstandard", "zlib": "zlib"}
+
+# Settings, that should never appear in logs or reports.
+_SECRET_SETTINGS = {"password", "tlscertificatekeyfilepassword"}
+
+
+@lru_cache(maxsize=None)
+def _is_compressor_available(compressor: str) -> bool:
+    """Check that python module, required for wire compressor, is installed."""
+    module = _COMPRESSORS_MODULES.get(compressor)
+    return module is not None and importlib.util.find_spec(module) is not None
+
+
+def _available_compressors(compressors: List[str]) -> List[str]:
+    """Filter compressors list, leaving only compressors supported by environment."""
+    return [name for name in compressors if _is_compressor_available(name)]
+
+
+def _get_uri_options(settings: dict) -> Set[str]:
+    """Return lower case names of options, provided in query of ``host`` URI(s)."""
+    hosts = settings.get("host") or []
+    if isinstance(hosts, str):
+        hosts = [hosts]
+    return {
+        option.lower()
+        for host in hosts
+        if "?" in host
+        for option in parse_qs(host.split("?", 1)[1])
+    }
+
+
+def _apply_profile(settings: dict, profile: Optional[str]) -> dict:
     """
-    Given Flask application's config dict, extract relevant config vars
-    out of it and establish MongoEngine connection(s) based on them.
+    Extend connection settings with driver tuning preset values.
+
+    :param settings: Sanitized connection settings, always has priority.
+    :param profile: Name of preset from :data:`CONNECTION_PROFILES`.
+    :raises ValueError: Unknown profile name.
+    """
+    if profile is None:
+        return settings
+    if profile not in CONNECTION_PROFILES:
+        raise ValueError(
+            f"Unknown MONGODB_PROFILE '{profile}'. "
+            f"Expected one of: {', '.join(CONNECTION_PROFILES)}."
+        )
+
+    explicit = {key.lower() for key in settings} | _get_uri_options(settings)
+    for key, value in CONNECTION_PROFILES[profile].items():
+        if key.lower() in explicit:
+            continue
+        if key == "compressors":
+            value = _available_compressors(value)
+            if not value:
+                continue
+        settings[key] = value
+
+    return settings
+
+
+def _resolve_connections_settings(config: dict) -> List[dict]:
+    """
+    Return final settings of each connection, exactly as passed to
+    :func:`mongoengine.connect`.
     """
     # Validate that the config is a dict and dict is not empty
     if not config or not isinstance(config, dict):
@@ -118,13 +252,137 @@ def create_connections(config: dict):
     # Get sanitized connection settings based on the config
     connection_settings = get_connection_settings(config)
 
-    connections = {}
     for connection_setting in connection_settings:
-        alias = connection_setting.setdefault(
-            "alias",
-            mongoengine.DEFAULT_CONNECTION_NAME,
-        )
+        connection_setting.setdefault("alias", mongoengine.DEFAULT_CONNECTION_NAME)
         connection_setting.setdefault("uuidRepresentation", "standard")
+        profile = connection_setting.pop("profile", config.get("MONGODB_PROFILE"))
+        _apply_profile(connection_setting, profile)
+
+    return connection_settings
+
+
+def _mask_secrets(settings: dict) -> dict:
+    """Return copy of connection settings with passwords replaced by ``***``."""
+    masked = {}
+    for key, value in settings.items():
+        if key.lower() in _SECRET_SETTINGS and value is not None:
+            value = "***"
+        elif key == "host" and isinstance(value, str):
+            value = re.sub(r"//[^@/]+@", "//***@", value)
+        elif key == "host" and isinstance(value, list):
+            value = [re.sub(r"//[^@/]+@", "//***@", host) for host in value]
+        masked[key] = value
+    return masked
+
+
+def get_effective_settings(config: dict) -> Dict[str, dict]:
+    """
+    Report final settings of each connection alias, after applying defaults and
+    ``MONGODB_PROFILE`` preset, with passwords masked.
+
+    Allows to verify, which driver settings each worker is running with::
+
+        get_effective_settings(app.config)
+        # {"default": {"alias": "default", "maxPoolSize": 100, ...}}
+
+    :param config: Flask application's config dict.
+    """
+    return {
+        settings["alias"]: _mask_secrets(settings)
+        for settings in _resolve_connections_settings(config)
+    }
+
+
+def create_connections(config: dict):
+    """
+    Given Flask application's config dict, extract relevant config vars
+    out of it and establish MongoEngine connection(s) based on them.
+    """
+    connections = {}
+    for connection_setting in _resolve_connections_settings(config):
+        alias = connection_setting["alias"]
+        logger.info(
+            f"Connecting '{alias}' with settings: {_mask_secrets(connection_setting)}"
+        )
         connections[alias] = mongoengine.connect(**connection_setting)
 
     return connections
+
+
+def _ping(alias: str) -> float:
+    """Send ``ping`` command to connection alias and return elapsed time in ms."""
+    started = time.perf_counter()
+    mongoengine.get_connection(alias).admin.command("ping")
+    return (time.perf_counter() - started) * 1000
+
+
+def _ensure_indexes(document: Type[mongoengine.Document]) -> float:
+    """Create document indexes and return elapsed time in ms."""
+    started = time.perf_counter()
+    document.ensure_indexes()
+    return (time.perf_counter() - started) * 1000
+
+
+def _get_documents_by_alias(aliases) -> Dict[str, List[Type[mongoengine.Document]]]:
+    """
+    Group all registered, non-abstract documents classes by connection alias.
+
+    Only aliases from :attr:`aliases` are included in result.
+    """
+    documents = defaultdict(list)
+    for document in _document_registry.values():
+        if not issubclass(document, mongoengine.Document):
+            continue
+        if document._meta.get("abstract"):
+            continue
+        alias = document._meta.get("db_alias", mongoengine.DEFAULT_CONNECTION_NAME)
+        if alias in aliases:
+            documents[alias].append(document)
+    return documents
+
+
+def verify_connections(connections: dict, max_workers: Optional[int] = None) -> dict:
+    """
+    Ping every connection alias and create indexes of all registered documents.
+
+    All pings and indexes creation executed concurrently on a thread pool, so startup
+    time depends on the slowest alias/collection, not on their total amount. Any
+    connection or index creation error is raised, allowing application to fail fast
+    on deployment, instead of creating indexes lazily, inside first request that
+    touches each collection.
+
+    :param connections: Dictionary of connections, as returned by
+        :func:`create_connections`.
+    :param max_workers: Maximum amount of threads in pool, by default
+        :class:`~concurrent.futures.ThreadPoolExecutor` default.
+    :return: Startup report dictionary with timings in milliseconds, in format:
+        ``{alias: {"ping": ms, "indexes": {document_name: ms}}}``
+    """
+    started = time.perf_counter()
+    documents = _get_documents_by_alias(connections)
+    report = {alias: {"ping": None, "indexes": {}} for alias in connections}
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        pings = {alias: executor.submit(_ping, alias) for alias in connections}
+        for alias, future in pings.items():
+            report[alias]["ping"] = future.result()
+
+        indexes = {
+            (alias, document._class_name): executor.submit(_ensure_indexes, document)
+            for alias, alias_documents in documents.items()
+            for document in alias_documents
+        }
+        for (alias, document_name), future in indexes.items():
+            report[alias]["indexes"][document_name] = future.result()
+
+    for alias, alias_report in report.items():
+        logger.info(
+            f"Connection '{alias}' verified: ping {alias_report['ping']:.2f}ms, "
+            f"{len(alias_report['indexes'])} documents indexes ensured in "
+            f"{sum(alias_report['indexes'].values()):.2f}ms."
+        )
+    logger.info(
+        f"Startup verification completed in "
+        f"{(time.perf_counter() - started) * 1000:.2f}ms."
+    )
+    return report
@@ -42,13 +42,17 @@ __all__ = [
     "UUIDField",
 ]
 import decimal
+import functools
+import types
 import warnings
 from typing import Callable, List, Optional, Type, Union
 
 from bson import ObjectId
 from mongoengine import fields
 
+from flask_mongoengine.dataloader import load_batched
 from flask_mongoengine.decorators import wtf_required
+from flask_mongoengine.identity_map import load_reference
 
 try:
     from wtforms import fields as wtf_fields
@@ -109,6 +113,18 @@ def _setup_numbers_common_validators(
     return options
 
 
+def _dereference(document_class, dbref, loader):
+    """
+    Dereference document with ``loader(document_class, dbref)`` function, using
+    request scoped identity map and references batching loader, if enabled.
+    """
+
+    def batched(cls, ref):
+        return load_batched(cls, ref.id, functools.partial(loader, cls, ref))
+
+    return load_reference(document_class, dbref, batched)
+
+
 class WtfFieldMixin:
     """
     Extension wrapper class for mongoengine BaseField.
@@ -196,6 +212,11 @@ class WtfFieldMixin:
 
         super().__init__(**kwargs)
 
+    def __setattr__(self, key, value):
+        """Drop precomputed WTForm options on any field settings change."""
+        self.__dict__["_wtf_options_template"] = None
+        super().__setattr__(key, value)
+
     @property
     def wtf_field_class(self) -> Type:
         """Final WTForm Field class, that will be used for field generation."""
@@ -243,12 +264,31 @@ class WtfFieldMixin:
 
         It is not recommended to overwrite this property, for logic update overwrite
         :attr:`wtf_generated_options`
+
+        Options are generated once, on first access after field setup completion (when
+        document metaclass set field :attr:`name`), and only copied on next calls.
         """
+        template = self.__dict__.get("_wtf_options_template")
+        if template is None:
+            template = self._build_wtf_options_template()
+        options = dict(template)
+        for key in ("validators", "filters"):
+            if isinstance(options.get(key), tuple):
+                options[key] = list(options[key])
+        return options
+
+    def _build_wtf_options_template(self) -> types.MappingProxyType:
+        """Generate and store immutable copy of final WTForm Field options."""
         wtf_field_kwargs = self.wtf_generated_options
         if self.wtf_options is not None:
             wtf_field_kwargs.update(self.wtf_options)
+        for key in ("validators", "filters"):
+            if isinstance(wtf_field_kwargs.get(key), list):
+                wtf_field_kwargs[key] = tuple(wtf_field_kwargs[key])
 
-        return wtf_field_kwargs
+        template = types.MappingProxyType(wtf_field_kwargs)
+        self.__dict__["_wtf_options_template"] = template
+        return template
 
     @staticmethod
     def _ensure_callable_or_list(argument, msg_flag: str) -> Optional[List]:
@@ -286,7 +326,7 @@ class WtfFieldMixin:
             :func:`~flask_mongoengine.documents.WtfFormMixin.to_wtf_form`
             :attr:`fields_kwargs` parameter.
         """
-        field_kwargs = field_kwargs or {}
+        field_kwargs = dict(field_kwargs or {})
         wtf_field_kwargs = self.wtf_field_options
         wtf_field_class = (
             field_kwargs.pop("wtf_field_class", None) or self.wtf_field_class
@@ -685,6 +725,11 @@ class GenericReferenceField(WtfFieldMixin, fields.GenericReferenceField):
     All arguments should be passed as keyword arguments, to exclude unexpected behaviour.
     """
 
+    @staticmethod
+    def _lazy_load_ref(ref_cls, dbref):
+        """Dereference document, using identity map and batching, if enabled."""
+        return _dereference(ref_cls, dbref, fields.GenericReferenceField._lazy_load_ref)
+
     def to_wtf_field(
         self,
         *,
@@ -1044,6 +1089,11 @@ class ReferenceField(WtfFieldMixin, fields.ReferenceField):
 
     DEFAULT_WTF_FIELD = custom_fields.ModelSelectField if custom_fields else None
 
+    @staticmethod
+    def _lazy_load_ref(ref_cls, dbref):
+        """Dereference document, using identity map and batching, if enabled."""
+        return _dereference(ref_cls, dbref, fields.ReferenceField._lazy_load_ref)
+
     def to_wtf_field(
         self,
         *,
@@ -1,14 +1,34 @@
 """Extended version of :mod:`mongoengine.document`."""
+import contextlib
+import contextvars
+import functools
 import logging
-from typing import Dict, List, Optional, Type, Union
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, Iterator, List, Optional, Type, Union
 
+import bson
 import mongoengine
 from flask import abort
-from mongoengine.errors import DoesNotExist
+from mongoengine.errors import DoesNotExist, ValidationError
 from mongoengine.queryset import QuerySet
+from pymongo import ReplaceOne, UpdateOne
+from pymongo.results import BulkWriteResult
 
+from flask_mongoengine.dataloader import get_reference_loader
 from flask_mongoengine.decorators import wtf_required
+from flask_mongoengine.identity_map import (
+    collection_key,
+    get_identity_map,
+    invalidate_collection,
+)
 from flask_mongoengine.pagination import ListFieldPagination, Pagination
+from flask_mongoengine.query_cache import (
+    CachedCursor,
+    LRUCache,
+    bump_collection_version,
+    get_cache_backend,
+    results_key,
+)
 
 try:
     from flask_mongoengine.wtf.models import ModelForm
@@ -16,10 +36,271 @@ except ImportError:  # pragma: no cover
     ModelForm = None
 logger = logging.getLogger("flask_mongoengine")
 
+# Fields, that store values in format, different from python values.
+_CONVERTED_FIELDS = (
+    mongoengine.fields.ComplexDateTimeField,
+    mongoengine.fields.DateField,
+    mongoengine.fields.DecimalField,
+    mongoengine.fields.EnumField,
+    mongoengine.fields.UUIDField,
+)
+
+
+def _invalidate_caches(collection):
+    """Drop cached documents and results of collection, after any write to it."""
+    invalidate_collection(collection)
+    reference_loader = get_reference_loader()
+    if reference_loader is not None:
+        reference_loader.invalidate(collection)
+    bump_collection_version(collection)
+
+
+@contextlib.contextmanager
+def _invalidating_caches(collection):
+    """
+    Drop caches of collection before and after write to it, even failed one.
+    Second invalidation drops results, read and cached by concurrent requests
+    between first invalidation and write.
+    """
+    _invalidate_caches(collection)
+    try:
+        yield
+    finally:
+        _invalidate_caches(collection)
+
+
+_MISSING = object()
+
+
+def _raw_path_value(value, path: list, converter=None):
+    """
+    Return value of raw document path, converted with ``converter``, or ``_MISSING``.
+    Lists on path are mapped over elements, like by MongoDB projection: list of
+    values of elements, that have the path, is returned.
+    """
+    for index, part in enumerate(path):
+        if isinstance(value, list):
+            found = (_raw_path_value(item, path[index:], converter) for item in value)
+            return [item for item in found if item is not _MISSING]
+        if not isinstance(value, dict) or part not in value:
+            return _MISSING
+        value = value[part]
+    if converter is not None and value is not None:
+        return converter(value)
+    return value
+
 
 class BaseQuerySet(QuerySet):
     """Extends :class:`~mongoengine.queryset.QuerySet` class with handly methods."""
 
+    # Results cache settings, check :func:`cache`.
+    _cache_timeout: Optional[float] = None
+    _cache_key: Optional[str] = None
+
+    def _clone_into(self, new_qs):
+        """Copy results cache settings to queryset clones."""
+        new_qs = super()._clone_into(new_qs)
+        new_qs._cache_timeout = self._cache_timeout
+        new_qs._cache_key = self._cache_key
+        if isinstance(new_qs._cursor_obj, CachedCursor):
+            # Like database cursor clone, clone reads results from cache again.
+            new_qs._cursor_obj = None
+        return new_qs
+
+    def cache(self, timeout: Optional[float] = 60, key: Optional[str] = None):
+        """
+        Return queryset, which results are stored in cache backend, configured by
+        ``MONGODB_QUERY_CACHE`` (in-process LRU cache by default)::
+
+            categories = Category.objects.order_by("name").cache(timeout=300)
+
+        Cache key is built from normalized filter, projection, sort, skip and limit
+        of queryset. Cached results of collection are invalidated by any
+        ``Document.save()``, ``Document.delete()`` and by queryset ``update()``,
+        ``modify()``, ``delete()``, ``insert()`` and bulk methods. Writes made
+        outside of these methods (for example, with raw pymongo) are not tracked.
+
+        Cache is used for documents iteration and indexing only, ``count()``,
+        ``distinct()``, ``explain()`` and other commands are always executed on
+        database. Index and slice access
+        (including ``first()``) is cached separately, with own skip and limit.
+
+        :param timeout: Cached results lifetime in seconds. ``None`` disables cache.
+        :param key: Custom key, used instead of query shape hash.
+        """
+        queryset = self.clone()
+        queryset._cache_timeout = timeout
+        queryset._cache_key = key
+        return queryset
+
+    def _load_cached_documents(self) -> list:
+        """Return raw BSON documents from cache, or execute query and cache them."""
+        backend = get_cache_backend()
+        query_shape = {
+            "filter": self._query,
+            "projection": self._cursor_args.get("projection"),
+            "sort": self._ordering,
+            "skip": self._skip,
+            "limit": self._limit,
+            "where": self._where_clause,
+            "hint": self._hint,
+            "collation": self._collation,
+        }
+        key = results_key(backend, self._collection, query_shape, self._cache_key)
+        documents = backend.get(key)
+        if documents is None:
+            documents = [bson.encode(document) for document in super()._cursor]
+            self._cursor_obj = None
+            backend.set(key, documents, timeout=self._cache_timeout)
+        return documents
+
+    def __getitem__(self, key):
+        """
+        With results cache enabled, index and slice are applied as skip and limit of
+        cached query, so ``first()``, ``qs[i]`` and ``bool(qs)`` load and cache
+        requested documents only, not whole results.
+        """
+        if self._cache_timeout is None or self._cursor_obj is not None:
+            return super().__getitem__(key)
+        if isinstance(key, int) and key >= 0:
+            # Same as pymongo cursor indexing: shifted skip, single document.
+            queryset = self.clone()
+            queryset._skip = (self._skip or 0) + key
+            queryset._limit = 1
+            return super(BaseQuerySet, queryset).__getitem__(0)
+        if isinstance(key, slice) and key.step is None:
+            start, stop = key.start, key.stop
+            if (start is None or start >= 0) and (stop is None or stop >= 0):
+                # Same as mongoengine slicing, without cursor creation.
+                queryset = self.clone()
+                queryset._empty = False
+                queryset._skip, queryset._limit = start, stop
+                if start and stop:
+                    queryset._limit = stop - start
+                if queryset._limit == 0:
+                    queryset._empty = True
+                return queryset
+        return super().__getitem__(key)
+
+    @property
+    def _cursor(self):
+        """Replace database cursor with cached results cursor, if cache enabled."""
+        if self._cache_timeout is None or self._cursor_obj is not None:
+            return super()._cursor
+        self._cursor_obj = CachedCursor(self._load_cached_documents(), self._collection)
+        return self._cursor_obj
+
+    def _on_database(self, method, *args, **kwargs):
+        """Call queryset method with database cursor, even if results cache enabled."""
+        if self._cache_timeout is None:
+            return method(*args, **kwargs)
+        cursor_obj, cache_timeout = self._cursor_obj, self._cache_timeout
+        self._cursor_obj, self._cache_timeout = None, None
+        try:
+            return method(*args, **kwargs)
+        finally:
+            self._cursor_obj, self._cache_timeout = cursor_obj, cache_timeout
+
+    def count(self, with_limit_and_skip=False):
+        """Same as :func:`~mongoengine.queryset.QuerySet.count`, never cached."""
+        return self._on_database(super().count, with_limit_and_skip)
+
+    def distinct(self, field):
+        """Same as :func:`~mongoengine.queryset.QuerySet.distinct`, never cached."""
+        return self._on_database(super().distinct, field)
+
+    def explain(self):
+        """Same as :func:`~mongoengine.queryset.QuerySet.explain`, never cached."""
+        return self._on_database(super().explain)
+
+    def _identity_key(self, q_objs, query):
+        """
+        Return identity map key for plain primary key lookup, like ``get(pk=1)``, or
+        ``None`` if query cannot be served from identity map.
+        """
+        if q_objs or len(query) != 1:
+            return None
+        id_field = self._document._meta["id_field"]
+        name, value = next(iter(query.items()))
+        if name not in {"pk", "id", id_field}:
+            return None
+        # Filtered, projected or otherwise modified querysets always hit database.
+        if (
+            self._query_obj
+            or self._where_clause
+            or self._loaded_fields
+            or self._as_pymongo
+            or self._scalar
+            or self._none
+            or self._search_text
+            or self._skip
+            or self._limit
+        ):
+            return None
+        try:
+            value = self._document._fields[id_field].to_mongo(value)
+            hash(value)
+        except (TypeError, ValueError, ValidationError):
+            return None
+        return (*collection_key(self._collection), value)
+
+    def __next__(self):
+        """Register references of loaded document in batching loader, if enabled."""
+        document = super().__next__()
+        if not self._as_pymongo and not self._scalar:
+            reference_loader = get_reference_loader()
+            if reference_loader is not None:
+                reference_loader.register(document)
+        return document
+
+    def get(self, *q_objs, **query):
+        """
+        Same as :func:`~mongoengine.queryset.QuerySet.get`, but plain primary key
+        lookups, like ``get(pk=...)``, are served from request scoped identity map,
+        when ``MONGODB_IDENTITY_MAP`` enabled, and batched with other pending
+        references, when ``MONGODB_BATCH_REFERENCES`` enabled.
+        """
+        identity_map = get_identity_map()
+        reference_loader = get_reference_loader()
+        key = None
+        if identity_map is not None or reference_loader is not None:
+            key = self._identity_key(q_objs, query)
+        if key is None:
+            return super().get(*q_objs, **query)
+
+        document = identity_map.get(key, self._document) if identity_map else None
+        if document is not None:
+            return document
+
+        loader = functools.partial(QuerySet.get, self, *q_objs, **query)
+        if reference_loader is not None:
+            document = reference_loader.load(self._document, key[2], loader)
+        else:
+            document = loader()
+        if identity_map is not None:
+            identity_map.add(key, document)
+        return document
+
+    def update(self, *args, **kwargs):
+        """Execute :func:`~QuerySet.update`, invalidating caches before and after it."""
+        with _invalidating_caches(self._collection):
+            return super().update(*args, **kwargs)
+
+    def modify(self, *args, **kwargs):
+        """Execute :func:`~QuerySet.modify`, invalidating caches before and after it."""
+        with _invalidating_caches(self._collection):
+            return super().modify(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        """Execute :func:`~QuerySet.delete`, invalidating caches before and after it."""
+        with _invalidating_caches(self._collection):
+            return super().delete(*args, **kwargs)
+
+    def insert(self, *args, **kwargs):
+        """Execute :func:`~QuerySet.insert`, invalidating caches before and after it."""
+        with _invalidating_caches(self._collection):
+            return super().insert(*args, **kwargs)
+
     def _abort_404(self, _message_404):
         """Returns 404 error with message, if message provided.
 
@@ -53,6 +334,332 @@ class BaseQuerySet(QuerySet):
         """
         return self.first() or self._abort_404(_message_404)
 
+    def get_many(
+        self,
+        ids: Iterable,
+        preserve_order: bool = True,
+        missing: str = "skip",
+        chunk_size: int = 1000,
+        max_workers: Optional[int] = None,
+        _message_404=None,
+    ) -> list:
+        """
+        Get many documents by primary keys, with minimal number of database queries.
+
+        Primary keys are requested with ``$in`` queries of ``chunk_size`` keys each,
+        very large lists are split to several chunks, executed in parallel. Current
+        queryset filters and projection (:func:`~QuerySet.only`,
+        :func:`~QuerySet.exclude`) are applied to each query.
+
+        :param ids: Primary keys of requested documents.
+        :param preserve_order: Return documents in ``ids`` order. Otherwise,
+            documents returned in database order and ``missing="none"`` is not
+            applicable.
+        :param missing: Not found documents handling:
+            ``"skip"`` - exclude from result,
+            ``"none"`` - return ``None`` on missing document position,
+            ``"404"`` - abort with 404 error, if any document not found.
+        :param chunk_size: Maximum number of primary keys in single query.
+        :param max_workers: Maximum number of parallel queries for large ``ids``
+            lists, :class:`~concurrent.futures.ThreadPoolExecutor` default if not set.
+        :param _message_404: Message for 404 comment, for ``missing="404"``.
+        :raises ValueError: Unknown ``missing`` value.
+        """
+        if missing not in {"skip", "none", "404"}:
+            raise ValueError(
+                f"Unknown missing documents handling '{missing}'. "
+                f"Expected one of: skip, none, 404"
+            )
+        id_field = self._document._fields[self._document._meta["id_field"]]
+        keys = [id_field.to_mongo(pk) for pk in ids]
+        unique_keys = list(dict.fromkeys(keys))
+        chunks = [
+            unique_keys[index : index + chunk_size]
+            for index in range(0, len(unique_keys), chunk_size)
+        ]
+
+        def load(chunk: list) -> list:
+            return list(self.clone().filter(pk__in=chunk))
+
+        if len(chunks) > 1:
+            # Context copied, so queries are tracked by current request monitoring.
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                futures = [
+                    executor.submit(contextvars.copy_context().run, load, chunk)
+                    for chunk in chunks
+                ]
+                results = [future.result() for future in futures]
+        else:
+            results = [load(chunk) for chunk in chunks]
+
+        documents = {
+            id_field.to_mongo(document.pk): document
+            for result in results
+            for document in result
+        }
+        if missing == "404" and len(documents) < len(unique_keys):
+            self._abort_404(_message_404)
+        if not preserve_order:
+            return list(documents.values())
+        if missing == "none":
+            return [documents.get(key) for key in keys]
+        return [documents[key] for key in keys if key in documents]
+
+    def _db_field_name(self, name: str) -> str:
+        """Return database name of document field, by field or database name."""
+        if name == "pk":
+            name = self._document._meta["id_field"]
+        field = self._document._fields.get(name) or self._document._fields.get(
+            self._document._reverse_db_field_map.get(name)
+        )
+        if field is None:
+            raise ValueError(
+                f"Unknown field '{name}' of document {self._document.__name__}"
+            )
+        return field.db_field
+
+    def _bulk_write(
+        self,
+        operations: list,
+        batch_size: int,
+        ordered: bool,
+        max_workers: Optional[int],
+    ) -> BulkWriteResult:
+        """
+        Execute operations with chunked ``bulk_write`` calls, in parallel if allowed,
+        and return aggregated result. Upserted documents indexes are reported
+        relative to full operations list.
+        """
+        chunks = [
+            operations[index : index + batch_size]
+            for index in range(0, len(operations), batch_size)
+        ]
+
+        def write(chunk: list) -> BulkWriteResult:
+            return self._collection.bulk_write(chunk, ordered=ordered)
+
+        with _invalidating_caches(self._collection):
+            # Ordered execution stops on first error, so never executed in parallel.
+            if max_workers and not ordered and len(chunks) > 1:
+                with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                    futures = [
+                        executor.submit(contextvars.copy_context().run, write, chunk)
+                        for chunk in chunks
+                    ]
+                    results = [future.result() for future in futures]
+            else:
+                results = [write(chunk) for chunk in chunks]
+
+        total = {
+            "nInserted": 0,
+            "nUpserted": 0,
+            "nMatched": 0,
+            "nModified": 0,
+            "nRemoved": 0,
+            "upserted": [],
+            "writeErrors": [],
+            "writeConcernErrors": [],
+        }
+        acknowledged = True
+        for offset, result in zip(range(0, len(operations), batch_size), results):
+            acknowledged = acknowledged and result.acknowledged
+            if not result.acknowledged:
+                continue
+            total["nInserted"] += result.inserted_count
+            total["nUpserted"] += result.upserted_count
+            total["nMatched"] += result.matched_count
+            total["nModified"] += result.modified_count
+            total["nRemoved"] += result.deleted_count
+            total["upserted"].extend(
+                {"index": int(index) + offset, "_id": _id}
+                for index, _id in (result.upserted_ids or {}).items()
+            )
+        return BulkWriteResult(total, acknowledged)
+
+    def bulk_upsert(
+        self,
+        docs: Iterable,
+        key_fields: Iterable[str],
+        batch_size: int = 1000,
+        ordered: bool = False,
+        max_workers: Optional[int] = None,
+        validate: bool = True,
+    ) -> BulkWriteResult:
+        """
+        Insert or update many documents, matched by ``key_fields`` values, with
+        minimal number of ``bulk_write`` calls.
+
+        Documents are converted with ``to_mongo()``. When documents are matched by
+        primary key only, whole database documents are replaced
+        (:class:`~pymongo.operations.ReplaceOne`), otherwise all document fields are
+        set with :class:`~pymongo.operations.UpdateOne`. Primary keys of inserted
+        documents are set to document instances. Document signals are not sent.
+
+        :param docs: Documents to write.
+        :param key_fields: Fields names, used to match existing database documents,
+            like ``["pk"]`` or ``["email"]``.
+        :param batch_size: Maximum number of operations in single ``bulk_write``.
+        :param ordered: Execute operations in order, stop on first error.
+        :param max_workers: Execute not ordered batches in parallel, with this number
+            of threads.
+        :param validate: Validate documents before writing.
+        :return: Aggregated result of all ``bulk_write`` calls.
+        :raises ValueError: Unknown key field, or document without key field value.
+        """
+        docs = list(docs)
+        key_fields = list(key_fields)
+        keys = [self._db_field_name(name) for name in key_fields]
+        operations = []
+        for document in docs:
+            if validate:
+                document.validate()
+            son = document.to_mongo()
+            missing = [name for name, key in zip(key_fields, keys) if key not in son]
+            if missing:
+                # Otherwise {key: None} filter would match any database document
+                # without this field, or document with null _id would be upserted.
+                raise ValueError(
+                    f"Key fields matching requires documents values: {missing}"
+                )
+            if keys == ["_id"]:
+                operations.append(ReplaceOne({"_id": son["_id"]}, son, upsert=True))
+                continue
+            update = {
+                "$set": {key: value for key, value in son.items() if key != "_id"}
+            }
+            if "_id" in son:
+                update["$setOnInsert"] = {"_id": son["_id"]}
+            operations.append(
+                UpdateOne({key: son[key] for key in keys}, update, upsert=True)
+            )
+
+        result = self._bulk_write(operations, batch_size, ordered, max_workers)
+        if result.acknowledged:
+            for index, _id in result.upserted_ids.items():
+                if docs[index].pk is None:
+                    docs[index].pk = _id
+        return result
+
+    def bulk_update(
+        self,
+        docs: Iterable,
+        fields: Iterable[str],
+        batch_size: int = 1000,
+        ordered: bool = False,
+        max_workers: Optional[int] = None,
+    ) -> BulkWriteResult:
+        """
+        Update selected fields of many existing documents, matched by primary key,
+        with minimal number of ``bulk_write`` calls. Fields with ``None`` values are
+        unset. Document signals are not sent.
+
+        :param docs: Saved documents to update.
+        :param fields: Fields names to update.
+        :param batch_size: Maximum number of operations in single ``bulk_write``.
+        :param ordered: Execute operations in order, stop on first error.
+        :param max_workers: Execute not ordered batches in parallel, with this number
+            of threads.
+        :return: Aggregated result of all ``bulk_write`` calls.
+        :raises ValueError: Unknown field or document without primary key.
+        """
+        db_fields = [self._db_field_name(name) for name in fields]
+        operations = []
+        for document in docs:
+            if document.pk is None:
+                raise ValueError("Only saved documents can be updated")
+            son = document.to_mongo()
+            update = {}
+            for key in db_fields:
+                if key in son:
+                    update.setdefault("$set", {})[key] = son[key]
+                else:
+                    update.setdefault("$unset", {})[key] = ""
+            if update:
+                operations.append(UpdateOne({"_id": son["_id"]}, update))
+
+        return self._bulk_write(operations, batch_size, ordered, max_workers)
+
+    def _raw_values(self, fields: tuple) -> Iterator[list]:
+        """
+        Yield requested fields values of each matched document, from raw pymongo
+        cursor with server side projection, without documents creation.
+
+        Only fields with different raw storage format (like decimals, enums or
+        dates) are converted to python values. References are returned as stored
+        (ids or DBRefs), embedded documents and lists are returned as raw dicts and
+        lists. Dotted paths through lists are mapped over list elements, like by
+        MongoDB projection.
+        """
+        if not fields:
+            raise ValueError("At least one field name required")
+        paths, converters = [], []
+        for name in fields:
+            lookup = self._document._lookup_field(name.split("."))
+            paths.append(
+                [
+                    part.db_field if hasattr(part, "db_field") else part
+                    for part in lookup
+                ]
+            )
+            field = lookup[-1]
+            converters.append(
+                field.to_python if isinstance(field, _CONVERTED_FIELDS) else None
+            )
+
+        for raw in self.clone().only(*fields).as_pymongo():
+            values = []
+            for path, converter in zip(paths, converters):
+                value = _raw_path_value(raw, path, converter)
+                values.append(None if value is _MISSING else value)
+            yield values
+
+    def values(self, *fields: str) -> List[dict]:
+        """
+        Return plain dictionaries with requested fields values, skipping documents
+        objects creation and validation. Much faster than documents iteration, for
+        read only endpoints, that need few fields of many documents::
+
+            Todo.objects(done=False).values("id", "title")
+            # [{"id": ObjectId(...), "title": "..."}, ...]
+
+        Fields are projected on server side. Check :func:`raw_values_list` for types
+        conversion details.
+
+        :param fields: Fields names, dotted names for embedded documents fields.
+        :raises ValueError: No fields names provided.
+        """
+        return [dict(zip(fields, values)) for values in self._raw_values(fields)]
+
+    def raw_values_list(self, *fields: str, flat: Optional[bool] = None) -> list:
+        """
+        Return tuples with requested fields values, or plain values list for single
+        field, skipping documents objects creation and validation::
+
+            Todo.objects.raw_values_list("title", flat=True)
+            # ["first", "second", ...]
+
+        Unlike :func:`~mongoengine.queryset.QuerySet.values_list` (alias of
+        :func:`~mongoengine.queryset.QuerySet.scalar`), documents are not created and
+        values are taken directly from pymongo cursor. Only fields with different
+        raw storage format (like decimals, enums or dates) are converted to python
+        values. References are returned as stored ids, embedded documents and lists
+        as raw dicts and lists. Dotted paths through lists, like ``"items.name"``,
+        return lists of values of all list elements.
+
+        :param fields: Fields names, dotted names for embedded documents fields.
+        :param flat: Return plain values instead of tuples. Only for single field.
+            By default, enabled for single field.
+        :raises ValueError: No fields names provided, or ``flat`` requested for
+            many fields.
+        """
+        if flat is None:
+            flat = len(fields) == 1
+        if flat and len(fields) != 1:
+            raise ValueError("'flat' is allowed only with single field")
+        if flat:
+            return [values[0] for values in self._raw_values(fields)]
+        return [tuple(values) for values in self._raw_values(fields)]
+
     def paginate(self, page, per_page):
         """
         Paginate the QuerySet with a certain number of docs per page
@@ -74,6 +681,30 @@ class BaseQuerySet(QuerySet):
         )
 
 
+# Maximum number of generated form classes, kept by :func:`WtfFormMixin.to_wtf_form`.
+FORM_CACHE_SIZE = 256
+_form_classes = LRUCache(max_size=FORM_CACHE_SIZE)
+
+
+def _freeze(value):
+    """Return hashable representation of nested dicts, lists and sets."""
+    if isinstance(value, dict):
+        return tuple(sorted((key, _freeze(item)) for key, item in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(item) for item in value)
+    if isinstance(value, (set, frozenset)):
+        return frozenset(_freeze(item) for item in value)
+    return value
+
+
+def clear_form_cache():
+    """
+    Drop all form classes, generated by :func:`WtfFormMixin.to_wtf_form`, so next
+    calls generate new classes. Required after runtime changes of models fields.
+    """
+    _form_classes.clear()
+
+
 class WtfFormMixin:
     """Special mixin, for form generation functions."""
 
@@ -152,7 +783,28 @@ class WtfFormMixin:
             :class:`wtforms.fields.StringField` will be called like::
 
                 field_name = wtforms.fields.StringField(label="new", default="new")
+
+        Generated classes are cached by all arguments values, so repeated calls (for
+        example in views) return same form class. Arguments with not hashable values
+        (like validators with custom ``__eq__``) are generated on each call. Use
+        :func:`clear_form_cache` to drop cached classes.
         """
+        try:
+            cache_key = (
+                cls,
+                base_class,
+                _freeze(only),
+                _freeze(exclude),
+                _freeze(fields_kwargs or {}),
+            )
+            hash(cache_key)
+        except TypeError:
+            cache_key = None
+        if cache_key is not None:
+            form_class = _form_classes.get(cache_key)
+            if form_class is not None:
+                return form_class
+
         form_fields_dict = {}
         fields_kwargs = fields_kwargs or {}
         fields_names = cls._get_fields_names(only, exclude)
@@ -173,10 +825,24 @@ class WtfFormMixin:
 
         form_fields_dict["model_class"] = cls
         # noinspection PyTypeChecker
-        return type(f"{cls.__name__}Form", (base_class,), form_fields_dict)
+        form_class = type(f"{cls.__name__}Form", (base_class,), form_fields_dict)
+        if cache_key is not None:
+            _form_classes.set(cache_key, form_class)
+        return form_class
+
+
+class CacheInvalidationMixin:
+    """Special mixin, that invalidates cached documents and results on save."""
+
+    def save(self, *args, **kwargs):
+        """Execute :func:`~mongoengine.Document.save`, invalidating caches around it."""
+        # noinspection PyUnresolvedReferences
+        with _invalidating_caches(self._get_collection()):
+            # noinspection PyUnresolvedReferences
+            return super().save(*args, **kwargs)
 
 
-class Document(WtfFormMixin, mongoengine.Document):
+class Document(CacheInvalidationMixin, WtfFormMixin, mongoengine.Document):
     """Abstract Document with QuerySet and WTForms extra helpers."""
 
     meta = {"abstract": True, "queryset_class": BaseQuerySet}
@@ -191,7 +857,9 @@ class Document(WtfFormMixin, mongoengine.Document):
         )
 
 
-class DynamicDocument(WtfFormMixin, mongoengine.DynamicDocument):
+class DynamicDocument(
+    CacheInvalidationMixin, WtfFormMixin, mongoengine.DynamicDocument
+):
     """Abstract DynamicDocument with QuerySet and WTForms extra helpers."""
 
     meta = {"abstract": True, "queryset_class": BaseQuerySet}
@@ -0,0 +1,223 @@
+"""
+Streaming responses for GridFS files, stored by
+:class:`~flask_mongoengine.db_fields.FileField` and
+:class:`~flask_mongoengine.db_fields.ImageField`.
+"""
+__all__ = [
+    "GridFSFiles",
+    "UploadTooLarge",
+    "file_url",
+    "send_gridfs_file",
+    "stream_to_gridfs",
+]
+import mimetypes
+from typing import BinaryIO, Callable, Iterable, Optional
+
+import gridfs
+from bson import ObjectId
+from bson.errors import InvalidId
+from flask import Blueprint, Flask, abort, current_app, request, url_for
+from mongoengine.connection import DEFAULT_CONNECTION_NAME, get_db
+from werkzeug.exceptions import RequestEntityTooLarge
+from werkzeug.wsgi import FileWrapper
+
+BLUEPRINT_NAME = "mongoengine_files"
+
+
+class UploadTooLarge(RequestEntityTooLarge):
+    """Uploaded file exceeds length limit. Not handled one results in 413 response."""
+
+
+def _file_info(grid_out, key: str):
+    """Return raw GridFS file document value, without deprecated properties use."""
+    # noinspection PyProtectedMember
+    return grid_out._file.get(key)
+
+
+def gridfs_etag(grid_out) -> str:
+    """Return ETag of GridFS file: stored md5 hash, or file id and upload date."""
+    md5 = _file_info(grid_out, "md5")
+    if md5:
+        return md5
+    return f"{grid_out._id}-{grid_out.upload_date.timestamp():.6f}"
+
+
+def send_gridfs_file(
+    file,
+    as_attachment: bool = False,
+    download_name: Optional[str] = None,
+    mimetype: Optional[str] = None,
+    max_age: Optional[int] = None,
+):
+    """
+    Return streaming response with GridFS file content::
+
+        @app.route("/videos/<pk>")
+        def video(pk):
+            return send_gridfs_file(Video.objects.get_or_404(pk=pk).file)
+
+    File is sent with :class:`gridfs.GridOut` chunks, so memory usage does not depend
+    on file size. ``Content-Length``, ``ETag`` (stored md5 hash or upload date
+    based), ``Last-Modified`` headers are set, conditional (``If-None-Match``,
+    ``If-Modified-Since``) and partial (``Range``) requests are supported, so media
+    files can be seeked and downloads resumed.
+
+    :param file: :class:`mongoengine.fields.GridFSProxy` (value of document
+        ``FileField``) or :class:`gridfs.GridOut`.
+    :param as_attachment: Send ``Content-Disposition: attachment`` header.
+    :param download_name: File name for browser, stored file name by default.
+    :param mimetype: Response mimetype, stored content type, or guessed by file name
+        by default.
+    :param max_age: Cache lifetime in seconds, ``SEND_FILE_MAX_AGE_DEFAULT`` by
+        default.
+    :raises werkzeug.exceptions.NotFound: Empty file field, or missing GridFS file.
+    """
+    grid_out = file.get() if hasattr(file, "grid_id") else file
+    if grid_out is None:
+        abort(404)
+
+    filename = download_name or grid_out.filename
+    if mimetype is None:
+        mimetype = _file_info(grid_out, "contentType")
+    if mimetype is None and filename:
+        mimetype = mimetypes.guess_type(filename)[0]
+    if max_age is None:
+        max_age = current_app.get_send_file_max_age(filename)
+
+    # Not server's wsgi.file_wrapper: it may be not seekable, and Range requests
+    # would read all chunks before range start.
+    data = FileWrapper(grid_out, buffer_size=grid_out.chunk_size)
+    response = current_app.response_class(
+        data, mimetype=mimetype or "application/octet-stream", direct_passthrough=True
+    )
+    response.content_length = grid_out.length
+    response.last_modified = grid_out.upload_date
+    response.set_etag(gridfs_etag(grid_out))
+    if as_attachment or download_name:
+        response.headers.set(
+            "Content-Disposition",
+            "attachment" if as_attachment else "inline",
+            filename=filename or str(grid_out._id),
+        )
+    if max_age is not None:
+        response.cache_control.public = True
+        response.cache_control.max_age = max_age
+    return response.make_conditional(
+        request, accept_ranges=True, complete_length=grid_out.length
+    )
+
+
+class GridFSFiles:
+    """
+    Optional Flask extension with blueprint, that serves GridFS files by id with
+    :func:`send_gridfs_file`::
+
+        files = GridFSFiles(app, collections=["images"])
+
+    ``GET /_mongoengine/files/images/<file id>`` returns file from ``images``
+    GridFS collection. Only listed collections are served, so files must not require
+    any access control. Use :func:`file_url` for files URLs in templates.
+
+    :param app: Flask application.
+    :param collections: Served GridFS collections names (``collection_name`` of
+        file fields).
+    :param db_alias: Database connection alias.
+    :param url_prefix: Blueprint URL prefix.
+    """
+
+    def __init__(
+        self,
+        app: Optional[Flask] = None,
+        collections: Iterable[str] = ("fs",),
+        db_alias: str = DEFAULT_CONNECTION_NAME,
+        url_prefix: str = "/_mongoengine/files",
+    ):
+        self.collections = set(collections)
+        self.db_alias = db_alias
+        self.url_prefix = url_prefix
+        self.blueprint = Blueprint(BLUEPRINT_NAME, __name__)
+        self.blueprint.add_url_rule("/<collection>/<file_id>", "file", self.file_view)
+
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app: Flask):
+        """Register files blueprint."""
+        app.register_blueprint(self.blueprint, url_prefix=self.url_prefix)
+        app.extensions = getattr(app, "extensions", {})
+        app.extensions["mongoengine_files"] = self
+
+    def file_view(self, collection: str, file_id: str):
+        """Send GridFS file of allowed collection."""
+        if collection not in self.collections:
+            abort(404)
+        try:
+            grid_out = gridfs.GridFS(get_db(self.db_alias), collection).get(
+                ObjectId(file_id)
+            )
+        except (InvalidId, gridfs.NoFile):
+            abort(404)
+        return send_gridfs_file(grid_out)
+
+
+def file_url(file, **kwargs) -> Optional[str]:
+    """
+    Return URL of file field value, served by :class:`GridFSFiles` blueprint, or
+    ``None`` for empty file field.
+
+    :param file: :class:`mongoengine.fields.GridFSProxy`, value of document
+        ``FileField``.
+    :param kwargs: Additional :func:`flask.url_for` arguments.
+    """
+    if not file.grid_id:
+        return None
+    return url_for(
+        f"{BLUEPRINT_NAME}.file",
+        collection=file.collection_name,
+        file_id=str(file.grid_id),
+        **kwargs,
+    )
+
+
+def stream_to_gridfs(
+    fs: gridfs.GridFS,
+    stream: BinaryIO,
+    max_length: Optional[int] = None,
+    progress: Optional[Callable[[int, Optional[int]], None]] = None,
+    total: Optional[int] = None,
+    **kwargs,
+) -> ObjectId:
+    """
+    Write stream to new GridFS file, reading and writing one GridFS chunk at a time,
+    so memory usage does not depend on file size. Partially written file is removed
+    on any error.
+
+    :param fs: Target GridFS collection, ``fs`` of file field value.
+    :param stream: Readable binary stream, like ``request.files["name"].stream``.
+    :param max_length: Maximum file length in bytes.
+    :param progress: Callback, called after each chunk with written bytes count and
+        ``total``.
+    :param total: Expected file length, if known, passed to ``progress``.
+    :param kwargs: :class:`gridfs.GridIn` file attributes, like ``filename`` or
+        ``content_type``.
+    :return: New file id.
+    :raises UploadTooLarge: Stream exceeds ``max_length``.
+    """
+    grid_in = fs.new_file(**kwargs)
+    written = 0
+    try:
+        while True:
+            chunk = stream.read(grid_in.chunk_size)
+            if not chunk:
+                break
+            written += len(chunk)
+            if max_length is not None and written > max_length:
+                raise UploadTooLarge(f"File exceeds {max_length} bytes limit.")
+            grid_in.write(chunk)
+            if progress is not None:
+                progress(written, total)
+        grid_in.close()
+    except BaseException:
+        grid_in.abort()
+        raise
+    return grid_in._id
@@ -0,0 +1,99 @@
+"""
+Request scoped identity map: documents cache, that serves repeated primary key
+lookups and reference dereferences of single request without database round trips.
+
+Identity map is disabled by default. Enable it with ``MONGODB_IDENTITY_MAP = True``
+application config variable.
+"""
+__all__ = ["IdentityMap", "get_identity_map"]
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from flask import current_app, g, has_app_context
+
+# (database name, collection name, primary key value)
+IdentityKey = Tuple[str, str, Any]
+
+
+def collection_key(collection) -> Tuple[str, str]:
+    """Return ``(database name, collection name)`` of pymongo collection."""
+    return collection.database.name, collection.name
+
+
+class IdentityMap:
+    """
+    Documents loaded in current application context, by database, collection and
+    primary key. Same document instance returned for all lookups, until any write to
+    document collection.
+    """
+
+    __slots__ = ("documents", "hits", "misses")
+
+    def __init__(self):
+        self.documents: Dict[IdentityKey, Any] = {}
+        self.hits: int = 0
+        self.misses: int = 0
+
+    def get(self, key: IdentityKey, document_class: type):
+        """
+        Return cached document or ``None``. Documents of other class (for example
+        parent class instances, loaded from shared collection) are not returned.
+        """
+        document = self.documents.get(key)
+        if document is not None and isinstance(document, document_class):
+            self.hits += 1
+            return document
+        self.misses += 1
+        return None
+
+    def add(self, key: IdentityKey, document):
+        """Cache loaded document."""
+        self.documents[key] = document
+
+    def invalidate(self, collection):
+        """Drop all cached documents of pymongo collection, after any write to it."""
+        database_name, collection_name = collection_key(collection)
+        self.documents = {
+            key: document
+            for key, document in self.documents.items()
+            if key[0] != database_name or key[1] != collection_name
+        }
+
+
+def get_identity_map() -> Optional[IdentityMap]:
+    """
+    Return identity map of current application context (each request has own), or
+    ``None`` if identity map disabled or called outside application context.
+    """
+    if not has_app_context() or not current_app.config.get("MONGODB_IDENTITY_MAP"):
+        return None
+    identity_map = g.get("_mongoengine_identity_map")
+    if identity_map is None:
+        identity_map = g._mongoengine_identity_map = IdentityMap()
+    return identity_map
+
+
+def load_reference(document_class: type, dbref, loader: Callable):
+    """
+    Dereference ``dbref`` with ``loader(document_class, dbref)`` function, using
+    identity map, if enabled.
+    """
+    identity_map = get_identity_map()
+    if identity_map is None:
+        return loader(document_class, dbref)
+
+    key = (document_class._get_db().name, dbref.collection, dbref.id)
+    try:
+        document = identity_map.get(key, document_class)
+    except TypeError:  # Not hashable primary key.
+        return loader(document_class, dbref)
+    if document is None:
+        document = loader(document_class, dbref)
+        identity_map.add(key, document)
+    return document
+
+
+def invalidate_collection(collection):
+    """Drop cached documents of collection, if identity map enabled."""
+    identity_map = get_identity_map()
+    if identity_map is not None:
+        identity_map.invalidate(collection)
@@ -0,0 +1,400 @@
+"""
+Resized derivatives (thumbnails, previews) of images, stored by
+:class:`~flask_mongoengine.db_fields.ImageField`.
+
+Derivatives are generated once, on first request of named size, and stored in
+separate GridFS collection, so later requests stream stored file.
+"""
+__all__ = ["ImageDerivatives"]
+import io
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, Optional, Tuple
+
+import click
+import gridfs
+from bson import ObjectId
+from bson.errors import InvalidId
+from flask import Blueprint, Flask, abort, current_app, url_for
+from flask.cli import with_appcontext
+from mongoengine.base import get_document
+from mongoengine.connection import DEFAULT_CONNECTION_NAME, get_db
+from pymongo.errors import PyMongoError
+
+from flask_mongoengine.files import send_gridfs_file
+
+try:
+    from PIL import Image
+except ImportError:  # pragma: no cover
+    Image = None
+
+logger = logging.getLogger("flask_mongoengine")
+
+BLUEPRINT_NAME = "mongoengine_images"
+#: Minimal interval between last access time updates of stored derivative.
+#: Derivatives, accessed within this interval, may be streamed now and are not evicted.
+TOUCH_INTERVAL = timedelta(minutes=1)
+#: Interval of stored derivatives total size recalculation, to account for
+#: derivatives, generated and evicted by other processes.
+TOTAL_REFRESH_INTERVAL = timedelta(minutes=5)
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _as_utc(value: datetime) -> datetime:
+    """Return timezone aware datetime, read by not timezone aware client."""
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+class ImageDerivatives:
+    """
+    Flask extension, that generates, stores and serves resized images::
+
+        images = ImageDerivatives(
+            app,
+            sizes={"thumb": (128, 128), "preview": (800, 600)},
+            collections=["images"],
+            max_bytes=2 * 1024**3,
+        )
+
+    Image is resized to fit named size box, keeping aspect ratio and source format.
+    Resizing is made on thread pool, concurrent requests of same missing derivative
+    wait for single generation. Derivatives are stored in ``collection`` GridFS
+    collection, keyed by source file id, size name and dimensions, so changed size
+    dimensions produce new derivatives. When ``max_bytes`` is set, least recently
+    used derivatives are deleted after each generation, until total size fits the
+    limit.
+
+    ``GET /_mongoengine/images/<collection>/<file id>/<size>`` serves derivative of
+    image from listed source GridFS collection. Use :meth:`url` for URLs in templates,
+    or :meth:`send` in own views with access control. ``flask mongoengine
+    warm-images`` command generates missing derivatives in bulk.
+
+    :param app: Flask application.
+    :param sizes: Named sizes, ``(width, height)`` boxes. Only named sizes are served.
+    :param collections: Source GridFS collections names, served by blueprint.
+    :param collection: GridFS collection name of stored derivatives.
+    :param db_alias: Database connection alias.
+    :param max_bytes: Maximum total size of stored derivatives, ``None`` for no limit.
+    :param max_workers: Maximum number of resizing threads.
+    :param quality: Quality of lossy formats (JPEG, WebP).
+    :param url_prefix: Blueprint URL prefix.
+    :raises ImportError: Pillow not installed.
+    """
+
+    def __init__(
+        self,
+        app: Optional[Flask] = None,
+        sizes: Optional[Dict[str, Tuple[int, int]]] = None,
+        collections: Iterable[str] = ("images",),
+        collection: str = "derivatives",
+        db_alias: str = DEFAULT_CONNECTION_NAME,
+        max_bytes: Optional[int] = None,
+        max_workers: int = 4,
+        quality: int = 85,
+        url_prefix: str = "/_mongoengine/images",
+    ):
+        if Image is None:
+            raise ImportError("Pillow required for images derivatives generation.")
+        self.sizes = dict(sizes or {})
+        self.collections = set(collections)
+        self.collection = collection
+        self.db_alias = db_alias
+        self.max_bytes = max_bytes
+        self.quality = quality
+        self.url_prefix = url_prefix
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="mongoengine-images"
+        )
+        self._pending: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        # Running total size of stored derivatives, with last recalculation time.
+        self._total_bytes: Optional[int] = None
+        self._total_refreshed: Optional[datetime] = None
+        self._indexed = False
+        self._evict_lock = threading.Lock()
+        self.blueprint = Blueprint(BLUEPRINT_NAME, __name__)
+        self.blueprint.add_url_rule(
+            "/<collection>/<file_id>/<size>", "derivative", self.derivative_view
+        )
+
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app: Flask):
+        """Register images blueprint and ``flask mongoengine warm-images`` command."""
+        app.register_blueprint(self.blueprint, url_prefix=self.url_prefix)
+        app.extensions = getattr(app, "extensions", {})
+        app.extensions["mongoengine_images"] = self
+
+        group = click.Group("mongoengine", help="Flask-Mongoengine commands.")
+        group.add_command(warm_images_command)
+        app.cli.add_command(group)
+
+    @property
+    def fs(self) -> gridfs.GridFS:
+        """GridFS collection of stored derivatives."""
+        return gridfs.GridFS(get_db(self.db_alias), self.collection)
+
+    def derivative_key(self, file_id: ObjectId, size: str) -> str:
+        """Return stored derivative file name: source id, size name and dimensions."""
+        width, height = self.sizes[size]
+        return f"{file_id}/{size}-{width}x{height}"
+
+    def get(self, collection: str, file_id: ObjectId, size: str):
+        """
+        Return stored derivative :class:`gridfs.GridOut`, generating missing one.
+
+        :param collection: Source GridFS collection name.
+        :param file_id: Source file id.
+        :param size: Size name.
+        :raises KeyError: Unknown size name.
+        :raises gridfs.NoFile: Source file does not exist.
+        """
+        key = self.derivative_key(file_id, size)
+        grid_out = self.fs.find_one({"filename": key})
+        if grid_out is None:
+            self._submit(collection, file_id, size).result()
+            grid_out = self.fs.get_last_version(key)
+        else:
+            self._touch(grid_out)
+        return grid_out
+
+    def send(self, image, size: str, **kwargs):
+        """
+        Return streaming response with derivative of image field value.
+
+        :param image: :class:`mongoengine.fields.ImageGridFsProxy`, value of document
+            ``ImageField``.
+        :param size: Size name.
+        :param kwargs: Additional :func:`~flask_mongoengine.files.send_gridfs_file`
+            arguments.
+        :raises werkzeug.exceptions.NotFound: Unknown size, empty field, missing or
+            not image source file.
+        """
+        if size not in self.sizes or not image.grid_id:
+            abort(404)
+        return self._send(image.collection_name, image.grid_id, size, **kwargs)
+
+    def url(self, image, size: str, **kwargs) -> Optional[str]:
+        """
+        Return URL of image field value derivative, served by blueprint, or ``None``
+        for empty field.
+
+        :param image: :class:`mongoengine.fields.ImageGridFsProxy`, value of document
+            ``ImageField``.
+        :param size: Size name.
+        :param kwargs: Additional :func:`flask.url_for` arguments.
+        """
+        if not image.grid_id:
+            return None
+        return url_for(
+            f"{BLUEPRINT_NAME}.derivative",
+            collection=image.collection_name,
+            file_id=str(image.grid_id),
+            size=size,
+            **kwargs,
+        )
+
+    def derivative_view(self, collection: str, file_id: str, size: str):
+        """Send derivative of image from allowed collection."""
+        if collection not in self.collections or size not in self.sizes:
+            abort(404)
+        try:
+            file_id = ObjectId(file_id)
+        except InvalidId:
+            abort(404)
+        return self._send(collection, file_id, size)
+
+    def warm(
+        self, collection: str, file_ids: Iterable[ObjectId], sizes: Iterable[str] = ()
+    ) -> int:
+        """
+        Generate missing derivatives of many images on thread pool.
+
+        :param collection: Source GridFS collection name.
+        :param file_ids: Source files ids.
+        :param sizes: Size names, all sizes by default.
+        :return: Number of generated derivatives.
+        """
+        sizes = list(sizes) or list(self.sizes)
+        keys = {
+            self.derivative_key(file_id, size): (file_id, size)
+            for file_id in file_ids
+            if file_id
+            for size in sizes
+        }
+        stored = set(
+            get_db(self.db_alias)[f"{self.collection}.files"].distinct(
+                "filename", {"filename": {"$in": list(keys)}}
+            )
+        )
+        futures = [
+            self._submit(collection, file_id, size)
+            for key, (file_id, size) in keys.items()
+            if key not in stored
+        ]
+        generated = 0
+        for future in futures:
+            try:
+                future.result()
+                generated += 1
+            except (gridfs.NoFile, OSError) as error:
+                logger.warning(f"Image derivative not generated: {error}")
+        return generated
+
+    def _send(self, collection: str, file_id: ObjectId, size: str, **kwargs):
+        try:
+            grid_out = self.get(collection, file_id, size)
+        except (gridfs.NoFile, OSError):
+            # OSError raised by Pillow for not image files.
+            abort(404)
+        return send_gridfs_file(grid_out, **kwargs)
+
+    def _submit(self, collection: str, file_id: ObjectId, size: str) -> Future:
+        """Start derivative generation, or return already running one."""
+        key = self.derivative_key(file_id, size)
+        with self._lock:
+            future = self._pending.get(key)
+            if future is not None:
+                return future
+            future = self.executor.submit(
+                self._generate, collection, file_id, size, key
+            )
+            self._pending[key] = future
+        # Callback is called immediately for already completed future, so it is
+        # added after lock release.
+        future.add_done_callback(lambda _: self._forget(key))
+        return future
+
+    def _forget(self, key: str):
+        with self._lock:
+            self._pending.pop(key, None)
+
+    def _generate(self, collection: str, file_id: ObjectId, size: str, key: str):
+        """Resize source image and store it. Executed in thread pool."""
+        source = gridfs.GridFS(get_db(self.db_alias), collection).get(file_id)
+        with Image.open(source) as image:
+            image_format = image.format
+            image.thumbnail(self.sizes[size])
+            buffer = io.BytesIO()
+            image.save(buffer, format=image_format, quality=self.quality)
+        length = len(buffer.getvalue())
+        self._ensure_index()
+        derivative_id = self.fs.put(
+            buffer.getvalue(),
+            filename=key,
+            content_type=Image.MIME.get(image_format),
+            metadata={"source": file_id, "size": size, "accessed": _utcnow()},
+        )
+        if self.max_bytes is not None:
+            try:
+                self._evict(keep=derivative_id, added=length)
+            except PyMongoError:
+                # Derivative is stored, response must not fail.
+                logger.exception("Image derivatives eviction failed.")
+
+    def _files(self):
+        """Files collection of stored derivatives."""
+        return get_db(self.db_alias)[f"{self.collection}.files"]
+
+    def _ensure_index(self):
+        """Create last access time index, used by eviction, once per process."""
+        if not self._indexed:
+            self._files().create_index("metadata.accessed")
+            self._indexed = True
+
+    def _touch(self, grid_out):
+        """Update derivative last access time, at most once per TOUCH_INTERVAL."""
+        metadata = grid_out.metadata or {}
+        accessed = metadata.get("accessed")
+        now = _utcnow()
+        if accessed is None or now - _as_utc(accessed) > TOUCH_INTERVAL:
+            self._files().update_one(
+                {"_id": grid_out._id}, {"$set": {"metadata.accessed": now}}
+            )
+
+    def _evict(self, keep: ObjectId, added: int):
+        """
+        Delete least recently used derivatives, while total size exceeds limit.
+
+        Total size is tracked as running sum, recalculated with aggregation once per
+        TOTAL_REFRESH_INTERVAL only. Evictions of process are serialized, derivatives
+        accessed within TOUCH_INTERVAL are kept.
+
+        :param keep: Just generated derivative id, never deleted.
+        :param added: Just generated derivative length.
+        """
+        if not self._evict_lock.acquire(blocking=False):
+            # Running eviction of other thread accounts this derivative on refresh.
+            with self._lock:
+                if self._total_bytes is not None:
+                    self._total_bytes += added
+            return
+        try:
+            files = self._files()
+            now = _utcnow()
+            with self._lock:
+                if self._total_bytes is None or (
+                    now - self._total_refreshed > TOTAL_REFRESH_INTERVAL
+                ):
+                    self._total_bytes = None
+                else:
+                    self._total_bytes += added
+            if self._total_bytes is None:
+                totals = list(
+                    files.aggregate(
+                        [{"$group": {"_id": None, "total": {"$sum": "$length"}}}]
+                    )
+                )
+                with self._lock:
+                    self._total_bytes = totals[0]["total"] if totals else 0
+                    self._total_refreshed = now
+            if self._total_bytes <= self.max_bytes:
+                return
+
+            # Index ordered, lazily fetched cursor: stops at first enough files.
+            oldest = files.find(
+                {
+                    "_id": {"$ne": keep},
+                    "metadata.accessed": {"$lt": now - TOUCH_INTERVAL},
+                },
+                {"length": 1},
+            ).sort("metadata.accessed", 1)
+            chunks = get_db(self.db_alias)[f"{self.collection}.chunks"]
+            for file in oldest:
+                if self._total_bytes <= self.max_bytes:
+                    break
+                # File document deleted first: only one of concurrent evictions
+                # accounts it.
+                if files.delete_one({"_id": file["_id"]}).deleted_count:
+                    chunks.delete_many({"files_id": file["_id"]})
+                    with self._lock:
+                        self._total_bytes -= file["length"]
+        finally:
+            self._evict_lock.release()
+
+
+@click.command("warm-images")
+@click.argument("document")
+@click.argument("field")
+@click.option("--size", "sizes", multiple=True, help="Size name, all by default.")
+@with_appcontext
+def warm_images_command(document: str, field: str, sizes: Tuple[str, ...]):
+    """Generate missing derivatives of DOCUMENT class FIELD images."""
+    images: ImageDerivatives = current_app.extensions["mongoengine_images"]
+    document_class = get_document(document)
+    collection = document_class._fields[field].collection_name
+    unknown = set(sizes) - set(images.sizes)
+    if unknown:
+        raise click.BadParameter(f"Unknown sizes: {', '.join(sorted(unknown))}")
+
+    file_ids = document_class.objects(**{f"{field}__exists": True}).raw_values_list(
+        field, flat=True
+    )
+    generated = images.warm(collection, file_ids, sizes)
+    click.echo(f"Generated {generated} image derivatives.")
@@ -0,0 +1,124 @@
+"""
+Paginated JSON lookup endpoints for remote (autocomplete) choices of
+:class:`~flask_mongoengine.wtf.fields.QuerySetSelectField` on large collections.
+"""
+__all__ = ["ChoicesLookup", "lookup_url"]
+from typing import Callable, Dict, Optional, Union
+
+from flask import Blueprint, Flask, abort, jsonify, request, url_for
+
+BLUEPRINT_NAME = "mongoengine_lookup"
+
+
+class _LookupSource:
+    """Registered lookup: queryset (or queryset factory) and label field."""
+
+    __slots__ = ("queryset", "label_attr", "per_page")
+
+    def __init__(self, queryset, label_attr: str, per_page: int):
+        self.queryset = queryset
+        self.label_attr = label_attr
+        self.per_page = per_page
+
+    def get_queryset(self):
+        """Return new queryset, calling factory if registered."""
+        queryset = self.queryset() if callable(self.queryset) else self.queryset
+        return queryset.clone()
+
+
+class ChoicesLookup:
+    """
+    Flask extension with blueprint of JSON lookup endpoints, used by remote mode of
+    :class:`~flask_mongoengine.wtf.fields.QuerySetSelectField`. Only explicitly
+    registered querysets are exposed::
+
+        lookup = ChoicesLookup(app)
+        lookup.register("users", User.objects(active=True), label_attr="username")
+
+    ``GET /_mongoengine/lookup/users?q=jo&page=2`` returns documents, which
+    ``label_attr`` starts with ``q``, sorted by ``label_attr``, in format, compatible
+    with Select2 and most of autocomplete widgets::
+
+        {"results": [{"id": "...", "text": "john"}], "pagination": {"more": false}}
+
+    Prefix search is made with ``startswith`` operator (anchored case-sensitive
+    regular expression), so it uses ``label_attr`` index. Create one for each
+    registered lookup.
+
+    :param app: Flask application.
+    :param url_prefix: Blueprint URL prefix.
+    """
+
+    def __init__(
+        self, app: Optional[Flask] = None, url_prefix: str = "/_mongoengine/lookup"
+    ):
+        self.url_prefix = url_prefix
+        self.sources: Dict[str, _LookupSource] = {}
+        self.blueprint = Blueprint(BLUEPRINT_NAME, __name__)
+        self.blueprint.add_url_rule("/<name>", "lookup", self.lookup_view)
+
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app: Flask):
+        """Register lookup blueprint."""
+        app.register_blueprint(self.blueprint, url_prefix=self.url_prefix)
+        app.extensions = getattr(app, "extensions", {})
+        app.extensions["mongoengine_lookup"] = self
+
+    def register(
+        self,
+        name: str,
+        queryset: Union[Callable, object],
+        label_attr: str,
+        per_page: int = 20,
+    ):
+        """
+        Expose queryset for remote choices lookup.
+
+        :param name: Lookup name, used in URL and by form field ``remote`` option.
+        :param queryset: Queryset, or callable returning queryset, called on each
+            request (for example, to filter documents available for current user).
+        :param label_attr: Document field name, used for prefix search and labels.
+        :param per_page: Maximum number of documents in response page.
+        :raises ValueError: Lookup with same name already registered.
+        """
+        if name in self.sources:
+            raise ValueError(f"Lookup '{name}' already registered")
+        self.sources[name] = _LookupSource(queryset, label_attr, per_page)
+
+    def lookup_view(self, name: str):
+        """Return page of documents, which label starts with ``q`` argument."""
+        source = self.sources.get(name)
+        if source is None:
+            abort(404)
+        prefix = request.args.get("q", "")
+        page = request.args.get("page", 1, type=int)
+        per_page = min(
+            request.args.get("per_page", source.per_page, type=int), source.per_page
+        )
+        if page < 1 or per_page < 1:
+            abort(400)
+
+        queryset = source.get_queryset()
+        if prefix:
+            queryset = queryset.filter(**{f"{source.label_attr}__startswith": prefix})
+        # One extra document requested to check next page existence without count.
+        rows = (
+            queryset.order_by(source.label_attr)
+            .skip((page - 1) * per_page)
+            .limit(per_page + 1)
+            .raw_values_list("id", source.label_attr)
+        )
+        return jsonify(
+            results=[
+                {"id": str(pk), "text": str(label or pk)}
+                for pk, label in rows[:per_page]
+            ],
+            pagination={"more": len(rows) > per_page},
+        )
+
+
+def lookup_url(name: str) -> str:
+    """Return URL of registered lookup endpoint."""
+    return url_for(f"{BLUEPRINT_NAME}.lookup", name=name)
@@ -0,0 +1,302 @@
+"""Pymongo commands monitoring listener, used by debug panel and other tools."""
+__all__ = ["mongo_command_logger", "MongoCommandLogger", "RawQueryEvent"]
+import logging
+import threading
+from collections import deque
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Deque, Dict, List, Optional, Tuple, Union
+
+import bson
+from bson.errors import InvalidDocument
+from pymongo import monitoring
+
+from flask_mongoengine.analysis import command_fingerprint, find_query_origin
+
+logger = logging.getLogger("flask_mongoengine")
+
+
+def _bson_size(document) -> int:
+    """Return document size as encoded to BSON, 0 for not encodable objects."""
+    try:
+        return len(bson.encode(document))
+    except (InvalidDocument, TypeError):
+        return 0
+
+
+@dataclass
+class RawQueryEvent:
+    # noinspection PyUnresolvedReferences
+    """Responsible for parsing monitoring events to web panel interface.
+
+    :param _event: Succeeded or Failed event object from pymongo monitoring.
+    :param _start_event: Started event object from pymongo monitoring.
+    :param _is_query_pass: Boolean status of db query reported by pymongo monitoring.
+    """
+
+    __slots__ = (
+        "_event",
+        "_start_event",
+        "_is_query_pass",
+        # Lazy cache of payload sizes, not a dataclass fields.
+        "_command_bytes",
+        "_response_bytes",
+        # Set by tracker, not a dataclass field.
+        "_origin",
+    )
+
+    _event: Union[monitoring.CommandSucceededEvent, monitoring.CommandFailedEvent]
+    _start_event: monitoring.CommandStartedEvent
+    _is_query_pass: bool
+
+    @property
+    def time(self):
+        """Query execution time."""
+        return self._event.duration_micros * 0.001
+
+    @property
+    def command_bytes(self) -> int:
+        """BSON size of command send to server, in bytes. Calculated once."""
+        try:
+            return self._command_bytes
+        except AttributeError:
+            self._command_bytes = _bson_size(self.server_command)
+            return self._command_bytes
+
+    @property
+    def response_bytes(self) -> int:
+        """BSON size of server response, in bytes. Calculated once."""
+        try:
+            return self._response_bytes
+        except AttributeError:
+            self._response_bytes = _bson_size(self.server_response)
+            return self._response_bytes
+
+    @property
+    def command_size(self) -> float:
+        """Command payload size, in Kb."""
+        return self.command_bytes / 1024
+
+    @property
+    def size(self) -> float:
+        """Server response payload size, in Kb."""
+        return self.response_bytes / 1024
+
+    @property
+    def database(self):
+        """Query database target."""
+        return self._start_event.database_name
+
+    @property
+    def collection(self):
+        """Query collection target."""
+        if self.command_name == "getMore":
+            return self.server_command.get("collection")
+        return self.server_command.get(self.command_name)
+
+    @property
+    def command_name(self):
+        """Query db level operation/command name."""
+        return self._event.command_name
+
+    @property
+    def operation_id(self):
+        """MongoDb operation_id used to match 'start' and 'final' monitoring events."""
+        return self._start_event.operation_id
+
+    @property
+    def connection_id(self):
+        """Address of server, that executed command, as ``(host, port)`` tuple."""
+        return self._start_event.connection_id
+
+    @property
+    def server_command(self):
+        """Raw MongoDb command send to server."""
+        return self._start_event.command
+
+    @property
+    def server_response(self):
+        """Raw MongoDb response received from server."""
+        return self._event.reply if self._is_query_pass else self._event.failure
+
+    @property
+    def request_status(self):
+        """Query execution status."""
+        return "Succeed" if self._is_query_pass else "Failed"
+
+    @property
+    def origin(self) -> Optional[str]:
+        """Application code line, that initiated query, if captured."""
+        return getattr(self, "_origin", None)
+
+    @property
+    def fingerprint(self) -> str:
+        """Query shape, with all literal values replaced by placeholders."""
+        return command_fingerprint(
+            self.database, self.command_name, self.server_command
+        )
+
+
+class CommandTracker:
+    """Counters and bounded storage of events, related to single request.
+
+    Updates are locked, as commands of single request may run in several threads,
+    like chunks of ``get_many()`` and bulk writes, or any untracked threads, sharing
+    fallback tracker.
+
+    :param max_queries: Maximum number of finished queries and of not finished
+        'started' events to keep. Oldest records are dropped first.
+    """
+
+    __slots__ = (
+        "max_queries",
+        "total_time",
+        "started_operations_count",
+        "succeeded_operations_count",
+        "failed_operations_count",
+        "dropped_events_count",
+        "queries",
+        "started_events",
+        "origins",
+        "_lock",
+    )
+
+    def __init__(self, max_queries: int):
+        self.max_queries: int = max_queries
+        self.total_time: float = 0
+        self.started_operations_count: int = 0
+        self.succeeded_operations_count: int = 0
+        self.failed_operations_count: int = 0
+        self.dropped_events_count: int = 0
+        self.queries: Deque[RawQueryEvent] = deque(maxlen=max_queries)
+        self.started_events: Dict[Tuple[int, int], monitoring.CommandStartedEvent] = {}
+        self.origins: Dict[Tuple[int, int], str] = {}
+        self._lock = threading.Lock()
+
+    def add_started(
+        self, event: monitoring.CommandStartedEvent, origin: Optional[str] = None
+    ):
+        """Keep 'started' event until matching final event received."""
+        key = (event.request_id, event.operation_id)
+        with self._lock:
+            self.started_operations_count += 1
+            if len(self.started_events) >= self.max_queries:
+                # Final event was lost, drop the oldest one, to keep memory bounded.
+                oldest_key = next(iter(self.started_events))
+                self.started_events.pop(oldest_key)
+                self.origins.pop(oldest_key, None)
+                self.dropped_events_count += 1
+            self.started_events[key] = event
+            if origin is not None:
+                self.origins[key] = origin
+
+    def add_finished(self, event, is_query_pass: bool) -> RawQueryEvent:
+        """Match final event with 'started' event, count it and add to queries."""
+        key = (event.request_id, event.operation_id)
+        with self._lock:
+            if is_query_pass:
+                self.succeeded_operations_count += 1
+            else:
+                self.failed_operations_count += 1
+            self.total_time += event.duration_micros
+            start_event = self.started_events.pop(key, {})
+            if len(self.queries) == self.max_queries:
+                self.dropped_events_count += 1
+            query = RawQueryEvent(event, start_event, is_query_pass)
+            query._origin = self.origins.pop(key, None)
+            self.queries.append(query)
+        return query
+
+    def get_queries(self) -> List[RawQueryEvent]:
+        """Copy of finished queries, in executed order."""
+        with self._lock:
+            return list(self.queries)
+
+
+class MongoCommandLogger(monitoring.CommandListener):
+    """Receive point for :class:`~.pymongo.monitoring.CommandListener` events.
+
+    Count and parse incoming events for display in debug panel.
+
+    Events are tracked separately for each request, with help of
+    :mod:`contextvars`, so queries from concurrent requests in threaded servers
+    never mix. Events received outside any tracked request are stored in shared
+    fallback tracker.
+
+    :param max_queries: Maximum number of queries kept for single request.
+    :param capture_origin: Save application code line, that initiated each query.
+        Required for repeated queries (N+1) origin reports.
+    """
+
+    def __init__(self, max_queries: int = 1000, capture_origin: bool = True):
+        self.max_queries = max_queries
+        self.capture_origin = capture_origin
+        self._tracker: ContextVar[CommandTracker] = ContextVar(
+            f"mongo_command_tracker_{id(self)}"
+        )
+        self._fallback_tracker = CommandTracker(max_queries)
+
+    @property
+    def tracker(self) -> CommandTracker:
+        """Tracker of current request context."""
+        return self._tracker.get(self._fallback_tracker)
+
+    @property
+    def total_time(self) -> float:
+        """Total database time of current request, in microseconds."""
+        return self.tracker.total_time
+
+    @property
+    def started_operations_count(self) -> int:
+        """Number of 'started' events in current request."""
+        return self.tracker.started_operations_count
+
+    @property
+    def succeeded_operations_count(self) -> int:
+        """Number of 'succeeded' events in current request."""
+        return self.tracker.succeeded_operations_count
+
+    @property
+    def failed_operations_count(self) -> int:
+        """Number of 'failed' events in current request."""
+        return self.tracker.failed_operations_count
+
+    @property
+    def queries(self) -> List[RawQueryEvent]:
+        """Finished queries of current request, in executed order."""
+        return self.tracker.get_queries()
+
+    @property
+    def started_events(self) -> dict:
+        """'Started' events of current request, waiting for final event."""
+        return self.tracker.started_events
+
+    def append_raw_query(self, event, request_status):
+        """Pass 'unknown' events to parser and include final result to final list."""
+        query = self.tracker.add_finished(event, request_status)
+        logger.debug(f"Added record to 'Unknown' section: {query}")
+
+    def failed(self, event):
+        """Receives 'failed' events. Required to track database answer to request."""
+        logger.debug(f"Received 'Failed' event from driver: {event}")
+        self.append_raw_query(event, False)
+
+    def reset_tracker(self):
+        """Start new tracker for current context, keeping instance itself the same."""
+        tracker = CommandTracker(self.max_queries)
+        self._tracker.set(tracker)
+        return tracker
+
+    def started(self, event):
+        """Receives 'started' events. Required to track original request context."""
+        logger.debug(f"Received 'Started' event from driver: {event}")
+        origin = find_query_origin() if self.capture_origin else None
+        self.tracker.add_started(event, origin)
+
+    def succeeded(self, event):
+        """Receives 'succeeded' events. Required to track database answer to request."""
+        logger.debug(f"Received 'Succeeded' event from driver: {event}")
+        self.append_raw_query(event, True)
+
+
+mongo_command_logger = MongoCommandLogger()
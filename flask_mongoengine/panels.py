@@ -1,123 +1,156 @@
 """Debug panel views and logic and related mongoDb event listeners."""
 __all__ = ["mongo_command_logger", "MongoDebugPanel"]
 import logging
-import sys
-from dataclasses import dataclass
-from typing import List, Union
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import wait as wait_futures
+from threading import Lock
+from typing import List, Optional
 
+import mongoengine
 from flask import current_app
 from flask_debugtoolbar.panels import DebugPanel
 from jinja2 import ChoiceLoader, PackageLoader
 from pymongo import monitoring
 
-logger = logging.getLogger("flask_mongoengine")
+from flask_mongoengine.analysis import (
+    EXPLAINABLE_COMMANDS,
+    ExplainSummary,
+    explain_command,
+    find_repeated_queries,
+)
+from flask_mongoengine.identity_map import get_identity_map
+from flask_mongoengine.monitoring import (  # noqa: F401
+    CommandTracker,
+    MongoCommandLogger,
+    RawQueryEvent,
+    mongo_command_logger,
+)
 
+logger = logging.getLogger("flask_mongoengine")
 
-@dataclass
-class RawQueryEvent:
-    # noinspection PyUnresolvedReferences
-    """Responsible for parsing monitoring events to web panel interface.
 
-    :param _event: Succeeded or Failed event object from pymongo monitoring.
-    :param _start_event: Started event object from pymongo monitoring.
-    :param _is_query_pass: Boolean status of db query reported by pymongo monitoring.
+def _collections_totals(queries: List[RawQueryEvent]) -> List[dict]:
     """
+    Sum queries count, time and transferred payload per database collection.
 
-    _event: Union[monitoring.CommandSucceededEvent, monitoring.CommandFailedEvent]
-    _start_event: monitoring.CommandStartedEvent
-    _is_query_pass: bool
-
-    @property
-    def time(self):
-        """Query execution time."""
-        return self._event.duration_micros * 0.001
-
-    @property
-    def size(self):
-        """Query object size."""
-        return sys.getsizeof(self.server_response, 0) / 1024
-
-    @property
-    def database(self):
-        """Query database target."""
-        return self._start_event.database_name
-
-    @property
-    def collection(self):
-        """Query collection target."""
-        return self.server_command.get(self.command_name)
-
-    @property
-    def command_name(self):
-        """Query db level operation/command name."""
-        return self._event.command_name
-
-    @property
-    def operation_id(self):
-        """MongoDb operation_id used to match 'start' and 'final' monitoring events."""
-        return self._start_event.operation_id
-
-    @property
-    def server_command(self):
-        """Raw MongoDb command send to server."""
-        return self._start_event.command
-
-    @property
-    def server_response(self):
-        """Raw MongoDb response received from server."""
-        return self._event.reply if self._is_query_pass else self._event.failure
-
-    @property
-    def request_status(self):
-        """Query execution status."""
-        return "Succeed" if self._is_query_pass else "Failed"
-
-
-class MongoCommandLogger(monitoring.CommandListener):
-    """Receive point for :class:`~.pymongo.monitoring.CommandListener` events.
-
-    Count and parse incoming events for display in debug panel.
+    Sorted by received bytes, so over-fetching collections are on top.
     """
+    totals = {}
+    for query in queries:
+        key = (query.database, query.collection)
+        if key not in totals:
+            totals[key] = {
+                "database": query.database,
+                "collection": query.collection,
+                "count": 0,
+                "time": 0,
+                "command_size": 0,
+                "size": 0,
+            }
+        total = totals[key]
+        total["count"] += 1
+        total["time"] += query.time
+        total["command_size"] += query.command_size
+        total["size"] += query.size
+    return sorted(totals.values(), key=lambda item: item["size"], reverse=True)
+
+
+class ExplainCache:
+    """
+    Runs ``explain`` of slow queries on background thread, once per query shape.
 
-    def __init__(self):
-        self.total_time: float = 0
-        self.started_operations_count: int = 0
-        self.succeeded_operations_count: int = 0
-        self.failed_operations_count: int = 0
-        self.queries: List[RawQueryEvent] = []
-        self.started_events: dict = {}
-
-    def append_raw_query(self, event, request_status):
-        """Pass 'unknown' events to parser and include final result to final list."""
-        self.total_time += event.duration_micros
-        start_event = self.started_events.pop(event.operation_id, {})
-        self.queries.append(RawQueryEvent(event, start_event, request_status))
-        logger.debug(f"Added record to 'Unknown' section: {self.queries[-1]}")
-
-    def failed(self, event):
-        """Receives 'failed' events. Required to track database answer to request."""
-        logger.debug(f"Received 'Failed' event from driver: {event}")
-        self.failed_operations_count += 1
-        self.append_raw_query(event, False)
-
-    def reset_tracker(self):
-        """Resets all counters to default, keeping instance itself the same."""
-        self.__class__.__init__(self)
+    Results stored as :class:`~concurrent.futures.Future` objects, keyed by query
+    fingerprint, so same shape query is explained only once.
 
-    def started(self, event):
-        """Receives 'started' events. Required to track original request context."""
-        logger.debug(f"Received 'Started' event from driver: {event}")
-        self.started_operations_count += 1
-        self.started_events[event.operation_id] = event
+    :param max_size: Maximum number of cached explain results.
+    """
 
-    def succeeded(self, event):
-        """Receives 'succeeded' events. Required to track database answer to request."""
-        logger.debug(f"Received 'Succeeded' event from driver: {event}")
-        self.succeeded_operations_count += 1
-        self.append_raw_query(event, True)
+    def __init__(self, max_size: int = 256):
+        self.max_size = max_size
+        self._futures: "OrderedDict[str, Future]" = OrderedDict()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = Lock()
 
+    @staticmethod
+    def _find_client(query: RawQueryEvent):
+        """Find registered mongoengine client, connected to query server."""
+        # noinspection PyProtectedMember
+        for client in mongoengine.connection._connections.values():
+            if query.connection_id in client.nodes:
+                return client
+        return None
+
+    @staticmethod
+    def _explain(client, query: RawQueryEvent) -> Optional[ExplainSummary]:
+        """Background thread task, errors are logged and stored in future."""
+        try:
+            return explain_command(
+                client, query.database, query.command_name, query.server_command
+            )
+        except Exception as error:
+            logger.warning(f"Explain of {query.fingerprint} failed: {error}")
+            raise
+
+    def submit(self, query: RawQueryEvent) -> Optional[Future]:
+        """Schedule explain of query, if query shape was not explained before."""
+        if query.command_name not in EXPLAINABLE_COMMANDS:
+            return None
+        fingerprint = query.fingerprint
+        with self._lock:
+            if fingerprint in self._futures:
+                return self._futures[fingerprint]
+            client = self._find_client(query)
+            if client is None:
+                return None
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=1, thread_name_prefix="mongo-explain"
+                )
+            future = self._executor.submit(self._explain, client, query)
+            self._futures[fingerprint] = future
+            if len(self._futures) > self.max_size:
+                self._futures.popitem(last=False)
+            return future
+
+    def clear(self):
+        """Drop all cached explain results."""
+        with self._lock:
+            self._futures.clear()
+
+
+explain_cache = ExplainCache()
+
+
+def _explain_slow_queries(
+    queries: List[RawQueryEvent], slow_query_limit: float, timeout: float
+) -> List[dict]:
+    """
+    Explain slow queries in background, waiting results up to ``timeout`` seconds.
 
-mongo_command_logger = MongoCommandLogger()
+    Not finished explains are reported as pending, and will be displayed on next
+    request with same query shape.
+    """
+    explains = OrderedDict()
+    for query in queries:
+        if query.time <= slow_query_limit or query.fingerprint in explains:
+            continue
+        future = explain_cache.submit(query)
+        if future is not None:
+            explains[query.fingerprint] = future
+
+    wait_futures(list(explains.values()), timeout=timeout)
+    results = []
+    for fingerprint, future in explains.items():
+        result = {"fingerprint": fingerprint, "summary": None, "error": None}
+        if not future.done():
+            result["error"] = "Pending, reload page to check result."
+        elif future.exception() is not None:
+            result["error"] = str(future.exception())
+        else:
+            result["summary"] = future.result()
+        results.append(result)
+    return results
 
 
 def _maybe_patch_jinja_loader(jinja_env):
@@ -146,11 +179,24 @@ class MongoDebugPanel(DebugPanel):
     @property
     def _context(self) -> dict:
         """Context for rendering, as property for easy testing."""
+        config = current_app.config
+        queries = mongo_command_logger.queries
+        slow_query_limit = config.get("MONGO_DEBUG_PANEL_SLOW_QUERY_LIMIT", 100)
+        threshold = config.get("MONGO_DEBUG_PANEL_REPEATED_QUERY_THRESHOLD", 5)
+        explains = []
+        if config.get("MONGO_DEBUG_PANEL_EXPLAIN_SLOW_QUERIES", True):
+            explains = _explain_slow_queries(
+                queries,
+                slow_query_limit,
+                config.get("MONGO_DEBUG_PANEL_EXPLAIN_TIMEOUT", 1),
+            )
         return {
-            "queries": mongo_command_logger.queries,
-            "slow_query_limit": current_app.config.get(
-                "MONGO_DEBUG_PANEL_SLOW_QUERY_LIMIT", 100
-            ),
+            "queries": queries,
+            "collections": _collections_totals(queries),
+            "repeated_queries": find_repeated_queries(queries, threshold),
+            "explains": explains,
+            "identity_map": get_identity_map(),
+            "slow_query_limit": slow_query_limit,
         }
 
     @property
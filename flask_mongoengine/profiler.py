@@ -0,0 +1,290 @@
+"""Lightweight sampled database queries profiler, safe for production usage."""
+__all__ = ["LatencyHistogram", "MongoProfiler", "mongo_profiler_listener"]
+import bisect
+import json
+import logging
+import os
+import random
+import threading
+import time
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Tuple
+
+from flask import Flask, request
+from pymongo import monitoring
+
+from flask_mongoengine.analysis import command_fingerprint
+
+logger = logging.getLogger("flask_mongoengine")
+
+
+def _make_buckets(start: float = 0.01, factor: float = 1.2, end: float = 60000):
+    """Geometric histogram buckets upper bounds, in ms."""
+    bounds = [start]
+    while bounds[-1] < end:
+        bounds.append(bounds[-1] * factor)
+    return bounds
+
+
+class LatencyHistogram:
+    """
+    Fixed memory latency histogram with geometric buckets.
+
+    Each bucket upper bound is 20% higher than previous one, so reported
+    percentiles have at most 20% relative error, with constant memory usage, no
+    matter how many values were added.
+    """
+
+    __slots__ = ("counts", "count", "total")
+
+    BUCKETS: List[float] = _make_buckets()
+
+    def __init__(self):
+        self.counts: List[int] = [0] * (len(self.BUCKETS) + 1)
+        self.count: int = 0
+        self.total: float = 0
+
+    def add(self, value: float):
+        """Add single value, in ms."""
+        self.counts[bisect.bisect_left(self.BUCKETS, value)] += 1
+        self.count += 1
+        self.total += value
+
+    def percentile(self, percent: float) -> Optional[float]:
+        """Return upper bound of bucket, that contains requested percentile."""
+        if not self.count:
+            return None
+        rank = self.count * percent / 100
+        accumulated = 0
+        for index, bucket_count in enumerate(self.counts):
+            accumulated += bucket_count
+            if accumulated >= rank:
+                return self.BUCKETS[min(index, len(self.BUCKETS) - 1)]
+        return self.BUCKETS[-1]  # pragma: no cover
+
+    def to_dict(self) -> dict:
+        """Summary for reports."""
+        return {
+            "count": self.count,
+            "total_ms": round(self.total, 3),
+            "p50_ms": self.percentile(50),
+            "p95_ms": self.percentile(95),
+            "p99_ms": self.percentile(99),
+        }
+
+
+class EndpointStats:
+    """Aggregated database usage of single endpoint.
+
+    :param max_fingerprints: Maximum number of tracked query shapes, all other
+        queries are counted in ``"other"`` group.
+    """
+
+    __slots__ = ("max_fingerprints", "requests", "queries", "db_time", "commands")
+
+    def __init__(self, max_fingerprints: int):
+        self.max_fingerprints = max_fingerprints
+        self.requests: int = 0
+        self.queries: int = 0
+        self.db_time: float = 0
+        self.commands: Dict[str, LatencyHistogram] = {}
+
+    def add_request(self, timings: List[Tuple[str, float]]):
+        """Add queries timings of single request, as ``(fingerprint, ms)`` pairs."""
+        self.requests += 1
+        self.queries += len(timings)
+        for fingerprint, duration in timings:
+            self.db_time += duration
+            if (
+                fingerprint not in self.commands
+                and len(self.commands) >= self.max_fingerprints
+            ):
+                fingerprint = "other"
+            histogram = self.commands.get(fingerprint)
+            if histogram is None:
+                histogram = self.commands[fingerprint] = LatencyHistogram()
+            histogram.add(duration)
+
+    def to_dict(self) -> dict:
+        """Summary for reports."""
+        return {
+            "requests": self.requests,
+            "queries": self.queries,
+            "db_time_ms": round(self.db_time, 3),
+            "commands": {
+                fingerprint: histogram.to_dict()
+                for fingerprint, histogram in self.commands.items()
+            },
+        }
+
+
+class _RequestProfile:
+    """Queries of single sampled request."""
+
+    __slots__ = ("started", "timings")
+
+    def __init__(self):
+        self.started: Dict[Tuple[int, int], str] = {}
+        self.timings: List[Tuple[str, float]] = []
+
+
+class ProfilerCommandListener(monitoring.CommandListener):
+    """
+    Command listener, that records queries of sampled requests only.
+
+    Not sampled requests cost one context variable lookup per event.
+    """
+
+    def __init__(self):
+        self.profile: ContextVar[Optional[_RequestProfile]] = ContextVar(
+            f"mongo_profiler_{id(self)}", default=None
+        )
+
+    def started(self, event):
+        """Save query fingerprint until final event."""
+        profile = self.profile.get()
+        if profile is None:
+            return
+        profile.started[(event.request_id, event.operation_id)] = command_fingerprint(
+            event.database_name, event.command_name, event.command
+        )
+
+    def _finished(self, event):
+        profile = self.profile.get()
+        if profile is None:
+            return
+        fingerprint = profile.started.pop((event.request_id, event.operation_id), None)
+        if fingerprint is not None:
+            profile.timings.append((fingerprint, event.duration_micros * 0.001))
+
+    def succeeded(self, event):
+        """Record query time."""
+        self._finished(event)
+
+    def failed(self, event):
+        """Record query time."""
+        self._finished(event)
+
+
+mongo_profiler_listener = ProfilerCommandListener()
+
+
+class MongoProfiler:
+    """
+    Flask extension, that samples 1-in-N requests and aggregates database queries
+    statistics per endpoint: requests and queries count, total database time and
+    latency percentiles per query shape (fingerprint).
+
+    Statistics are dumped every ``MONGO_PROFILER_DUMP_INTERVAL`` seconds to log
+    (``INFO`` level of ``flask_mongoengine`` logger) or, if
+    ``MONGO_PROFILER_DUMP_PATH`` set, to local JSON file, and reset after each dump.
+    Dump checked at the end of sampled requests, so no background threads created.
+
+    Profiler must be initialized before database connection creation, as pymongo
+    listeners cannot be attached to existing connections.
+
+    Configuration variables:
+
+    - ``MONGO_PROFILER_SAMPLE_RATE``: Profile 1 of N requests, by default 100.
+    - ``MONGO_PROFILER_DUMP_INTERVAL``: Dump interval in seconds, by default 60.
+    - ``MONGO_PROFILER_DUMP_PATH``: JSON file path, ``{pid}`` placeholder is
+      replaced with process id. By default, dump to log.
+    - ``MONGO_PROFILER_MAX_FINGERPRINTS``: Max tracked query shapes per endpoint,
+      by default 100.
+    """
+
+    def __init__(self, app: Optional[Flask] = None):
+        self.listener = mongo_profiler_listener
+        self.sample_rate: int = 100
+        self.dump_interval: float = 60
+        self.dump_path: Optional[str] = None
+        self.max_fingerprints: int = 100
+        self.endpoints: Dict[str, EndpointStats] = {}
+        self.last_dump: float = time.monotonic()
+        self._lock = threading.Lock()
+        self._random = random.Random()
+        # Single listener is shared by all extension instances, as each registered
+        # listener is called for every command of every client.
+        # noinspection PyProtectedMember
+        if self.listener not in monitoring._LISTENERS.command_listeners:
+            monitoring.register(self.listener)
+
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app: Flask):
+        """Read configuration and register request hooks."""
+        self.sample_rate = app.config.get("MONGO_PROFILER_SAMPLE_RATE", 100)
+        self.dump_interval = app.config.get("MONGO_PROFILER_DUMP_INTERVAL", 60)
+        self.dump_path = app.config.get("MONGO_PROFILER_DUMP_PATH")
+        self.max_fingerprints = app.config.get("MONGO_PROFILER_MAX_FINGERPRINTS", 100)
+
+        app.before_request(self._before_request)
+        app.teardown_request(self._teardown_request)
+        app.extensions = getattr(app, "extensions", {})
+        app.extensions["mongoengine_profiler"] = self
+
+    def _is_sampled(self) -> bool:
+        return self.sample_rate > 0 and self._random.randrange(self.sample_rate) == 0
+
+    def _before_request(self):
+        """Start queries recording for sampled requests."""
+        self.listener.profile.set(_RequestProfile() if self._is_sampled() else None)
+
+    def _teardown_request(self, exception=None):
+        """Merge request queries to endpoint statistics and dump if time come."""
+        profile = self.listener.profile.get()
+        if profile is None:
+            return
+        self.listener.profile.set(None)
+        endpoint = request.endpoint or "<unknown>"
+        endpoints = None
+        with self._lock:
+            stats = self.endpoints.get(endpoint)
+            if stats is None:
+                stats = self.endpoints[endpoint] = EndpointStats(self.max_fingerprints)
+            stats.add_request(profile.timings)
+            if time.monotonic() - self.last_dump >= self.dump_interval:
+                endpoints = self._take_endpoints()
+        if endpoints is not None:
+            self._write_report(endpoints)
+
+    def _take_endpoints(self) -> Dict[str, EndpointStats]:
+        """Replace statistics with empty ones, must be called under lock."""
+        endpoints = self.endpoints
+        self.endpoints = {}
+        self.last_dump = time.monotonic()
+        return endpoints
+
+    def _make_report(self, endpoints: Dict[str, EndpointStats]) -> dict:
+        return {
+            "pid": os.getpid(),
+            "timestamp": time.time(),
+            "sample_rate": self.sample_rate,
+            "endpoints": {name: stats.to_dict() for name, stats in endpoints.items()},
+        }
+
+    def report(self) -> dict:
+        """Current statistics, as JSON serializable dictionary."""
+        with self._lock:
+            return self._make_report(self.endpoints)
+
+    def dump(self):
+        """Write statistics to log or JSON file and reset them."""
+        with self._lock:
+            endpoints = self._take_endpoints()
+        self._write_report(endpoints)
+
+    def _write_report(self, endpoints: Dict[str, EndpointStats]):
+        # Taken statistics are not referenced by other threads anymore, so report is
+        # formatted and written without lock.
+        report = self._make_report(endpoints)
+        if not self.dump_path:
+            logger.info(f"Mongo profiler report: {json.dumps(report)}")
+            return
+
+        path = self.dump_path.format(pid=report["pid"])
+        temporary_path = f"{path}.tmp"
+        with open(temporary_path, "w") as file:
+            json.dump(report, file, indent=2)
+        os.replace(temporary_path, path)
@@ -0,0 +1,78 @@
+"""
+Pytest plugin, that fails tests with repeated same shape database queries (N+1).
+
+Plugin is not activated automatically. Enable it in project ``conftest.py``::
+
+    pytest_plugins = ["flask_mongoengine.pytest_plugin"]
+
+Threshold configured with ``mongo_repeated_query_threshold`` ini option or with
+``--mongo-repeated-query-threshold`` command line option (5 by default). Tests, that
+execute repeated queries by design, can be marked with
+``@pytest.mark.mongo_repeated_queries_allowed``.
+"""
+import pytest
+from pymongo import monitoring
+
+from flask_mongoengine.analysis import find_repeated_queries
+from flask_mongoengine.monitoring import MongoCommandLogger
+
+repeated_queries_logger = MongoCommandLogger()
+
+
+def pytest_addoption(parser):
+    """Register threshold option."""
+    help_text = "Fail tests with at least this amount of same shape mongo queries."
+    parser.addini("mongo_repeated_query_threshold", help=help_text, default="5")
+    parser.addoption(
+        "--mongo-repeated-query-threshold",
+        type=int,
+        default=None,
+        help=help_text,
+    )
+
+
+def pytest_configure(config):
+    """Register marker and command listener, before any database connection."""
+    config.addinivalue_line(
+        "markers",
+        "mongo_repeated_queries_allowed: skip repeated mongo queries (N+1) check.",
+    )
+    # noinspection PyProtectedMember
+    if repeated_queries_logger not in monitoring._LISTENERS.command_listeners:
+        monitoring.register(repeated_queries_logger)
+
+
+def _get_threshold(config) -> int:
+    """Command line option has priority over ini option."""
+    threshold = config.getoption("--mongo-repeated-query-threshold")
+    if threshold is None:
+        threshold = int(config.getini("mongo_repeated_query_threshold"))
+    return threshold
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_call(item):
+    """Track queries of test call phase and fail test on repeated queries."""
+    repeated_queries_logger.reset_tracker()
+    outcome = yield
+
+    if outcome.excinfo is not None:
+        return
+    if item.get_closest_marker("mongo_repeated_queries_allowed"):
+        return
+
+    repeated = find_repeated_queries(
+        repeated_queries_logger.queries, _get_threshold(item.config)
+    )
+    if repeated:
+        details = "\n".join(
+            f"  {query.count} x {query.fingerprint}\n    from {query.origin}"
+            for query in repeated
+        )
+        try:
+            pytest.fail(f"Repeated mongo queries (N+1) detected:\n{details}", False)
+        except pytest.fail.Exception as error:
+            # Old pluggy versions do not support exception forcing.
+            if not hasattr(outcome, "force_exception"):
+                raise
+            outcome.force_exception(error)
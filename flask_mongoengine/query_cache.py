@@ -0,0 +1,161 @@
+"""
+Querysets results cache, used by :func:`BaseQuerySet.cache`.
+
+Results are stored as raw BSON documents in pluggable backend. Any object with
+``get(key)`` and ``set(key, value, timeout=None)`` methods can be used as backend, for
+example ``flask_caching.Cache`` instance. Configure it with
+``MONGODB_QUERY_CACHE`` application config variable. By default, in-process
+:class:`LRUCache` is used.
+
+Cached results are invalidated by collection level version tokens. Each write to
+collection through documents or querysets methods replaces collection version, so all
+previously cached results of collection become unreachable and expire by timeout or
+LRU eviction.
+"""
+__all__ = ["LRUCache", "default_cache", "get_cache_backend"]
+import hashlib
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Optional
+
+import bson
+from bson import json_util
+from bson.codec_options import DEFAULT_CODEC_OPTIONS, CodecOptions
+from flask import current_app, has_app_context
+
+KEY_PREFIX = "flask_mongoengine"
+
+
+class LRUCache:
+    """
+    Thread safe in-process cache with least recently used eviction and expiration.
+
+    :param max_size: Maximum number of stored keys.
+    """
+
+    def __init__(self, max_size: int = 1024):
+        self.max_size = max_size
+        self._data: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Any:
+        """Return stored value or ``None``, for missing or expired keys."""
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            value, expires = item
+            if expires is not None and expires < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any, timeout: Optional[float] = None) -> bool:
+        """Store value, ``timeout`` in seconds, ``None`` or ``0`` for no expiration."""
+        expires = time.monotonic() + timeout if timeout else None
+        with self._lock:
+            self._data[key] = (value, expires)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+        return True
+
+    def clear(self) -> bool:
+        """Remove all keys."""
+        with self._lock:
+            self._data.clear()
+        return True
+
+
+default_cache = LRUCache()
+
+
+def get_cache_backend():
+    """Return configured backend of current application or :data:`default_cache`."""
+    if has_app_context():
+        backend = current_app.config.get("MONGODB_QUERY_CACHE")
+        if backend is not None:
+            return backend
+    return default_cache
+
+
+def _version_key(collection) -> str:
+    return f"{KEY_PREFIX}:version:{collection.full_name}"
+
+
+def get_collection_version(backend, collection) -> str:
+    """Return current version token of collection, creating new one if missing."""
+    key = _version_key(collection)
+    version = backend.get(key)
+    if version is None:
+        version = bump_collection_version(collection, backend)
+    return version
+
+
+def bump_collection_version(collection, backend=None) -> str:
+    """Replace collection version, so all cached results of collection are dropped."""
+    backend = backend or get_cache_backend()
+    version = uuid.uuid4().hex
+    backend.set(_version_key(collection), version, timeout=0)
+    return version
+
+
+def results_key(backend, collection, query_shape: dict, key: Optional[str]) -> str:
+    """
+    Return cache key of queryset results.
+
+    :param backend: Cache backend.
+    :param collection: Queryset pymongo collection.
+    :param query_shape: Filter, projection, sort, skip and limit of queryset.
+    :param key: Custom key, used instead of query shape hash.
+    """
+    if key is None:
+        normalized = json_util.dumps(query_shape, sort_keys=True)
+        key = hashlib.sha1(normalized.encode()).hexdigest()
+    version = get_collection_version(backend, collection)
+    return f"{KEY_PREFIX}:query:{collection.full_name}:{version}:{key}"
+
+
+class CachedCursor:
+    """
+    Minimal pymongo cursor replacement, that iterates cached raw BSON documents.
+
+    :param documents: Raw BSON documents.
+    :param collection: Pymongo collection of original query.
+    """
+
+    def __init__(self, documents: list, collection):
+        self.documents = documents
+        self.collection = collection
+        self._index = 0
+        codec_options = getattr(collection, "codec_options", None)
+        if not isinstance(codec_options, CodecOptions):
+            codec_options = DEFAULT_CODEC_OPTIONS
+        self._codec_options = codec_options
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self._index >= len(self.documents):
+            raise StopIteration
+        document = self.documents[self._index]
+        self._index += 1
+        return bson.decode(document, codec_options=self._codec_options)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return CachedCursor(self.documents[index], self.collection)
+        return bson.decode(self.documents[index], codec_options=self._codec_options)
+
+    def clone(self) -> "CachedCursor":
+        """Return not iterated copy."""
+        return CachedCursor(self.documents, self.collection)
+
+    def rewind(self) -> "CachedCursor":
+        """Restart iteration."""
+        self._index = 0
+        return self
@@ -0,0 +1,171 @@
+"""Server-Timing response header and per-request database budget enforcement."""
+__all__ = [
+    "MongoServerTiming",
+    "RequestBudgetExceeded",
+    "mongo_request_timing_listener",
+]
+import logging
+from contextvars import ContextVar
+from typing import Optional
+
+from flask import Flask, request
+from pymongo import monitoring
+
+logger = logging.getLogger("flask_mongoengine")
+
+BUDGET_KEYS = {"ops", "ms"}
+
+
+class RequestBudgetExceeded(RuntimeError):
+    """Request executed more database operations or time, than allowed by budget."""
+
+
+class RequestTimingCounters:
+    """Database operations count and total time of single request."""
+
+    __slots__ = ("operations_count", "total_time")
+
+    def __init__(self):
+        self.operations_count: int = 0
+        self.total_time: float = 0
+
+
+class RequestTimingListener(monitoring.CommandListener):
+    """
+    Commands listener, that only counts finished commands and sums their duration
+    for current request context. Events themselves are never kept. Commands outside
+    of tracked requests are ignored.
+    """
+
+    def __init__(self):
+        self._counters: ContextVar[Optional[RequestTimingCounters]] = ContextVar(
+            f"mongo_request_timing_{id(self)}", default=None
+        )
+
+    @property
+    def counters(self) -> RequestTimingCounters:
+        """Counters of current request, empty outside of tracked request."""
+        return self._counters.get() or RequestTimingCounters()
+
+    def reset(self) -> RequestTimingCounters:
+        """Start new counters for current context."""
+        counters = RequestTimingCounters()
+        self._counters.set(counters)
+        return counters
+
+    def _add(self, event):
+        counters = self._counters.get()
+        if counters is not None:
+            counters.operations_count += 1
+            counters.total_time += event.duration_micros
+
+    def started(self, event):
+        """Not used, duration is reported by final events."""
+
+    def succeeded(self, event):
+        """Count succeeded command."""
+        self._add(event)
+
+    def failed(self, event):
+        """Count failed command."""
+        self._add(event)
+
+
+mongo_request_timing_listener = RequestTimingListener()
+
+
+def _validate_budget(budget: Optional[dict]) -> Optional[dict]:
+    """Check ``MONGODB_REQUEST_BUDGET`` structure."""
+    if budget is None:
+        return None
+    if not isinstance(budget, dict):
+        raise TypeError("MONGODB_REQUEST_BUDGET must be a dict")
+    unknown = set(budget) - BUDGET_KEYS
+    if unknown:
+        raise ValueError(
+            f"Unknown MONGODB_REQUEST_BUDGET keys: {', '.join(sorted(unknown))}. "
+            f"Expected: {', '.join(sorted(BUDGET_KEYS))}"
+        )
+    return budget
+
+
+class MongoServerTiming:
+    """
+    Flask extension, that adds database usage of each request to
+    ``Server-Timing`` response header, visible in browser developer tools::
+
+        Server-Timing: mongo;dur=12.345;desc="3 ops"
+
+    and optionally enforces per-request database budget, configured with
+    ``MONGODB_REQUEST_BUDGET`` variable, like ``{"ops": 50, "ms": 200}``. Both keys
+    are optional. Requests, that exceed budget, are logged with ``WARNING`` level,
+    or, if ``MONGODB_REQUEST_BUDGET_RAISE`` is set (by default in testing mode),
+    fail with :class:`RequestBudgetExceeded`.
+
+    Extension must be initialized before database connection creation, as pymongo
+    listeners cannot be attached to existing connections.
+    """
+
+    def __init__(self, app: Optional[Flask] = None):
+        self.command_logger = mongo_request_timing_listener
+        self.budget: Optional[dict] = None
+        self.raise_on_budget: bool = False
+        # noinspection PyProtectedMember
+        if self.command_logger not in monitoring._LISTENERS.command_listeners:
+            monitoring.register(self.command_logger)
+
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app: Flask):
+        """Read configuration and register request hooks."""
+        self.budget = _validate_budget(app.config.get("MONGODB_REQUEST_BUDGET"))
+        self.raise_on_budget = app.config.get(
+            "MONGODB_REQUEST_BUDGET_RAISE", app.testing
+        )
+
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        app.extensions = getattr(app, "extensions", {})
+        app.extensions["mongoengine_server_timing"] = self
+
+    def _before_request(self):
+        """Start new commands counters for current request."""
+        self.command_logger.reset()
+
+    def _after_request(self, response):
+        """Add ``Server-Timing`` header and check request budget."""
+        counters = self.command_logger.counters
+        ops = counters.operations_count
+        duration = counters.total_time * 0.001
+        response.headers.add(
+            "Server-Timing", f'mongo;dur={duration:.3f};desc="{ops} ops"'
+        )
+        self.check_budget(ops, duration)
+        return response
+
+    def check_budget(self, ops: int, duration: float):
+        """
+        Log or raise, when request exceeded configured budget.
+
+        :param ops: Number of database operations, executed by request.
+        :param duration: Total database time of request, in ms.
+        :raises RequestBudgetExceeded: Budget exceeded and raising enabled.
+        """
+        if not self.budget:
+            return
+        violations = []
+        if "ops" in self.budget and ops > self.budget["ops"]:
+            violations.append(f"{ops} ops (budget {self.budget['ops']})")
+        if "ms" in self.budget and duration > self.budget["ms"]:
+            violations.append(f"{duration:.3f}ms (budget {self.budget['ms']}ms)")
+        if not violations:
+            return
+
+        message = (
+            f"Request '{request.method} {request.path}' exceeded mongo budget: "
+            f"{', '.join(violations)}"
+        )
+        if self.raise_on_budget:
+            raise RequestBudgetExceeded(message)
+        logger.warning(message)
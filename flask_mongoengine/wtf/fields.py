@@ -8,11 +8,27 @@ __all__ = [
 from typing import Callable, Optional
 
 from flask import json
-from mongoengine.queryset import DoesNotExist
+from mongoengine import fields as db_fields
+from mongoengine.base import ComplexBaseField
+from mongoengine.errors import ValidationError
 from wtforms import fields as wtf_fields
 from wtforms import validators as wtf_validators
 from wtforms import widgets as wtf_widgets
 
+from flask_mongoengine.lookup import lookup_url
+
+# Fields, which raw values can not be used as choices labels.
+_NOT_LABEL_FIELDS = (
+    ComplexBaseField,
+    db_fields.CachedReferenceField,
+    db_fields.EmbeddedDocumentField,
+    db_fields.GenericEmbeddedDocumentField,
+    db_fields.GenericLazyReferenceField,
+    db_fields.GenericReferenceField,
+    db_fields.LazyReferenceField,
+    db_fields.ReferenceField,
+)
+
 
 def coerce_boolean(value: Optional[str]) -> Optional[bool]:
     """Transform SelectField boolean value from string and in reverse direction."""
@@ -47,9 +63,25 @@ class QuerySetSelectField(wtf_fields.SelectFieldBase):
     top of the list. Selecting this choice will result in the `data` property
     being `None`.  The label for the blank choice can be set by specifying the
     `blank_text` parameter.
+
+    If `label_attr` is a plain field of flask-mongoengine document, choices are
+    loaded with server side projection to `id` and `label_attr` only, without
+    documents creation. Set `cache_timeout` (in seconds) to keep loaded choices in
+    :meth:`~flask_mongoengine.documents.BaseQuerySet.cache` results cache, until
+    timeout or any write to queryset collection.
+
+    For very large collections set `remote` to name of lookup, registered in
+    :class:`~flask_mongoengine.lookup.ChoicesLookup`. In remote mode queryset is not
+    iterated: only selected options are rendered, with lookup endpoint URL in
+    ``data-remote-url`` attribute for autocomplete widgets. Submitted values are
+    still validated against queryset, by primary key.
     """
 
     widget = wtf_widgets.Select()
+    # Submitted, not yet loaded primary keys, check :func:`process_formdata`.
+    pending_keys: Optional[list] = None
+    _multiple = False
+    _data = None
 
     def __init__(
         self,
@@ -60,6 +92,8 @@ class QuerySetSelectField(wtf_fields.SelectFieldBase):
         allow_blank=False,
         blank_text="---",
         label_modifier=None,
+        cache_timeout=None,
+        remote=None,
         **kwargs,
     ):
         """Init docstring placeholder."""
@@ -69,8 +103,59 @@ class QuerySetSelectField(wtf_fields.SelectFieldBase):
         self.allow_blank = allow_blank
         self.blank_text = blank_text
         self.label_modifier = label_modifier
+        self.cache_timeout = cache_timeout
+        self.remote = remote
         self.queryset = queryset
 
+    def __call__(self, **kwargs):
+        """Render field, with lookup endpoint URL in remote mode."""
+        if self.remote:
+            kwargs.setdefault("data-remote-url", lookup_url(self.remote))
+        return super().__call__(**kwargs)
+
+    def _choice_label(self, obj):
+        """Return choice label of document."""
+        if self.label_modifier:
+            return self.label_modifier(obj)
+        return self.label_attr and getattr(obj, self.label_attr) or obj
+
+    def _can_project_choices(self) -> bool:
+        """Check, that choices labels can be loaded without documents creation."""
+        if not self.label_attr or self.label_modifier:
+            return False
+        if not hasattr(self.queryset, "raw_values_list") or not hasattr(
+            self.queryset, "cache"
+        ):
+            return False  # Not flask-mongoengine queryset.
+        # noinspection PyProtectedMember
+        field = self.queryset._document._fields.get(self.label_attr)
+        return field is not None and not isinstance(field, _NOT_LABEL_FIELDS)
+
+    def _selected_ids(self) -> set:
+        """Return primary keys of selected documents."""
+        data = self.data if isinstance(self.data, list) else [self.data]
+        return {getattr(item, "pk", item) for item in data if item is not None}
+
+    def _iter_projected_choices(self):
+        """
+        Yield choices, loaded with projection to ``id`` and ``label_attr``. Like in
+        not projected choices, documents with empty labels are used as labels, these
+        are loaded with single query.
+        """
+        queryset = self.queryset.clone()
+        if self.cache_timeout is not None:
+            queryset = queryset.cache(timeout=self.cache_timeout)
+        rows = queryset.raw_values_list("id", self.label_attr)
+        empty_label_ids = [pk for pk, label in rows if not label]
+        documents = {}
+        if empty_label_ids:
+            id_field = self._id_field()
+            queryset = self.queryset.clone().filter(pk__in=empty_label_ids)
+            documents = {id_field.to_mongo(doc.pk): doc for doc in queryset}
+        selected_ids = self._selected_ids()
+        for pk, label in rows:
+            yield pk, label or documents.get(pk, pk), pk in selected_ids
+
     def iter_choices(self):
         """
         Provides data for choice widget rendering. Must return a sequence or
@@ -82,13 +167,20 @@ class QuerySetSelectField(wtf_fields.SelectFieldBase):
         if self.queryset is None:
             return
 
+        if self.remote:
+            selected = self.data if isinstance(self.data, list) else [self.data]
+            for obj in selected:
+                if obj is not None:
+                    yield obj.id, self._choice_label(obj), True
+            return
+
+        if self._can_project_choices():
+            yield from self._iter_projected_choices()
+            return
+
         self.queryset.rewind()
         for obj in self.queryset:
-            label = (
-                self.label_modifier(obj)
-                if self.label_modifier
-                else (self.label_attr and getattr(obj, self.label_attr) or obj)
-            )
+            label = self._choice_label(obj)
 
             if isinstance(self.data, list):
                 selected = obj in self.data
@@ -96,12 +188,38 @@ class QuerySetSelectField(wtf_fields.SelectFieldBase):
                 selected = self._is_selected(obj)
             yield obj.id, label, selected
 
+    def _id_field(self):
+        """Return primary key field of queryset document."""
+        # noinspection PyProtectedMember
+        document = self.queryset._document
+        return document._fields[document._meta["id_field"]]
+
+    @property
+    def data(self):
+        """Selected document(s), loaded on first access after form data processing."""
+        if self.pending_keys is not None:
+            documents = {}
+            if self.pending_keys:
+                id_field = self._id_field()
+                queryset = self.queryset.clone().filter(pk__in=self.pending_keys)
+                documents = {id_field.to_mongo(doc.pk): doc for doc in queryset}
+            self.resolve_pending(documents)
+        return self._data
+
+    @data.setter
+    def data(self, value):
+        self.pending_keys = None
+        self._data = value
+
     def process_formdata(self, valuelist):
         """
         Process data received over the wire from a form.
 
         This will be called during form construction with data supplied
-        through the `formdata` argument.
+        through the `formdata` argument. Documents are not loaded here: submitted
+        primary keys are stored in :attr:`pending_keys` and loaded on first
+        :attr:`data` access, or by :meth:`.ModelForm.validate` in single batch for
+        all form fields.
 
         :param valuelist: A list of strings to process.
         """
@@ -109,11 +227,27 @@ class QuerySetSelectField(wtf_fields.SelectFieldBase):
             self.data = None
             return
 
-        try:
-            obj = self.queryset.get(pk=valuelist[0])
-            self.data = obj
-        except DoesNotExist:
-            self.data = None
+        id_field = self._id_field()
+        keys = []
+        for value in valuelist[: None if self._multiple else 1]:
+            try:
+                keys.append(id_field.to_mongo(value))
+            except (TypeError, ValidationError):  # Malformed primary key.
+                continue
+        self.data = None
+        self.pending_keys = list(dict.fromkeys(keys))
+
+    def resolve_pending(self, documents: dict):
+        """
+        Set :attr:`data` from loaded documents.
+
+        :param documents: Loaded documents by primary key, as stored in database.
+        """
+        selected = [documents[key] for key in self.pending_keys if key in documents]
+        if self._multiple:
+            self.data = selected or None
+        else:
+            self.data = selected[0] if selected else None
 
     def pre_validate(self, form):
         """
@@ -133,6 +267,7 @@ class QuerySetSelectMultipleField(QuerySetSelectField):
     """Same as :class:`QuerySetSelectField` but with multiselect options."""
 
     widget = wtf_widgets.Select(multiple=True)
+    _multiple = True
 
     def __init__(
         self,
@@ -149,25 +284,6 @@ class QuerySetSelectMultipleField(QuerySetSelectField):
             label, validators, queryset, label_attr, allow_blank, blank_text, **kwargs
         )
 
-    def process_formdata(self, valuelist):
-        """
-        Process data received over the wire from a form.
-
-        This will be called during form construction with data supplied
-        through the `formdata` argument.
-
-        :param valuelist: A list of strings to process.
-        """
-
-        if not valuelist or valuelist[0] == "__None" or not self.queryset:
-            self.data = None
-            return
-
-        self.queryset.rewind()
-        self.data = list(self.queryset(pk__in=valuelist))
-        if not len(self.data):
-            self.data = None
-
     def _is_selected(self, item):
         return item in self.data if self.data else False
 
@@ -1,27 +1,613 @@
-from typing import Type, Union
+import functools
+import re
+from typing import Dict, Iterable, List, Optional, Set, Tuple, Type, Union
 
 import mongoengine
+from bson import json_util
+from flask import request
 from flask_wtf import FlaskForm
-from flask_wtf.form import _Auto
+from flask_wtf.form import _Auto, _is_submitted
+from markupsafe import Markup
+from mongoengine import signals
+from mongoengine.errors import OperationError, SaveConditionError, ValidationError
+from pymongo import InsertOne, UpdateOne
+from pymongo.errors import BulkWriteError
+from pymongo.results import BulkWriteResult
+from werkzeug.datastructures import CombinedMultiDict, FileStorage
+
+from flask_mongoengine.files import UploadTooLarge, stream_to_gridfs
+from flask_mongoengine.wtf.fields import QuerySetSelectField
+
+# Document.save() arguments, supported by partial update.
+_PARTIAL_UPDATE_KWARGS = {"validate", "write_concern", "signal_kwargs"}
+
+
+class ConcurrentModificationError(OperationError):
+    """Saved document was deleted or changed by other request after form creation."""
+
+
+def load_references(fields: Iterable, projection: bool = False):
+    """
+    Load submitted documents of reference select fields, with single ``$in`` query
+    per collection and queryset filter.
+
+    :param fields: Form fields, other than reference select fields are ignored.
+    :param projection: Load only primary key and ``label_attr`` of documents.
+    """
+    groups = {}
+    for field in fields:
+        if isinstance(field, QuerySetSelectField) and field.pending_keys:
+            queryset = field.queryset
+            # noinspection PyProtectedMember
+            query = json_util.dumps(queryset._query, sort_keys=True)
+            groups.setdefault((queryset._document, query), []).append(field)
+
+    for (document, _), fields in groups.items():
+        keys = list(dict.fromkeys(pk for field in fields for pk in field.pending_keys))
+        queryset = fields[0].queryset.clone().filter(pk__in=keys)
+        if projection and not any(field.label_modifier for field in fields):
+            labels = {field.label_attr for field in fields} & set(document._fields)
+            queryset = queryset.only(document._meta["id_field"], *labels)
+        id_field = fields[0]._id_field()
+        documents = {id_field.to_mongo(doc.pk): doc for doc in queryset}
+        for field in fields:
+            field.resolve_pending(documents)
 
 
 class ModelForm(FlaskForm):
     """A WTForms mongoengine model form"""
 
     model_class: Type[Union[mongoengine.Document, mongoengine.DynamicDocument]]
+    #: Load submitted references with projection to primary key (and ``label_attr``
+    #: for choices rendering), enough for :func:`save`. Other fields of selected
+    #: documents in form ``data`` are ``None`` then.
+    references_projection: bool = False
+    #: Integer model field name, for optimistic concurrency control. Value of field is
+    #: checked and incremented by :func:`save` of existing documents. Include it to
+    #: form as hidden field, to detect changes made between form render and submit.
+    version_field: Optional[str] = None
+    #: Update existing documents in :func:`save` with single ``update_one`` call of
+    #: changed fields, instead of document ``save()``. Document ``save()`` overrides
+    #: and cascade are skipped, only ``pre_save`` and ``post_save`` signals are sent.
+    partial_update: bool = False
+    #: Maximum length in bytes of each file, uploaded to model ``FileField``.
+    upload_max_length: Optional[int] = None
 
     def __init__(self, formdata=_Auto, **kwargs):
         self.instance = kwargs.pop("instance", None) or kwargs.get("obj")
         if self.instance and not formdata:
             kwargs["obj"] = self.instance
         self.formdata = formdata
+        self._uploaded_files: list = []
+        self._replaced_files: list = []
         super(ModelForm, self).__init__(formdata, **kwargs)
 
-    def save(self, commit=True, **kwargs):
+    def upload_progress(self, name: str, written: int, total: Optional[int]):
+        """
+        Upload progress hook, called after each GridFS chunk write. Does nothing by
+        default.
+
+        :param name: Form field name.
+        :param written: Written bytes count.
+        :param total: Expected file length, ``None`` if unknown.
+        """
+
+    def _load_references(self):
+        """
+        Load submitted documents of all reference select fields, with single ``$in``
+        query per collection (and queryset filter), instead of query per field.
+        """
+        load_references(self._fields.values(), self.references_projection)
+
+    def validate(self, extra_validators=None):
+        """Load submitted references of all fields in batches and validate form."""
+        self._load_references()
+        return super().validate(extra_validators=extra_validators)
+
+    def _model_queryset(self):
+        """Return unfiltered queryset of instance class, same as used by save."""
+        queryset_class = self.instance._meta.get("queryset_class", mongoengine.QuerySet)
+        return queryset_class(type(self.instance), self.instance._get_collection())
+
+    def _populate_instance(self) -> Optional[dict]:
+        """
+        Populate instance (new, if not set) with form data. Return raw document
+        before population for existing documents, or ``None`` for new documents.
+        """
         if not self.instance:
             self.instance = self.model_class()
-        self.populate_obj(self.instance)
+        existing = (
+            isinstance(self.instance, mongoengine.Document)
+            and self.instance.pk is not None
+            and not self.instance._created
+        )
+        original = self.instance.to_mongo() if existing else None
+        uploads = self._stream_uploads()
+        for name, field in self._fields.items():
+            if name in uploads:
+                self._replaced_files.append(self.instance._data.get(name))
+                setattr(self.instance, name, uploads[name])
+            else:
+                field.populate_obj(self.instance, name)
+        return original
+
+    def _stream_uploads(self) -> dict:
+        """
+        Write uploaded files of model ``FileField`` fields to GridFS by chunks,
+        instead of mongoengine assignment. Return new file proxies by field name.
+        ``ImageField`` uploads are processed by mongoengine.
+
+        :raises UploadTooLarge: File exceeds :attr:`upload_max_length`.
+        """
+        uploads = {}
+        for name, field in self._fields.items():
+            model_field = self.instance._fields.get(name)
+            if (
+                not isinstance(field.data, FileStorage)
+                or not field.data
+                or not isinstance(model_field, mongoengine.FileField)
+                or isinstance(model_field, mongoengine.ImageField)
+            ):
+                continue
+            proxy = model_field.get_proxy_obj(key=name, instance=self.instance)
+            try:
+                proxy.grid_id = stream_to_gridfs(
+                    proxy.fs,
+                    field.data.stream,
+                    max_length=self.upload_max_length,
+                    progress=functools.partial(self.upload_progress, name),
+                    total=field.data.content_length or None,
+                    filename=field.data.filename,
+                    content_type=field.data.mimetype or None,
+                )
+            except BaseException:
+                self._uploaded_files.extend(uploads.values())
+                self._finish_uploads(saved=False)
+                raise
+            uploads[name] = proxy
+        self._uploaded_files.extend(uploads.values())
+        return uploads
+
+    def _finish_uploads(self, saved: bool):
+        """Delete replaced files of saved instance, or uploaded files of not saved."""
+        files = self._replaced_files if saved else self._uploaded_files
+        for proxy in files:
+            if proxy is not None and proxy.grid_id:
+                # Direct delete, proxy.delete() marks instance field as changed.
+                proxy.fs.delete(proxy.grid_id)
+        self._uploaded_files, self._replaced_files = [], []
+
+    def _prepare_update(
+        self, original: dict, validate: bool = True
+    ) -> Optional[Tuple[dict, dict]]:
+        """
+        Return raw filter and update, that ``$set`` and ``$unset`` only fields,
+        changed since ``original`` raw document state, or ``None`` without changes.
+
+        :param original: Raw document, before form data population.
+        :param validate: Validate document before update.
+        """
+        instance = self.instance
+        if validate:
+            instance.validate()
+        current = instance.to_mongo()
+        changed = {
+            key: value
+            for key, value in current.items()
+            if key not in original or original[key] != value
+        }
+        removed = {key: "" for key in original if key not in current}
+
+        select = instance._object_key
+        if self.version_field:
+            # Version from hidden form field is submitted as string.
+            version = getattr(instance, self.version_field)
+            version = None if version in (None, "") else int(version)
+            select[self.version_field] = version
+            if changed or removed:
+                db_field = instance._fields[self.version_field].db_field
+                changed[db_field] = (version or 0) + 1
+                removed.pop(db_field, None)
+        if not changed and not removed:
+            return None
+
+        update = {}
+        if changed:
+            update["$set"] = changed
+        if removed:
+            update["$unset"] = removed
+        # noinspection PyProtectedMember
+        return self._model_queryset().filter(**select)._query, update
+
+    def _complete_update(self, update: dict):
+        """Update instance state after successful database update."""
+        if self.version_field:
+            db_field = self.instance._fields[self.version_field].db_field
+            setattr(self.instance, self.version_field, update["$set"][db_field])
+        self.instance._clear_changed_fields()
+
+    def _update_changed_fields(
+        self,
+        original: dict,
+        validate: bool = True,
+        write_concern: Optional[dict] = None,
+        signal_kwargs: Optional[dict] = None,
+    ):
+        """
+        Update existing document with single ``update_one`` call, that ``$set`` and
+        ``$unset`` only fields, changed since ``original`` raw document state.
+
+        :param original: Raw document, before form data population.
+        :param validate: Validate document before update.
+        :param write_concern: Update write concern.
+        :param signal_kwargs: Keyword arguments of ``pre_save`` and ``post_save``
+            signals.
+        :raises ConcurrentModificationError: Document deleted, or version changed.
+        """
+        document_class = type(self.instance)
+        signal_kwargs = signal_kwargs or {}
+        signals.pre_save.send(document_class, document=self.instance, **signal_kwargs)
+        prepared = self._prepare_update(original, validate)
+        if prepared is None:
+            return
+
+        query, update = prepared
+        # Document queryset class used, so results caches are invalidated.
+        updated = (
+            self._model_queryset()
+            .filter(__raw__=query)
+            .update_one(__raw__=update, write_concern=write_concern)
+        )
+        if not updated:
+            raise ConcurrentModificationError(
+                f"{document_class.__name__} {self.instance.pk} was deleted or "
+                f"changed by other request"
+            )
+        self._complete_update(update)
+        signals.post_save.send(
+            document_class, document=self.instance, created=False, **signal_kwargs
+        )
+
+    def _save_versioned(self, **kwargs):
+        """
+        Save existing document with ``save()``, only if its :attr:`version_field`
+        value was not changed, and increment it.
+
+        :raises ConcurrentModificationError: Document deleted, or version changed.
+        """
+        instance = self.instance
+        # Version from hidden form field is submitted as string.
+        version = getattr(instance, self.version_field)
+        version = None if version in (None, "") else int(version)
+        save_condition = dict(kwargs.pop("save_condition", None) or {})
+        save_condition[self.version_field] = version
+        setattr(instance, self.version_field, (version or 0) + 1)
+        try:
+            instance.save(save_condition=save_condition, **kwargs)
+        except SaveConditionError:
+            setattr(instance, self.version_field, version)
+            raise ConcurrentModificationError(
+                f"{type(instance).__name__} {instance.pk} was deleted or changed by "
+                f"other request"
+            )
+        except BaseException:
+            setattr(instance, self.version_field, version)
+            raise
+
+    def save(self, commit=True, **kwargs):
+        """
+        Populate model instance with form data and save it.
 
-        if commit:
-            self.instance.save(**kwargs)
+        Documents are saved with :func:`~mongoengine.Document.save`. If
+        :attr:`version_field` is set, existing document is saved only if its version
+        was not changed. With :attr:`partial_update`, existing documents are updated
+        with single ``update_one`` call, with ``$set`` and ``$unset`` of changed fields
+        only, so large unchanged fields (like embedded documents lists) are not sent
+        to database.
+
+        Files, uploaded to model ``FileField`` fields, are streamed to GridFS by
+        chunks, with :attr:`upload_max_length` limit and :func:`upload_progress`
+        hook. Replaced files are deleted after successful save, uploaded files are
+        deleted if save failed. With ``commit=False`` both are kept.
+
+        :param commit: Save document to database.
+        :param kwargs: :func:`~mongoengine.Document.save` keyword arguments. Only
+            ``validate``, ``write_concern`` and ``signal_kwargs`` are supported with
+            :attr:`partial_update`.
+        :raises ConcurrentModificationError: Existing document deleted, or changed by
+            other request (with :attr:`version_field` only).
+        :raises UploadTooLarge: Uploaded file exceeds :attr:`upload_max_length`.
+        :raises TypeError: Not supported keyword arguments with
+            :attr:`partial_update`.
+        """
+        unsupported = set(kwargs) - _PARTIAL_UPDATE_KWARGS
+        if commit and self.partial_update and unsupported:
+            raise TypeError(
+                f"Partial update does not support save() arguments: "
+                f"{', '.join(sorted(unsupported))}"
+            )
+        original = self._populate_instance()
+        if not commit:
+            return self.instance
+        try:
+            if original is not None and self.partial_update:
+                self._update_changed_fields(original, **kwargs)
+            elif original is not None and self.version_field:
+                self._save_versioned(**kwargs)
+            else:
+                self.instance.save(**kwargs)
+        except BaseException:
+            self._finish_uploads(saved=False)
+            raise
+        self._finish_uploads(saved=True)
         return self.instance
+
+
+class ModelFormSet:
+    """
+    Set of :class:`ModelForm` forms of same class, for editing many documents with
+    single submit (like admin grids). Each row form uses ``{prefix}-{index}-`` fields
+    prefix and primary key of edited document in ``{prefix}-{index}-pk`` hidden
+    input, rendered by :func:`hidden_pk`::
+
+        TodoFormSet = Todo.to_wtf_form(base_class=ModelForm, only=["title", "done"])
+
+        formset = ModelFormSet(TodoFormSet, instances=Todo.objects[:100])
+        if formset.validate_on_submit():
+            errors = formset.save()
+
+    Submitted documents are loaded with single ``$in`` query, references of all rows
+    are loaded in batches (check :func:`load_references`) and all changes are
+    committed with single unordered ``bulk_write`` call: new documents are inserted,
+    existing ones are updated with changed fields only, same as by
+    :func:`ModelForm.save`. Document signals are not sent.
+
+    :param form_class: :class:`ModelForm` subclass of rows.
+    :param instances: Edited documents, for form rendering. Ignored, when form data
+        submitted: documents are loaded by submitted primary keys.
+    :param formdata: Submitted form data, taken from request by default.
+    :param queryset: Queryset for submitted documents loading, to limit documents
+        available for editing. All documents of model class by default.
+    :param prefix: Rows fields names prefix.
+    :param extra: Number of additional empty rows, for new documents creation.
+    """
+
+    def __init__(
+        self,
+        form_class: Type[ModelForm],
+        instances: Optional[Iterable] = None,
+        formdata=_Auto,
+        queryset=None,
+        prefix: str = "rows",
+        extra: int = 0,
+    ):
+        if formdata is _Auto:
+            formdata = (
+                CombinedMultiDict((request.files, request.form))
+                if _is_submitted()
+                else None
+            )
+        self.form_class = form_class
+        self.prefix = prefix
+        self.queryset = (
+            queryset if queryset is not None else form_class.model_class.objects
+        )
+        self.csrf_form = FlaskForm(formdata, prefix=prefix)
+        #: Row forms by row index.
+        self.forms: Dict[int, ModelForm] = {}
+        #: Rows with submitted primary keys of not found documents.
+        self.missing: Set[int] = set()
+        #: Validation errors of invalid rows, by row index.
+        self.errors: Dict[int, dict] = {}
+
+        if formdata:
+            rows = self._submitted_rows(formdata)
+        else:
+            rows = dict(enumerate(list(instances or []) + [None] * extra))
+        for index, instance in rows.items():
+            self.forms[index] = form_class(
+                formdata,
+                obj=instance,
+                prefix=f"{prefix}-{index}-",
+                meta={"csrf": False},
+            )
+
+    def __iter__(self):
+        return iter(self.forms.values())
+
+    def __len__(self):
+        return len(self.forms)
+
+    def _submitted_rows(self, formdata) -> Dict[int, Optional[object]]:
+        """Return submitted rows documents, loaded with single ``$in`` query."""
+        pattern = re.compile(rf"^{re.escape(self.prefix)}-(\d+)-")
+        indexes = sorted(
+            {int(match.group(1)) for match in map(pattern.match, formdata) if match}
+        )
+        # noinspection PyProtectedMember
+        document = self.queryset._document
+        id_field = document._fields[document._meta["id_field"]]
+        keys = {}
+        for index in indexes:
+            pk = formdata.get(f"{self.prefix}-{index}-pk")
+            if not pk:
+                continue
+            try:
+                keys[index] = id_field.to_mongo(pk)
+            except (TypeError, ValidationError):  # Malformed primary key.
+                keys[index] = None
+
+        documents = {}
+        if any(key is not None for key in keys.values()):
+            queryset = self.queryset.clone().filter(
+                pk__in=[key for key in keys.values() if key is not None]
+            )
+            documents = {id_field.to_mongo(doc.pk): doc for doc in queryset}
+
+        rows = {}
+        for index in indexes:
+            if index not in keys:
+                rows[index] = None
+            elif keys[index] in documents:
+                rows[index] = documents[keys[index]]
+            else:
+                self.missing.add(index)
+        return rows
+
+    def hidden_pk(self, form: ModelForm) -> Markup:
+        """Render hidden input with primary key of row document."""
+        index = next(index for index, row in self.forms.items() if row is form)
+        pk = form.instance.pk if form.instance else None
+        return Markup('<input type="hidden" name="{}" value="{}">').format(
+            f"{self.prefix}-{index}-pk", "" if pk is None else pk
+        )
+
+    def validate(self) -> bool:
+        """
+        Validate all rows, loading references of all rows in batches. Rows errors
+        are stored in :attr:`errors`.
+        """
+        load_references(
+            (field for form in self for field in form),
+            self.form_class.references_projection,
+        )
+        self.errors = {
+            index: {"pk": ["Document not found."]} for index in sorted(self.missing)
+        }
+        for index, form in self.forms.items():
+            if not form.validate():
+                self.errors[index] = form.errors
+        csrf_valid = self.csrf_form.validate()
+        return csrf_valid and not self.errors
+
+    def validate_on_submit(self) -> bool:
+        """Call :func:`validate` only if the form is submitted."""
+        return self.csrf_form.is_submitted() and self.validate()
+
+    def save(self) -> Dict[int, List[str]]:
+        """
+        Commit changes of all rows with single unordered ``bulk_write`` call.
+
+        :return: Errors messages of not saved rows, by row index. Successfully saved
+            rows documents are available as rows forms ``instance``.
+        """
+        errors: Dict[int, List[str]] = {}
+        operations, saved = self._prepare_operations(errors)
+        if not operations:
+            self._finish_uploads(errors)
+            return errors
+
+        failed, matched = set(), 0
+        # noinspection PyProtectedMember
+        collection = self.queryset._document._get_collection()
+        try:
+            matched = self._bulk_write(operations).matched_count
+        except BulkWriteError as error:
+            matched = error.details.get("nMatched", 0)
+            for write_error in error.details.get("writeErrors", []):
+                index = saved[write_error["index"]][0]
+                failed.add(index)
+                errors[index] = [write_error.get("errmsg", "Write error.")]
+
+        updates = [row for row in saved if row[3] is not None and row[0] not in failed]
+        if matched < len(updates):
+            failed.update(self._not_updated(collection, updates))
+            for index in failed - set(errors):
+                errors[index] = ["Document was deleted or changed by other request."]
+
+        for index, form, raw, update in saved:
+            if index in failed:
+                continue
+            if update is None:  # Inserted document, _id set by pymongo.
+                form.instance.pk = raw["_id"]
+                form.instance._created = False
+                form.instance._clear_changed_fields()
+            else:
+                form._complete_update(update)
+        self._finish_uploads(errors)
+        return errors
+
+    def _prepare_operations(self, errors: Dict[int, List[str]]) -> Tuple[list, list]:
+        """
+        Populate rows instances and return bulk write operations with saved rows
+        ``(row index, form, inserted raw document or update filter, update)``.
+        Not saved rows errors are added to ``errors``.
+        """
+        operations, saved = [], []
+        for index, form in self.forms.items():
+            try:
+                original = form._populate_instance()
+            except UploadTooLarge as error:
+                errors[index] = [error.description]
+                continue
+            try:
+                if original is None:
+                    form.instance.validate()
+                    raw = form.instance.to_mongo()
+                    operations.append(InsertOne(raw))
+                    saved.append((index, form, raw, None))
+                    continue
+                prepared = form._prepare_update(original)
+            except ValidationError as error:
+                errors[index] = [str(error)]
+                continue
+            if prepared is not None and self._is_outdated(original, prepared[0]):
+                errors[index] = ["Document was changed by other request."]
+                continue
+            if prepared is not None:
+                query, update = prepared
+                operations.append(UpdateOne(query, update))
+                saved.append((index, form, query, update))
+        return operations, saved
+
+    def _finish_uploads(self, errors: Dict[int, List[str]]):
+        """Clean up uploaded files of not saved rows, and replaced files of saved."""
+        for index, form in self.forms.items():
+            form._finish_uploads(saved=index not in errors)
+
+    def _is_outdated(self, original: dict, query: dict) -> bool:
+        """Check, that submitted version differs from loaded document version."""
+        version_field = self.form_class.version_field
+        if not version_field:
+            return False
+        # noinspection PyProtectedMember
+        db_field = self.queryset._document._fields[version_field].db_field
+        return original.get(db_field) != query.get(db_field)
+
+    def _bulk_write(self, operations: list) -> BulkWriteResult:
+        """Execute operations with single unordered ``bulk_write`` call."""
+        # noinspection PyProtectedMember
+        document = self.queryset._document
+        queryset_class = document._meta.get("queryset_class", mongoengine.QuerySet)
+        queryset = queryset_class(document, document._get_collection())
+        if hasattr(queryset, "_bulk_write"):  # Caches invalidation.
+            return queryset._bulk_write(
+                operations,
+                batch_size=len(operations),
+                ordered=False,
+                max_workers=None,
+            )
+        return document._get_collection().bulk_write(operations, ordered=False)
+
+    def _not_updated(self, collection, updates: list) -> Set[int]:
+        """Return indexes of updated rows, which documents were not updated."""
+        version_field = self.form_class.version_field
+        db_field = None
+        if version_field:
+            # noinspection PyProtectedMember
+            db_field = self.queryset._document._fields[version_field].db_field
+        expected = {
+            query["_id"]: (index, update["$set"][db_field] if db_field else None)
+            for index, _, query, update in updates
+        }
+        found = {
+            raw["_id"]: raw.get(db_field) if db_field else None
+            for raw in collection.find(
+                {"_id": {"$in": list(expected)}}, [db_field] if db_field else []
+            )
+        }
+        return {
+            index
+            for pk, (index, version) in expected.items()
+            if pk not in found or found[pk] != version
+        }
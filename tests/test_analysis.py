@@ -0,0 +1,137 @@
+from types import SimpleNamespace
+
+import pytest
+from bson import ObjectId
+
+from flask_mongoengine.analysis import (
+    command_fingerprint,
+    find_query_origin,
+    find_repeated_queries,
+)
+
+pytest_plugins = ["pytester"]
+
+
+def test_command_fingerprint__should_ignore_literal_values_and_driver_keys():
+    first = {
+        "find": "user",
+        "filter": {"_id": ObjectId(), "age": {"$in": [1, 2, 3]}},
+        "limit": 1,
+        "lsid": {"id": 1},
+        "$db": "app",
+    }
+    second = {
+        "find": "user",
+        "filter": {"_id": ObjectId(), "age": {"$in": [4]}},
+        "limit": 1,
+        "$db": "app",
+    }
+
+    assert command_fingerprint("app", "find", first) == command_fingerprint(
+        "app", "find", second
+    )
+    assert command_fingerprint("app", "find", first) == (
+        'app.user find {"filter": {"_id": "?", "age": {"$in": ["?"]}}, "limit": "?"}'
+    )
+
+
+def test_command_fingerprint__should_differ__if_query_shape_differs():
+    by_id = {"find": "user", "filter": {"_id": 1}}
+    by_name = {"find": "user", "filter": {"name": "a"}}
+
+    assert command_fingerprint("app", "find", by_id) != command_fingerprint(
+        "app", "find", by_name
+    )
+
+
+@pytest.mark.parametrize(
+    "first, second",
+    [
+        (
+            {"aggregate": "user", "pipeline": [{"$match": {"a": 1}}, {"$count": "n"}]},
+            {
+                "aggregate": "user",
+                "pipeline": [
+                    {"$match": {"a": 2}},
+                    {"$lookup": {"from": "post", "as": "posts"}},
+                    {"$unwind": "$posts"},
+                ],
+            },
+        ),
+        (
+            {"find": "user", "filter": {"$or": [{"a": 1}, {"b": 1}]}},
+            {"find": "user", "filter": {"$or": [{"a": 1}, {"zzz": 1}]}},
+        ),
+    ],
+)
+def test_command_fingerprint__should_differ__if_documents_list_differs(first, second):
+    command_name = next(iter(first))
+
+    assert command_fingerprint("app", command_name, first) != command_fingerprint(
+        "app", command_name, second
+    )
+
+
+def test_command_fingerprint__should_match_inserts_of_any_size():
+    one = {"insert": "user", "documents": [{"_id": 1, "name": "a"}]}
+    many = {"insert": "user", "documents": [{"_id": i, "name": "a"} for i in range(3)]}
+
+    assert command_fingerprint("app", "insert", one) == command_fingerprint(
+        "app", "insert", many
+    )
+
+
+def test_find_query_origin__should_return_caller_line():
+    origin = find_query_origin(skip=1)
+
+    assert origin.startswith(f"{__file__}:")
+    assert origin.endswith("in test_find_query_origin__should_return_caller_line")
+
+
+def test_find_repeated_queries__should_group_by_fingerprint_above_threshold():
+    queries = [
+        SimpleNamespace(fingerprint="a", time=1, origin="views.py:1 in index"),
+        SimpleNamespace(fingerprint="a", time=2, origin="views.py:1 in index"),
+        SimpleNamespace(fingerprint="a", time=3, origin=None),
+        SimpleNamespace(fingerprint="b", time=1, origin=None),
+    ]
+
+    repeated = find_repeated_queries(queries, threshold=2)
+
+    assert len(repeated) == 1
+    assert repeated[0].fingerprint == "a"
+    assert repeated[0].count == 3
+    assert repeated[0].total_time == 6
+    assert repeated[0].origin == "views.py:1 in index"
+
+
+@pytest.mark.parametrize(("queries_count", "outcome"), [(2, "passed"), (3, "failed")])
+def test_pytest_plugin__should_fail_test__if_repeated_queries_detected(
+    pytester, queries_count, outcome
+):
+    pytester.makeconftest('pytest_plugins = ["flask_mongoengine.pytest_plugin"]')
+    pytester.makepyfile(
+        f"""
+        from types import SimpleNamespace
+
+        from flask_mongoengine.pytest_plugin import repeated_queries_logger
+
+        def test_queries():
+            for index in range({queries_count}):
+                event = SimpleNamespace(
+                    request_id=index,
+                    operation_id=index,
+                    command={{"find": "user", "filter": {{"_id": index}}}},
+                    database_name="app",
+                    command_name="find",
+                    duration_micros=1,
+                    reply={{"ok": 1}},
+                )
+                repeated_queries_logger.started(event)
+                repeated_queries_logger.succeeded(event)
+        """
+    )
+
+    result = pytester.runpytest("--mongo-repeated-query-threshold=3")
+
+    result.assert_outcomes(**{outcome: 1})
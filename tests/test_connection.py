@@ -8,6 +8,12 @@ from pymongo.mongo_client import MongoClient
 from pymongo.read_preferences import ReadPreference
 
 from flask_mongoengine import MongoEngine, current_mongoengine_instance
+from flask_mongoengine.connection import (
+    _sanitize_settings,
+    get_connection_settings,
+    get_effective_settings,
+    verify_connections,
+)
 
 
 def is_mongo_mock_installed() -> bool:
@@ -314,3 +320,97 @@ def test_connection_kwargs(app):
 
     assert db.connection["tz_aware_true"].codec_options.tz_aware
     assert db.connection["tz_aware_true"].read_preference == ReadPreference.SECONDARY
+
+
+def test_init_app__should_create_indexes__if_verify_requested(app):
+    """Make sure indexes created on startup, not on first collection access."""
+    db = MongoEngine()
+    app.config["MONGODB_SETTINGS"] = {
+        "ALIAS": "default",
+        "DB": "flask_mongoengine_test_db",
+    }
+
+    class Indexed(db.Document):
+        title = db.StringField()
+        meta = {"indexes": ["title"]}
+
+    db.init_app(app, verify=True)
+
+    assert "title_1" in Indexed._get_collection().index_information()
+    Indexed.drop_collection()
+
+
+def test_verify_connections__should_report_ping_and_indexes_per_alias(app):
+    db = MongoEngine()
+    app.config["MONGODB_SETTINGS"] = [
+        {"ALIAS": "default", "DB": "flask_mongoengine_test_db_1"},
+        {"ALIAS": "alternative", "DB": "flask_mongoengine_test_db_2"},
+    ]
+
+    class Todo(db.Document):
+        title = db.StringField()
+        meta = {"db_alias": "alternative"}
+
+    db.init_app(app)
+    report = verify_connections(db.connection)
+
+    assert set(report) == {"default", "alternative"}
+    assert report["default"]["ping"] >= 0
+    assert "Todo" in report["alternative"]["indexes"]
+    assert "Todo" not in report["default"]["indexes"]
+    Todo.drop_collection()
+
+
+def test_sanitize_settings__should_strip_prefix_and_restore_camel_case():
+    settings = {
+        "MONGODB_ALIAS": "default",
+        "MAXPOOLSIZE": 10,
+        "mongodb_serverselectiontimeoutms": 100,
+        "unknownSetting": True,
+    }
+
+    assert _sanitize_settings(settings) == {
+        "alias": "default",
+        "maxPoolSize": 10,
+        "serverSelectionTimeoutMS": 100,
+        "unknownsetting": True,
+    }
+
+
+def test_get_effective_settings__should_apply_profile__without_overriding_explicit():
+    config = {
+        "MONGODB_PROFILE": "low_latency",
+        "MONGODB_SETTINGS": [
+            {"ALIAS": "default", "MAXPOOLSIZE": 5, "PASSWORD": "secret"},
+            {"ALIAS": "bulk", "PROFILE": "bulk", "host": "mongodb://h/?retryWrites=0"},
+        ],
+    }
+
+    settings = get_effective_settings(config)
+
+    assert settings["default"]["maxPoolSize"] == 5
+    assert settings["default"]["password"] == "***"
+    assert settings["default"]["serverSelectionTimeoutMS"] == 2000
+    assert "zlib" in settings["default"]["compressors"]
+    assert settings["bulk"]["maxPoolSize"] == 20
+    assert "retryWrites" not in settings["bulk"]
+    assert "profile" not in settings["bulk"]
+
+
+def test_create_connections__should_raise__if_profile_unknown(app):
+    app.config["MONGODB_SETTINGS"] = {"DB": "flask_mongoengine_test_db"}
+    app.config["MONGODB_PROFILE"] = "fastest"
+
+    with pytest.raises(ValueError) as error:
+        MongoEngine(app)
+
+    assert str(error.value).startswith("Unknown MONGODB_PROFILE 'fastest'.")
+
+
+def test_get_connection_settings__should_skip_budget__in_flat_configuration():
+    config = {"MONGODB_DB": "app", "MONGODB_REQUEST_BUDGET": {"ops": 10}}
+
+    with pytest.warns(DeprecationWarning):
+        settings = get_connection_settings(config)
+
+    assert settings == [{"db": "app"}]
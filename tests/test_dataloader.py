@@ -0,0 +1,64 @@
+import pytest
+
+from flask_mongoengine.dataloader import get_reference_loader
+
+
+@pytest.fixture()
+def models(app, db):
+    app.config["MONGODB_BATCH_REFERENCES"] = True
+
+    class Author(db.Document):
+        name = db.StringField()
+
+    class Editor(db.Document):
+        name = db.StringField()
+
+    class Post(db.Document):
+        author = db.ReferenceField(document_type=Author)
+        lazy_author = db.LazyReferenceField(document_type=Author)
+        reviewer = db.GenericReferenceField()
+
+    return Author, Editor, Post
+
+
+def test_get_reference_loader__should_return_none__if_disabled(app):
+    assert get_reference_loader() is None
+
+
+def test_references__should_be_loaded_with_one_query_per_collection(models):
+    author_model, editor_model, post_model = models
+    authors = [author_model(name=f"author {index}").save() for index in range(3)]
+    editor = editor_model(name="editor").save()
+    for index, author in enumerate(authors):
+        reviewer = editor if index % 2 else authors[0]
+        post_model(author=author, lazy_author=author, reviewer=reviewer).save()
+
+    posts = list(post_model.objects.order_by("id"))
+    reference_loader = get_reference_loader()
+    assert reference_loader.batches == 0
+
+    assert [post.author.name for post in posts] == [
+        "author 0",
+        "author 1",
+        "author 2",
+    ]
+    assert reference_loader.batches == 1
+    assert [post.lazy_author.fetch().name for post in posts] == [
+        "author 0",
+        "author 1",
+        "author 2",
+    ]
+    assert [post.reviewer.name for post in posts] == ["author 0", "editor", "author 0"]
+    # Authors batch already loaded, single batch for editors.
+    assert reference_loader.batches == 2
+
+
+def test_references__should_be_reloaded__after_target_collection_write(models):
+    author_model, _, post_model = models
+    author = author_model(name="first").save()
+    post_model(author=author).save()
+    post_model.objects.first()
+
+    author_model.objects(pk=author.pk).update(set__name="second")
+
+    assert post_model.objects.first().author.name == "second"
@@ -103,6 +103,28 @@ class TestWtfFormMixin:
             "method raised NotImplementedError."
         ) in caplog.messages
 
+    @pytest.mark.skipif(condition=wtforms_not_installed, reason="No WTF CI/CD chain")
+    def test__to_wtf_form__returns_cached_class_for_same_arguments(self, TempDocument):
+        form_class = TempDocument.to_wtf_form(
+            only=["field_two"], fields_kwargs={"field_two": {"label": "Two"}}
+        )
+
+        assert form_class is TempDocument.to_wtf_form(
+            only=["field_two"], fields_kwargs={"field_two": {"label": "Two"}}
+        )
+        assert form_class is not TempDocument.to_wtf_form(
+            only=["field_two"], fields_kwargs={"field_two": {"label": "Other"}}
+        )
+        assert form_class is not TempDocument.to_wtf_form()
+
+    @pytest.mark.skipif(condition=wtforms_not_installed, reason="No WTF CI/CD chain")
+    def test__clear_form_cache__drops_generated_classes(self, TempDocument):
+        form_class = TempDocument.to_wtf_form()
+
+        documents.clear_form_cache()
+
+        assert form_class is not TempDocument.to_wtf_form()
+
 
 class TestWtfFieldMixin:
     # noinspection PyAbstractClass
@@ -250,6 +272,34 @@ class TestWtfFieldMixin:
         field = db_fields.WtfFieldMixin(wtf_options=user_dict)
         assert field.wtf_field_options == expected_result
 
+    @pytest.mark.skipif(condition=wtforms_not_installed, reason="No WTF CI/CD chain")
+    def test__wtf_field_options__generated_once_and_returned_as_copy(
+        self, mocker: MockerFixture
+    ):
+        field = self.WTFieldBaseMRO(wtf_validators=[str])
+        generated_spy = mocker.spy(field, "_build_wtf_options_template")
+
+        first_call = field.wtf_field_options
+        first_call["validators"].append(list)
+        second_call = field.wtf_field_options
+
+        generated_spy.assert_called_once()
+        assert first_call is not second_call
+        assert len(second_call["validators"]) == 2
+
+    @pytest.mark.skipif(condition=wtforms_not_installed, reason="No WTF CI/CD chain")
+    def test__wtf_field_options__regenerated_after_field_settings_change(self):
+        field = self.WTFieldBaseMRO()
+        assert field.wtf_field_options["label"] == ""
+
+        field.name = "set by metaclass"
+        field.required = True
+
+        assert field.wtf_field_options["label"] == "set by metaclass"
+        assert isinstance(
+            field.wtf_field_options["validators"][-1], wtf_validators_.InputRequired
+        )
+
     @pytest.mark.skipif(condition=wtforms_not_installed, reason="No WTF CI/CD chain")
     def test__wtf_generated_options__correctly_retrieve_label_from_parent_class(self):
         """Test based on base class for all fields."""
@@ -4,7 +4,12 @@ Tests for ``MongoDebugPanel`` and related mongo events listener.
 - Independent of global configuration by design.
 """
 import contextlib
+import contextvars
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
 
+import bson
 import jinja2
 import pymongo
 import pytest
@@ -19,10 +24,20 @@ from pymongo import monitoring  # noqa
 from pymongo.errors import OperationFailure  # noqa
 from pytest_mock import MockerFixture  # noqa
 
+from flask_mongoengine.analysis import (  # noqa
+    command_fingerprint,
+    explain_command,
+    find_repeated_queries,
+)
+from flask_mongoengine.monitoring import CommandTracker  # noqa
 from flask_mongoengine.panels import (  # noqa
+    ExplainCache,
     MongoCommandLogger,
     MongoDebugPanel,
+    _collections_totals,
+    _explain_slow_queries,
     _maybe_patch_jinja_loader,
+    explain_cache,
     mongo_command_logger,
 )
 
@@ -133,6 +148,10 @@ class TestMongoDebugPanel:
     def test__context__is_empty_by_default(self, app, toolbar_with_no_flask):
         assert toolbar_with_no_flask._context == {
             "queries": [],
+            "collections": [],
+            "repeated_queries": [],
+            "explains": [],
+            "identity_map": None,
             "slow_query_limit": 100,
         }
 
@@ -146,12 +165,13 @@ class TestMongoDebugPanel:
         # Test setup
         initial_id = id(registered_monitoring)
         # Inject some fakes to monitoring engine
-        registered_monitoring.total_time = 1
-        registered_monitoring.started_operations_count = 1
-        registered_monitoring.succeeded_operations_count = 1
-        registered_monitoring.failed_operations_count = 1
-        registered_monitoring.queries = [1, 2]
-        registered_monitoring.started_events = {1: 1, 2: 2}
+        tracker = registered_monitoring.tracker
+        tracker.total_time = 1
+        tracker.started_operations_count = 1
+        tracker.succeeded_operations_count = 1
+        tracker.failed_operations_count = 1
+        tracker.queries.extend([1, 2])
+        tracker.started_events.update({1: 1, 2: 2})
 
         # Pre-test validation
         assert registered_monitoring.total_time == 1
@@ -185,6 +205,82 @@ class TestMongoDebugPanel:
         )
 
 
+def test__explain_cache__explains_pipelines_with_same_match_separately(
+    mocker: MockerFixture,
+):
+    mocker.patch.object(ExplainCache, "_find_client", return_value=object())
+    explain = mocker.patch.object(ExplainCache, "_explain")
+    cache = ExplainCache()
+    pipelines = [
+        [{"$match": {"author": 1}}, {"$count": "posts"}],
+        [{"$match": {"author": 2}}, {"$group": {"_id": "$tag"}}],
+    ]
+    queries = []
+    for pipeline in pipelines:
+        command = {"aggregate": "posts", "pipeline": pipeline}
+        queries.append(
+            SimpleNamespace(
+                command_name="aggregate",
+                server_command=command,
+                fingerprint=command_fingerprint("app", "aggregate", command),
+            )
+        )
+
+    futures = [cache.submit(query) for query in queries]
+    for future in futures:
+        future.result(timeout=5)
+
+    assert futures[0] is not futures[1]
+    assert explain.call_count == 2
+
+
+def test__command_tracker__counts_commands_of_concurrent_threads():
+    tracker = CommandTracker(max_queries=10)
+    threads_count, commands_count = 8, 10000
+
+    def run_commands(thread_index):
+        for index in range(commands_count):
+            key = thread_index * commands_count + index
+            tracker.add_started(
+                SimpleNamespace(request_id=key, operation_id=key, command={})
+            )
+            if index % 2:
+                # Lost final events, so oldest 'started' events are evicted.
+                continue
+            tracker.add_finished(
+                SimpleNamespace(request_id=key, operation_id=key, duration_micros=1),
+                True,
+            )
+            tracker.get_queries()
+
+    switch_interval = sys.getswitchinterval()
+    # Frequent threads switches, to make not locked updates race.
+    sys.setswitchinterval(1e-6)
+    try:
+        with ThreadPoolExecutor(max_workers=threads_count) as executor:
+            list(executor.map(run_commands, range(threads_count)))
+    finally:
+        sys.setswitchinterval(switch_interval)
+
+    total = threads_count * commands_count
+    assert tracker.started_operations_count == total
+    assert tracker.succeeded_operations_count == total // 2
+    assert tracker.total_time == total // 2
+    assert len(tracker.queries) == 10
+    assert len(tracker.started_events) <= 10
+
+
+def test__reset_tracker__keeps_fallback_tracker():
+    command_logger = MongoCommandLogger()
+    fallback_tracker = contextvars.Context().run(lambda: command_logger.tracker)
+    fallback_tracker.started_operations_count = 1
+
+    contextvars.Context().run(command_logger.reset_tracker)
+
+    assert contextvars.Context().run(lambda: command_logger.tracker) is fallback_tracker
+    assert fallback_tracker.started_operations_count == 1
+
+
 class TestMongoCommandLogger:
     """By design tested with raw pymongo."""
 
@@ -218,6 +314,82 @@ class TestMongoCommandLogger:
         assert registered_monitoring.queries[0].server_response == {"n": 1, "ok": 1.0}
         assert registered_monitoring.queries[0].request_status == "Succeed"
 
+    def test__query_size__calculated_from_bson_payload(
+        self, py_db, registered_monitoring
+    ):
+        py_db.posts.insert_many([{"text": "x" * 1024} for _ in range(4)])
+        registered_monitoring.reset_tracker()
+
+        list(py_db.posts.find())
+        query = registered_monitoring.queries[0]
+
+        assert query.command_name == "find"
+        assert query.size > 4
+        assert 0 < query.command_size < 1
+        assert query.response_bytes == len(bson.encode(query.server_response))
+
+    def test__collections_totals__summarize_queries_by_collection(
+        self, py_db, registered_monitoring
+    ):
+        py_db.posts.insert_one({"text": "x" * 1024})
+        py_db.posts.find_one()
+        py_db.tags.insert_one({"text": "tag"})
+
+        totals = _collections_totals(registered_monitoring.queries)
+
+        assert [total["collection"] for total in totals] == ["posts", "tags"]
+        assert totals[0]["count"] == 2
+        assert totals[0]["size"] == sum(
+            query.size
+            for query in registered_monitoring.queries
+            if query.collection == "posts"
+        )
+
+    def test__repeated_queries__detected_with_origin(
+        self, py_db, registered_monitoring
+    ):
+        ids = py_db.posts.insert_many([{"index": index} for index in range(3)])
+        registered_monitoring.reset_tracker()
+
+        for post_id in ids.inserted_ids:
+            py_db.posts.find_one({"_id": post_id})
+
+        repeated = find_repeated_queries(registered_monitoring.queries, 3)
+        assert len(repeated) == 1
+        assert repeated[0].count == 3
+        assert repeated[0].fingerprint.startswith("pymongo_test_database.posts find")
+        assert repeated[0].origin.startswith(__file__)
+
+    def test__explain_command__reports_collection_scan(self, py_db):
+        py_db.posts.insert_many([{"index": index} for index in range(10)])
+
+        summary = explain_command(
+            py_db.client, py_db.name, "find", {"find": "posts", "filter": {"index": 5}}
+        )
+
+        assert summary.is_collection_scan
+        assert summary.docs_examined == 10
+        assert summary.docs_returned == 1
+
+    def test__explain_slow_queries__explain_each_query_shape_once(
+        self, py_db, registered_monitoring, mocker: MockerFixture
+    ):
+        mocker.patch.object(ExplainCache, "_find_client", return_value=py_db.client)
+        explain = mocker.spy(ExplainCache, "_explain")
+        explain_cache.clear()
+        py_db.posts.insert_one({"index": 1})
+        registered_monitoring.reset_tracker()
+        py_db.posts.find_one({"index": 1})
+        py_db.posts.find_one({"index": 2})
+
+        explains = _explain_slow_queries(registered_monitoring.queries, -1, 5)
+        _explain_slow_queries(registered_monitoring.queries, -1, 5)
+
+        assert len(explains) == 1
+        assert explains[0]["summary"].is_collection_scan
+        assert explain.call_count == 1
+        explain_cache.clear()
+
     def test__failed_command_logged__logged(self, py_db, registered_monitoring):
         """Failed command index 1 in provided test."""
         pymongo.collection.Collection(py_db, "test", create=True)
@@ -247,3 +419,34 @@ class TestMongoCommandLogger:
             in registered_monitoring.queries[1].server_response["errmsg"]
         )
         assert registered_monitoring.queries[1].request_status == "Failed"
+
+    def test__queries__kept_in_bounded_buffer__when_limit_reached(self, py_db):
+        command_logger = MongoCommandLogger(max_queries=2)
+        monitoring.register(command_logger)
+        try:
+            command_logger.reset_tracker()
+            for index in range(3):
+                py_db.posts.insert_one({"index": index})
+        finally:
+            monitoring._LISTENERS.command_listeners.remove(command_logger)
+
+        assert command_logger.started_operations_count == 3
+        assert len(command_logger.queries) == 2
+        assert command_logger.tracker.dropped_events_count == 1
+        assert command_logger.queries[-1].server_command["documents"][0]["index"] == 2
+
+    def test__queries__isolated_between_threads(self, py_db, registered_monitoring):
+        def run_in_thread():
+            registered_monitoring.reset_tracker()
+            py_db.posts.insert_one({"thread": True})
+            py_db.posts.find_one({"thread": True})
+            return len(registered_monitoring.queries)
+
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            thread_queries_count = executor.submit(run_in_thread).result()
+
+        py_db.posts.insert_one({"thread": False})
+
+        assert thread_queries_count == 2
+        assert len(registered_monitoring.queries) == 1
+        assert registered_monitoring.queries[0].command_name == "insert"
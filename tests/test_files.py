@@ -0,0 +1,109 @@
+import gridfs
+import pytest
+
+from flask_mongoengine.files import GridFSFiles, file_url, send_gridfs_file
+
+CONTENT = b"0123456789" * 100
+
+
+@pytest.fixture()
+def Attachment(app, db):
+    class Attachment(db.Document):
+        file = db.FileField(collection_name="attachments")
+
+    attachment = Attachment()
+    attachment.file.put(CONTENT, filename="report.txt", content_type="text/plain")
+    attachment.save()
+
+    @app.route("/attachments/<pk>")
+    def download(pk):
+        return send_gridfs_file(Attachment.objects.get_or_404(pk=pk).file)
+
+    return Attachment
+
+
+@pytest.fixture()
+def attachment_url(Attachment):
+    return f"/attachments/{Attachment.objects.first().pk}"
+
+
+def test_send_gridfs_file__should_stream_whole_file(app, attachment_url):
+    response = app.test_client().get(attachment_url)
+
+    assert response.status_code == 200
+    assert response.data == CONTENT
+    assert response.mimetype == "text/plain"
+    assert response.content_length == len(CONTENT)
+    assert response.headers["Accept-Ranges"] == "bytes"
+    assert response.headers["ETag"]
+    assert response.last_modified is not None
+
+
+def test_send_gridfs_file__should_return_requested_range(app, attachment_url):
+    response = app.test_client().get(attachment_url, headers={"Range": "bytes=5-14"})
+
+    assert response.status_code == 206
+    assert response.data == CONTENT[5:15]
+    assert response.content_length == 10
+    assert response.headers["Content-Range"] == f"bytes 5-14/{len(CONTENT)}"
+
+
+def test_send_gridfs_file__should_seek_to_range_start_under_any_server(
+    app, attachment_url, mocker
+):
+    class ServerFileWrapper:
+        """Server file wrapper without seek support, like gunicorn one."""
+
+        def __init__(self, file, buffer_size=8192):
+            self.file = file
+            self.buffer_size = buffer_size
+
+        def __iter__(self):
+            return iter(lambda: self.file.read(self.buffer_size), b"")
+
+    seek_spy = mocker.spy(gridfs.GridOut, "seek")
+    response = app.test_client().get(
+        attachment_url,
+        headers={"Range": "bytes=900-909"},
+        environ_base={"wsgi.file_wrapper": ServerFileWrapper},
+    )
+
+    assert response.data == CONTENT[900:910]
+    assert seek_spy.call_args.args[1] == 900
+
+
+def test_send_gridfs_file__should_return_not_modified_for_matching_etag(
+    app, attachment_url
+):
+    client = app.test_client()
+    etag = client.get(attachment_url).headers["ETag"]
+
+    response = client.get(attachment_url, headers={"If-None-Match": etag})
+
+    assert response.status_code == 304
+    assert response.data == b""
+
+
+def test_send_gridfs_file__should_abort_for_empty_or_deleted_file(app, Attachment):
+    attachment = Attachment.objects.first()
+    attachment.file.delete()
+    attachment.save()
+
+    response = app.test_client().get(f"/attachments/{attachment.pk}")
+
+    assert response.status_code == 404
+
+
+def test_gridfs_files__should_serve_only_allowed_collections(app, Attachment):
+    GridFSFiles(app, collections=["attachments"])
+    attachment = Attachment.objects.first()
+    client = app.test_client()
+
+    with app.test_request_context():
+        url = file_url(attachment.file)
+
+    assert url == f"/_mongoengine/files/attachments/{attachment.file.grid_id}"
+    assert client.get(url).data == CONTENT
+    assert client.get(url.replace("attachments", "fs")).status_code == 404
+    assert client.get("/_mongoengine/files/attachments/invalid").status_code == 404
+    assert client.get(f"/_mongoengine/files/attachments/{'0' * 24}").status_code == 404
@@ -1,4 +1,5 @@
 """Integration tests for new WTForms generation in Flask-Mongoengine 2.0."""
+import io
 import json
 
 import pytest
@@ -419,3 +420,447 @@ class TestMongoURLField:
             wtf_fields.URLField,
             wtf_fields.StringField,
         ]
+
+
+class TestQuerySetSelectField:
+    @pytest.fixture()
+    def Dog(self, db):
+        class Dog(db.Document):
+            name = db.StringField()
+            profile = db.StringField()
+
+        return Dog
+
+    def test_choices_loaded_with_projection_for_label_attr(
+        self, local_app, Dog, mocker
+    ):
+        dogs = [Dog(name=name, profile="x" * 1000).save() for name in ["fido", "rex"]]
+        mocker.patch.object(Dog, "_from_son", side_effect=AssertionError)
+
+        class DogForm(wtforms.Form):
+            dog = mongo_fields.QuerySetSelectField(
+                queryset=Dog.objects, label_attr="name"
+            )
+
+        form = DogForm(dog=dogs[1])
+
+        assert list(form.dog.iter_choices()) == [
+            (dogs[0].pk, "fido", False),
+            (dogs[1].pk, "rex", True),
+        ]
+
+    def test_projected_choices_use_document_as_empty_label(self, local_app, db):
+        class Cat(db.Document):
+            name = db.StringField()
+
+            def __str__(self):
+                return "unnamed cat"
+
+        tom = Cat(name="tom").save()
+        unnamed = Cat(name="").save()
+
+        class CatForm(wtforms.Form):
+            cat = mongo_fields.QuerySetSelectField(
+                queryset=Cat.objects, label_attr="name"
+            )
+
+        choices = [(pk, str(label)) for pk, label, _ in CatForm().cat.iter_choices()]
+
+        assert choices == [(tom.pk, "tom"), (unnamed.pk, "unnamed cat")]
+
+    def test_choices_cached_until_collection_write(self, local_app, Dog):
+        fido = Dog(name="fido").save()
+
+        class DogForm(wtforms.Form):
+            dog = mongo_fields.QuerySetSelectField(
+                queryset=Dog.objects, label_attr="name", cache_timeout=60
+            )
+
+        assert [label for _, label, _ in DogForm().dog.iter_choices()] == ["fido"]
+        Dog._get_collection().update_one({"_id": fido.pk}, {"$set": {"name": "raw"}})
+        assert [label for _, label, _ in DogForm().dog.iter_choices()] == ["fido"]
+
+        Dog(name="rex").save()
+        assert [label for _, label, _ in DogForm().dog.iter_choices()] == [
+            "raw",
+            "rex",
+        ]
+
+    def test_choices_loaded_as_documents_with_label_modifier(self, local_app, Dog):
+        fido = Dog(name="fido").save()
+
+        class DogForm(wtforms.Form):
+            dog = mongo_fields.QuerySetSelectField(
+                queryset=Dog.objects, label_modifier=lambda dog: dog.name.upper()
+            )
+
+        assert list(DogForm(dog=fido).dog.iter_choices()) == [(fido.pk, "FIDO", True)]
+
+    @pytest.mark.parametrize("projection", [False, True])
+    def test_model_form_loads_references_with_single_query(
+        self, local_app, Dog, mocker, projection
+    ):
+        from flask_mongoengine.wtf.models import ModelForm
+
+        fido = Dog(name="fido", profile="long").save()
+        rex = Dog(name="rex", profile="long").save()
+
+        class DogsForm(ModelForm):
+            first = mongo_fields.QuerySetSelectField(
+                queryset=Dog.objects, label_attr="name"
+            )
+            others = mongo_fields.QuerySetSelectMultipleField(queryset=Dog.objects)
+
+        if projection:
+            DogsForm.references_projection = True
+
+        form = DogsForm(
+            MultiDict({"first": str(fido.pk), "others": [str(rex.pk), "malformed"]})
+        )
+        find_spy = mocker.spy(Dog._get_collection(), "find")
+
+        assert form.validate()
+        assert find_spy.call_count == 1
+        assert form.first.data == fido
+        assert form.first.data.name == "fido"
+        assert form.first.data.profile == (None if projection else "long")
+        assert form.others.data == [rex]
+
+    def test_plain_form_loads_references_on_data_access(self, local_app, Dog):
+        fido = Dog(name="fido").save()
+
+        class DogForm(wtforms.Form):
+            dog = mongo_fields.QuerySetSelectField(queryset=Dog.objects)
+
+        form = DogForm(MultiDict({"dog": str(fido.pk)}))
+
+        assert form.dog.pending_keys == [fido.pk]
+        assert form.dog.data == fido
+        assert form.dog.data.name == "fido"
+        assert form.dog.pending_keys is None
+
+
+class TestModelFormSave:
+    @pytest.fixture()
+    def Article(self, db):
+        class Article(db.Document):
+            title = db.StringField()
+            summary = db.StringField()
+            lines = db.ListField(field=db.StringField())
+            version = db.IntField(default=0)
+
+        return Article
+
+    @pytest.fixture()
+    def ArticleForm(self, Article):
+        from flask_mongoengine.wtf.models import ModelForm
+
+        return Article.to_wtf_form(base_class=ModelForm, only=["title", "summary"])
+
+    @pytest.fixture()
+    def PartialForm(self, ArticleForm):
+        class PartialForm(ArticleForm):
+            partial_update = True
+
+        return PartialForm
+
+    def test_save_uses_document_save_by_default(
+        self, local_app, Article, ArticleForm, mocker
+    ):
+        article = Article(title="old").save()
+        save_spy = mocker.spy(Article, "save")
+
+        ArticleForm(MultiDict({"title": "new"}), obj=article).save(clean=False)
+
+        assert save_spy.call_args.kwargs == {"clean": False}
+        assert Article.objects.get(pk=article.pk).title == "new"
+
+    def test_save_updates_only_changed_fields(
+        self, local_app, Article, PartialForm, mocker
+    ):
+        article = Article(title="old", summary="text", lines=["x"] * 100).save()
+        article = Article.objects.get(pk=article.pk)
+        # Write concern context creates new collection instance, class spied.
+        update_spy = mocker.spy(type(Article._get_collection()), "update_one")
+
+        form = PartialForm(MultiDict({"title": "new", "summary": ""}), obj=article)
+        form.save()
+
+        update = update_spy.call_args.args[2]
+        assert update == {"$set": {"title": "new"}, "$unset": {"summary": ""}}
+        assert Article.objects.get(pk=article.pk).lines == ["x"] * 100
+        assert Article.objects.get(pk=article.pk).title == "new"
+
+    def test_save_skips_update_without_changes(
+        self, local_app, Article, PartialForm, mocker
+    ):
+        article = Article(title="old").save()
+        update_spy = mocker.spy(type(Article._get_collection()), "update_one")
+
+        PartialForm(MultiDict({"title": "old"}), obj=article).save()
+
+        update_spy.assert_not_called()
+
+    def test_partial_update_sends_save_signals(self, local_app, Article, PartialForm):
+        from mongoengine import signals
+
+        received = []
+
+        def receiver(sender, document, **kwargs):
+            received.append((document.title, kwargs))
+
+        article = Article(title="old").save()
+        with signals.pre_save.connected_to(receiver, sender=Article):
+            with signals.post_save.connected_to(receiver, sender=Article):
+                PartialForm(MultiDict({"title": "new"}), obj=article).save(
+                    signal_kwargs={"source": "form"}
+                )
+
+        assert received == [
+            ("new", {"source": "form"}),
+            ("new", {"created": False, "source": "form"}),
+        ]
+
+    def test_partial_update_rejects_not_supported_save_arguments(
+        self, local_app, Article, PartialForm
+    ):
+        article = Article(title="old").save()
+
+        with pytest.raises(TypeError, match="cascade, clean"):
+            PartialForm(MultiDict({"title": "new"}), obj=article).save(
+                clean=False, cascade=True
+            )
+        assert Article.objects.get(pk=article.pk).title == "old"
+
+    @pytest.mark.parametrize("partial_update", [False, True])
+    def test_save_checks_and_increments_version(
+        self, local_app, Article, ArticleForm, partial_update
+    ):
+        from flask_mongoengine.wtf.models import ConcurrentModificationError
+
+        class VersionedForm(ArticleForm):
+            version_field = "version"
+
+        VersionedForm.partial_update = partial_update
+
+        article = Article(title="old").save()
+        stale = Article.objects.get(pk=article.pk)
+
+        VersionedForm(MultiDict({"title": "first"}), obj=article).save()
+        assert article.version == 1
+        assert Article.objects.get(pk=article.pk).version == 1
+
+        with pytest.raises(ConcurrentModificationError):
+            VersionedForm(MultiDict({"title": "second"}), obj=stale).save()
+        assert Article.objects.get(pk=article.pk).title == "first"
+
+
+class TestModelFormUploads:
+    @pytest.fixture()
+    def Report(self, db):
+        class Report(db.Document):
+            title = db.StringField()
+            attachment = db.FileField()
+
+        return Report
+
+    @pytest.fixture()
+    def ReportForm(self, Report):
+        from flask_wtf.file import FileField
+
+        from flask_mongoengine.wtf.models import ModelForm
+
+        class ReportForm(Report.to_wtf_form(base_class=ModelForm, only=["title"])):
+            attachment = FileField()
+            upload_max_length = 1024 * 1024
+
+            def upload_progress(self, name, written, total):
+                self.progress.append((name, written, total))
+
+            progress = []
+
+        return ReportForm
+
+    @staticmethod
+    def upload(content, filename="report.csv"):
+        from werkzeug.datastructures import FileStorage
+
+        return FileStorage(
+            io.BytesIO(content), filename=filename, content_type="text/csv"
+        )
+
+    @staticmethod
+    def stored_files(Report):
+        import gridfs
+
+        return list(gridfs.GridFS(Report._get_db()).find({}))
+
+    def test_save_streams_upload_to_gridfs_by_chunks(
+        self, local_app, Report, ReportForm
+    ):
+        content = b"x" * (300 * 1024)
+        form = ReportForm(
+            MultiDict({"title": "Q1", "attachment": self.upload(content)})
+        )
+
+        report = Report.objects.get(pk=form.save().pk)
+
+        assert report.attachment.read() == content
+        assert report.attachment.filename == "report.csv"
+        assert report.attachment.get()._file["contentType"] == "text/csv"
+        assert [written for _, written, _ in form.progress] == [
+            255 * 1024,
+            300 * 1024,
+        ]
+
+    def test_save_rejects_too_large_upload_without_leftovers(
+        self, local_app, Report, ReportForm
+    ):
+        from flask_mongoengine.files import UploadTooLarge
+
+        content = b"x" * (1024 * 1024 + 1)
+        form = ReportForm(
+            MultiDict({"title": "Q1", "attachment": self.upload(content)})
+        )
+
+        with pytest.raises(UploadTooLarge):
+            form.save()
+
+        assert Report.objects.count() == 0
+        assert self.stored_files(Report) == []
+
+    def test_save_deletes_replaced_file(self, local_app, Report, ReportForm):
+        report = ReportForm(
+            MultiDict({"title": "Q1", "attachment": self.upload(b"old")})
+        ).save()
+        report = Report.objects.get(pk=report.pk)
+
+        ReportForm(
+            MultiDict({"title": "Q1", "attachment": self.upload(b"new")}), obj=report
+        ).save()
+
+        assert Report.objects.get(pk=report.pk).attachment.read() == b"new"
+        assert len(self.stored_files(Report)) == 1
+
+
+class TestModelFormSet:
+    @pytest.fixture()
+    def Task(self, db):
+        class Task(db.Document):
+            title = db.StringField(required=True)
+            notes = db.StringField()
+            version = db.IntField(default=0)
+
+        return Task
+
+    @pytest.fixture()
+    def TaskForm(self, Task):
+        from flask_mongoengine.wtf.models import ModelForm
+
+        base_class = Task.to_wtf_form(
+            base_class=ModelForm,
+            only=["title", "version"],
+            fields_kwargs={"version": {"wtf_field_class": wtforms.HiddenField}},
+        )
+
+        class TaskForm(base_class):
+            version_field = "version"
+
+        return TaskForm
+
+    def test_renders_rows_with_primary_keys(self, local_app, Task, TaskForm):
+        from flask_mongoengine.wtf.models import ModelFormSet
+
+        task = Task(title="first").save()
+
+        formset = ModelFormSet(TaskForm, instances=[task], extra=1)
+        first, empty = list(formset)
+
+        assert len(formset) == 2
+        assert first.title.name == "rows-0-title"
+        assert first.title.data == "first"
+        assert formset.hidden_pk(first) == (
+            f'<input type="hidden" name="rows-0-pk" value="{task.pk}">'
+        )
+        assert formset.hidden_pk(empty) == (
+            '<input type="hidden" name="rows-1-pk" value="">'
+        )
+
+    def test_saves_all_rows_with_single_bulk_write(
+        self, local_app, Task, TaskForm, mocker
+    ):
+        from flask_mongoengine.wtf.models import ModelFormSet
+
+        first = Task(title="first", notes="long").save()
+        second = Task(title="second").save()
+        find_spy = mocker.spy(Task._get_collection(), "find")
+        bulk_write_spy = mocker.spy(type(Task._get_collection()), "bulk_write")
+
+        formset = ModelFormSet(
+            TaskForm,
+            formdata=MultiDict(
+                {
+                    "rows-0-pk": str(first.pk),
+                    "rows-0-title": "first updated",
+                    "rows-0-version": "0",
+                    "rows-1-pk": str(second.pk),
+                    "rows-1-title": "second",
+                    "rows-1-version": "0",
+                    "rows-2-pk": "",
+                    "rows-2-title": "created",
+                }
+            ),
+        )
+
+        assert formset.validate()
+        assert formset.save() == {}
+        assert find_spy.call_count == 1
+        bulk_write_spy.assert_called_once()
+        assert len(bulk_write_spy.call_args.args[1]) == 2  # Second row not changed.
+        assert Task.objects.get(pk=first.pk).title == "first updated"
+        assert Task.objects.get(pk=first.pk).notes == "long"
+        assert Task.objects.get(pk=first.pk).version == 1
+        created = formset.forms[2].instance
+        assert Task.objects.get(pk=created.pk).title == "created"
+
+    def test_returns_rows_errors(self, local_app, Task, TaskForm):
+        from flask_mongoengine.wtf.models import ModelFormSet
+
+        first = Task(title="first").save()
+        second = Task(title="second").save()
+        formdata = MultiDict(
+            {
+                "rows-0-pk": str(first.pk),
+                "rows-0-title": "first updated",
+                "rows-0-version": "0",
+                "rows-1-pk": str(second.pk),
+                "rows-1-title": "second updated",
+                "rows-1-version": "0",
+            }
+        )
+
+        invalid = ModelFormSet(
+            TaskForm, formdata=MultiDict({**formdata, "rows-1-title": ""})
+        )
+        assert not invalid.validate()
+        assert list(invalid.errors) == [1]
+
+        # Second task changed after form render.
+        Task.objects(pk=second.pk).update(inc__version=1)
+        formset = ModelFormSet(TaskForm, formdata=formdata)
+        assert formset.validate()
+
+        assert list(formset.save()) == [1]
+        assert Task.objects.get(pk=first.pk).title == "first updated"
+        assert Task.objects.get(pk=second.pk).title == "second"
+
+    def test_rejects_not_found_documents(self, local_app, Task, TaskForm):
+        from flask_mongoengine.wtf.models import ModelFormSet
+
+        formset = ModelFormSet(
+            TaskForm,
+            formdata=MultiDict({"rows-0-pk": "malformed", "rows-0-title": "new"}),
+        )
+
+        assert not formset.validate()
+        assert formset.errors == {0: {"pk": ["Document not found."]}}
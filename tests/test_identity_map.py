@@ -0,0 +1,83 @@
+import pytest
+
+from flask_mongoengine.identity_map import get_identity_map
+
+
+@pytest.fixture()
+def identity_app(app):
+    app.config["MONGODB_IDENTITY_MAP"] = True
+    return app
+
+
+@pytest.fixture()
+def author_model(identity_app, db):
+    class Author(db.Document):
+        name = db.StringField()
+
+    class Post(db.Document):
+        title = db.StringField()
+        author = db.ReferenceField(document_type=Author)
+        lazy_author = db.LazyReferenceField(document_type=Author)
+        any_author = db.GenericReferenceField()
+
+    Author.Post = Post
+    return Author
+
+
+def test_get_identity_map__should_return_none__if_disabled(app):
+    assert get_identity_map() is None
+
+
+def test_get__should_return_same_document__for_repeated_pk_lookups(author_model):
+    author = author_model(name="first").save()
+
+    first = author_model.objects.get(pk=author.pk)
+    second = author_model.objects.get(id=str(author.pk))
+    third = author_model.objects.get_or_404(pk=author.pk)
+
+    assert first is second is third
+    identity_map = get_identity_map()
+    assert identity_map.hits == 2
+    assert identity_map.misses == 1
+
+
+def test_get__should_hit_database__for_filtered_querysets(author_model):
+    author = author_model(name="first").save()
+    author_model.objects.get(pk=author.pk)
+
+    filtered = author_model.objects(name="first").get(pk=author.pk)
+    projected = author_model.objects.only("id").get(pk=author.pk)
+
+    assert filtered is not author_model.objects.get(pk=author.pk)
+    assert projected.name is None
+
+
+def test_references__should_be_served_from_identity_map(author_model):
+    author = author_model(name="first").save()
+    author_model.Post(
+        title="post", author=author, lazy_author=author, any_author=author
+    ).save()
+    cached = author_model.objects.get(pk=author.pk)
+
+    post = author_model.Post.objects.first()
+
+    assert post.author is cached
+    assert post.lazy_author.fetch() is cached
+    assert post.any_author is cached
+
+
+def test_identity_map__should_be_invalidated__on_writes(author_model):
+    author = author_model(name="first").save()
+    cached = author_model.objects.get(pk=author.pk)
+
+    author_model.objects(pk=author.pk).update(set__name="second")
+    updated = author_model.objects.get(pk=author.pk)
+    assert updated is not cached
+    assert updated.name == "second"
+
+    updated.save()
+    assert get_identity_map().documents == {}
+
+    author_model.objects.get(pk=author.pk).delete()
+    with pytest.raises(author_model.DoesNotExist):
+        author_model.objects.get(pk=author.pk)
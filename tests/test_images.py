@@ -0,0 +1,105 @@
+import io
+from datetime import datetime
+
+import pytest
+from pymongo.errors import OperationFailure
+
+Image = pytest.importorskip("PIL.Image")
+from flask_mongoengine.images import ImageDerivatives  # noqa
+
+
+def make_image(width, height, image_format="PNG"):
+    buffer = io.BytesIO()
+    Image.new("RGB", (width, height), "red").save(buffer, format=image_format)
+    buffer.seek(0)
+    return buffer
+
+
+@pytest.fixture()
+def Photo(db):
+    class Photo(db.Document):
+        image = db.ImageField(collection_name="images")
+
+    for width, height in [(400, 200), (100, 300)]:
+        photo = Photo()
+        photo.image.put(make_image(width, height))
+        photo.save()
+    return Photo
+
+
+@pytest.fixture()
+def images(app, db):
+    return ImageDerivatives(app, sizes={"thumb": (50, 50)}, collections=["images"])
+
+
+def test_images__should_generate_derivative_once_and_stream_it(app, Photo, images):
+    photo = Photo.objects.first()
+    client = app.test_client()
+    with app.test_request_context():
+        url = images.url(photo.image, "thumb")
+
+    first = client.get(url)
+    second = client.get(url)
+
+    assert first.status_code == second.status_code == 200
+    assert first.mimetype == "image/png"
+    assert first.data == second.data
+    assert Image.open(io.BytesIO(first.data)).size == (50, 25)
+    assert len(list(images.fs.find({}))) == 1
+
+
+def test_images__should_not_serve_unknown_sizes_and_collections(app, Photo, images):
+    grid_id = Photo.objects.first().image.grid_id
+    client = app.test_client()
+
+    assert client.get(f"/_mongoengine/images/images/{grid_id}/big").status_code == 404
+    assert client.get(f"/_mongoengine/images/fs/{grid_id}/thumb").status_code == 404
+    assert client.get("/_mongoengine/images/images/invalid/thumb").status_code == 404
+    assert (
+        client.get(f"/_mongoengine/images/images/{'0' * 24}/thumb").status_code == 404
+    )
+
+
+def test_images__should_evict_least_recently_used_derivatives(app, Photo, images):
+    first, second = Photo.objects.order_by("id")
+    images.max_bytes = 1
+
+    with app.test_request_context():
+        images.send(first.image, "thumb")
+        # Recently accessed derivatives may be streamed now, they are kept.
+        assert len(list(images.fs.find({}))) == 1
+        images._files().update_many(
+            {}, {"$set": {"metadata.accessed": datetime(2000, 1, 1)}}
+        )
+        images.send(second.image, "thumb")
+
+    stored = list(images.fs.find({}))
+    assert [file.metadata["source"] for file in stored] == [second.image.grid_id]
+    assert "metadata.accessed_1" in images._files().index_information()
+
+
+def test_images__should_serve_derivative_on_eviction_failure(
+    app, Photo, images, mocker
+):
+    images.max_bytes = 1
+    mocker.patch.object(
+        images, "_evict", side_effect=OperationFailure("Sort exceeded memory limit")
+    )
+
+    grid_id = Photo.objects.first().image.grid_id
+    response = app.test_client().get(f"/_mongoengine/images/images/{grid_id}/thumb")
+
+    assert response.status_code == 200
+
+
+def test_images__warm_images_command__should_generate_missing_derivatives(
+    app, Photo, images
+):
+    runner = app.test_cli_runner()
+
+    first = runner.invoke(args=["mongoengine", "warm-images", "Photo", "image"])
+    second = runner.invoke(args=["mongoengine", "warm-images", "Photo", "image"])
+
+    assert first.output.strip() == "Generated 2 image derivatives."
+    assert second.output.strip() == "Generated 0 image derivatives."
+    assert len(list(images.fs.find({}))) == 2
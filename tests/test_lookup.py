@@ -0,0 +1,90 @@
+import pytest
+from werkzeug.datastructures import MultiDict
+
+from flask_mongoengine.lookup import ChoicesLookup
+
+wtforms = pytest.importorskip("wtforms")
+from flask_mongoengine.wtf import fields as mongo_fields  # noqa
+
+
+@pytest.fixture()
+def User(db):
+    class User(db.Document):
+        username = db.StringField()
+        active = db.BooleanField(default=True)
+
+    for name in ["alice", "bob", "bobby", "boris", "carol"]:
+        User(username=name).save()
+    User(username="bogdan", active=False).save()
+    return User
+
+
+@pytest.fixture()
+def lookup(app, User):
+    lookup = ChoicesLookup(app)
+    lookup.register(
+        "users", lambda: User.objects(active=True), label_attr="username", per_page=2
+    )
+    return lookup
+
+
+def test_lookup__should_return_prefix_matches_page(app, User, lookup):
+    client = app.test_client()
+
+    first_page = client.get("/_mongoengine/lookup/users?q=bo").get_json()
+    second_page = client.get("/_mongoengine/lookup/users?q=bo&page=2").get_json()
+
+    assert [row["text"] for row in first_page["results"]] == ["bob", "bobby"]
+    assert first_page["pagination"] == {"more": True}
+    assert second_page["results"] == [
+        {"id": str(User.objects.get(username="boris").pk), "text": "boris"}
+    ]
+    assert second_page["pagination"] == {"more": False}
+
+
+def test_lookup__should_not_expose_not_registered_querysets(app, lookup):
+    assert app.test_client().get("/_mongoengine/lookup/other").status_code == 404
+
+
+def test_lookup__register__should_reject_duplicated_name(User, lookup):
+    with pytest.raises(ValueError, match="already registered"):
+        lookup.register("users", User.objects, label_attr="username")
+
+
+class TestRemoteQuerySetSelectField:
+    @pytest.fixture()
+    def form_class(self, User):
+        class UserForm(wtforms.Form):
+            user = mongo_fields.QuerySetSelectField(
+                queryset=User.objects, label_attr="username", remote="users"
+            )
+            users = mongo_fields.QuerySetSelectMultipleField(
+                queryset=User.objects, label_attr="username", remote="users"
+            )
+
+        return UserForm
+
+    def test_renders_only_selected_options(self, app, User, lookup, form_class, mocker):
+        bob = User.objects.get(username="bob")
+        with app.test_request_context("/"):
+            form = form_class(user=bob, users=[bob])
+            form.user.widget = mocker.Mock()
+
+            form.user()
+
+        form.user.widget.assert_called_once_with(
+            form.user, **{"data-remote-url": "/_mongoengine/lookup/users"}
+        )
+        assert list(form.user.iter_choices()) == [(bob.pk, "bob", True)]
+        assert list(form.users.iter_choices()) == [(bob.pk, "bob", True)]
+
+    def test_validates_submitted_ids(self, app, User, lookup, form_class):
+        bob = User.objects.get(username="bob")
+        with app.test_request_context("/"):
+            valid = form_class(MultiDict({"user": str(bob.pk), "users": str(bob.pk)}))
+            malformed = form_class(MultiDict({"user": "bad", "users": "bad"}))
+
+            assert valid.validate()
+            assert valid.user.data == bob
+            assert valid.users.data == [bob]
+            assert not malformed.validate()
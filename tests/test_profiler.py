@@ -0,0 +1,162 @@
+import json
+import logging
+import threading
+from types import SimpleNamespace
+
+import pytest
+from pymongo import monitoring
+
+from flask_mongoengine.profiler import EndpointStats, LatencyHistogram, MongoProfiler
+
+
+def emit_find(listener, index: int, duration_micros: int = 1000):
+    """Send fake 'find' command monitoring events to listener."""
+    listener.started(
+        SimpleNamespace(
+            request_id=index,
+            operation_id=index,
+            database_name="app",
+            command_name="find",
+            command={"find": "todo", "filter": {"_id": index}},
+        )
+    )
+    listener.succeeded(
+        SimpleNamespace(
+            request_id=index, operation_id=index, duration_micros=duration_micros
+        )
+    )
+
+
+@pytest.fixture()
+def profiled_app(app):
+    app.config["MONGO_PROFILER_SAMPLE_RATE"] = 1
+    app.config["MONGO_PROFILER_DUMP_INTERVAL"] = 3600
+    profiler = MongoProfiler(app)
+
+    @app.route("/todos")
+    def todos():
+        for index in range(3):
+            emit_find(profiler.listener, index)
+        return "ok"
+
+    return app
+
+
+def test_latency_histogram__should_return_percentiles_with_bounded_error():
+    histogram = LatencyHistogram()
+    for value in range(1, 101):
+        histogram.add(value)
+
+    assert histogram.count == 100
+    assert histogram.percentile(50) == pytest.approx(50, rel=0.2)
+    assert histogram.percentile(99) == pytest.approx(99, rel=0.2)
+    assert histogram.percentile(50) <= histogram.percentile(95)
+
+
+def test_latency_histogram__should_return_none__if_empty():
+    assert LatencyHistogram().percentile(50) is None
+
+
+def test_profiler__should_aggregate_queries_per_endpoint(profiled_app):
+    client = profiled_app.test_client()
+    client.get("/todos")
+    client.get("/todos")
+
+    report = profiled_app.extensions["mongoengine_profiler"].report()
+    stats = report["endpoints"]["todos"]
+    assert stats["requests"] == 2
+    assert stats["queries"] == 6
+    assert stats["db_time_ms"] == pytest.approx(6)
+    [command] = stats["commands"].values()
+    assert command["count"] == 6
+    assert command["p50_ms"] == pytest.approx(1, rel=0.2)
+
+
+def test_profiler__should_skip_not_sampled_requests(profiled_app):
+    profiler = profiled_app.extensions["mongoengine_profiler"]
+    profiler.sample_rate = 0
+    profiled_app.test_client().get("/todos")
+
+    assert profiler.report()["endpoints"] == {}
+
+
+def test_profiler__should_group_extra_fingerprints_as_other(profiled_app):
+    profiler = profiled_app.extensions["mongoengine_profiler"]
+    profiler.max_fingerprints = 1
+
+    @profiled_app.route("/mixed")
+    def mixed():
+        emit_find(profiler.listener, 1)
+        profiler.listener.started(
+            SimpleNamespace(
+                request_id=2,
+                operation_id=2,
+                database_name="app",
+                command_name="count",
+                command={"count": "todo"},
+            )
+        )
+        profiler.listener.succeeded(
+            SimpleNamespace(request_id=2, operation_id=2, duration_micros=1000)
+        )
+        return "ok"
+
+    profiled_app.test_client().get("/mixed")
+
+    commands = profiler.report()["endpoints"]["mixed"]["commands"]
+    assert len(commands) == 2
+    assert commands["other"]["count"] == 1
+
+
+def test_profiler__should_register_single_listener(profiled_app):
+    profilers = [profiled_app.extensions["mongoengine_profiler"], MongoProfiler()]
+
+    # noinspection PyProtectedMember
+    listeners = monitoring._LISTENERS.command_listeners
+    assert profilers[0].listener is profilers[1].listener
+    assert listeners.count(profilers[0].listener) == 1
+
+
+def test_profiler__should_dump_to_json_file_and_reset(profiled_app, tmp_path):
+    profiler = profiled_app.extensions["mongoengine_profiler"]
+    profiler.dump_path = str(tmp_path / "profile-{pid}.json")
+    profiled_app.test_client().get("/todos")
+
+    profiler.dump()
+
+    [path] = tmp_path.iterdir()
+    report = json.loads(path.read_text())
+    assert report["endpoints"]["todos"]["queries"] == 3
+    assert profiler.report()["endpoints"] == {}
+
+
+def test_profiler__should_dump_to_log__when_interval_passed(profiled_app, caplog):
+    profiler = profiled_app.extensions["mongoengine_profiler"]
+    profiler.dump_interval = 0
+
+    with caplog.at_level(logging.INFO, logger="flask_mongoengine"):
+        profiled_app.test_client().get("/todos")
+
+    assert "Mongo profiler report" in caplog.text
+    assert '"todos"' in caplog.text
+
+
+def test_profiler__should_keep_requests_recorded_during_dump(profiled_app, monkeypatch):
+    profiler = profiled_app.extensions["mongoengine_profiler"]
+    client = profiled_app.test_client()
+    client.get("/todos")
+    to_dict = EndpointStats.to_dict
+    requests = [threading.Thread(target=client.get, args=("/todos",))]
+
+    def slow_to_dict(stats):
+        if requests:
+            request_thread = requests.pop()
+            request_thread.start()
+            request_thread.join(timeout=5)
+            assert not request_thread.is_alive()
+        return to_dict(stats)
+
+    monkeypatch.setattr(EndpointStats, "to_dict", slow_to_dict)
+    profiler.dump()
+
+    assert profiler.report()["endpoints"]["todos"]["requests"] == 1
@@ -0,0 +1,296 @@
+import time
+from decimal import Decimal
+
+import pytest
+from bson import ObjectId
+from werkzeug.exceptions import NotFound
+
+from flask_mongoengine.query_cache import LRUCache
+
+
+@pytest.fixture()
+def saved_todos(todo):
+    return [todo(title=f"todo {index}", text="text").save() for index in range(5)]
+
+
+def test_get_many__should_return_documents_in_input_order(todo, saved_todos):
+    ids = [saved_todos[3].pk, str(saved_todos[0].pk), saved_todos[3].pk]
+
+    result = todo.objects.get_many(ids)
+
+    assert [document.title for document in result] == ["todo 3", "todo 0", "todo 3"]
+
+
+def test_get_many__should_handle_missing_documents(todo, saved_todos):
+    saved_todos[1].delete()
+    ids = [saved_todos[0].pk, saved_todos[1].pk, saved_todos[2].pk]
+
+    skipped = todo.objects.get_many(ids)
+    with_none = todo.objects.get_many(ids, missing="none")
+
+    assert [document.title for document in skipped] == ["todo 0", "todo 2"]
+    assert with_none[1] is None
+    assert with_none[2].title == "todo 2"
+    with pytest.raises(NotFound):
+        todo.objects.get_many(ids, missing="404")
+
+
+def test_get_many__should_split_ids_to_chunks_and_apply_projection(todo, saved_todos):
+    ids = [document.pk for document in reversed(saved_todos)]
+
+    result = todo.objects.only("title").get_many(ids, chunk_size=2, max_workers=2)
+
+    assert [document.title for document in result] == [
+        f"todo {index}" for index in reversed(range(5))
+    ]
+    assert all(document.text is None for document in result)
+
+
+def test_get_many__should_raise__if_missing_handling_unknown(todo):
+    with pytest.raises(ValueError) as error:
+        todo.objects.get_many([], missing="ignore")
+
+    assert str(error.value).startswith("Unknown missing documents handling 'ignore'.")
+
+
+def test_bulk_upsert__should_insert_and_update_by_key_fields(todo, saved_todos):
+    existing = todo(title="todo 1", text="updated")
+    new = todo(title="todo 9", text="new")
+
+    result = todo.objects.bulk_upsert(
+        [existing, new], key_fields=["title"], batch_size=1
+    )
+
+    assert result.matched_count == 1
+    assert result.upserted_count == 1
+    assert new.pk is not None
+    assert todo.objects.get(title="todo 1").text == "updated"
+    assert todo.objects.get(pk=new.pk).text == "new"
+    assert todo.objects.count() == 6
+
+
+def test_bulk_upsert__should_replace_documents_by_pk(todo, saved_todos):
+    saved_todos[0].text = "replaced"
+    new = todo(pk=ObjectId(), title="new")
+
+    result = todo.objects.bulk_upsert(
+        [saved_todos[0], new], key_fields=["pk"], max_workers=2, batch_size=1
+    )
+
+    assert result.upserted_ids == {1: new.pk}
+    assert todo.objects.get(pk=saved_todos[0].pk).text == "replaced"
+    assert todo.objects.get(pk=new.pk).title == "new"
+
+
+@pytest.mark.parametrize("key_fields", [["pk"], ["id", "title"]])
+def test_bulk_upsert__should_raise__if_pk_key_of_document_missing(
+    todo, saved_todos, key_fields
+):
+    with pytest.raises(ValueError, match="requires documents values"):
+        todo.objects.bulk_upsert([todo(title="todo 0")], key_fields=key_fields)
+
+    assert todo.objects(pk=None).count() == 0
+
+
+def test_bulk_upsert__should_raise__if_key_field_of_document_missing(todo, saved_todos):
+    todo.objects(title="todo 0").update(unset__text=True)
+
+    with pytest.raises(ValueError, match=r"\['text'\]"):
+        todo.objects.bulk_upsert(
+            [todo(title="new")], key_fields=["text"], validate=False
+        )
+
+    assert todo.objects.get(pk=saved_todos[0].pk).title == "todo 0"
+    assert todo.objects.count() == 5
+
+
+def test_bulk_update__should_set_and_unset_selected_fields(todo, saved_todos):
+    for document in saved_todos:
+        document.title = f"new {document.title}"
+        document.text = None
+        document.done = True
+
+    result = todo.objects.bulk_update(saved_todos, fields=["title", "text"])
+
+    assert result.modified_count == 5
+    updated = todo.objects.get(pk=saved_todos[0].pk)
+    assert updated.title == "new todo 0"
+    assert updated.text is None
+    assert updated.done is False
+
+
+def test_bulk_update__should_raise__if_field_unknown(todo, saved_todos):
+    with pytest.raises(ValueError) as error:
+        todo.objects.bulk_update(saved_todos, fields=["unknown"])
+
+    assert str(error.value) == "Unknown field 'unknown' of document Todo"
+
+
+def test_values__should_return_plain_dicts_with_requested_fields(todo, saved_todos):
+    result = todo.objects(title__in=["todo 1", "todo 2"]).order_by("title")
+
+    values = result.values("pk", "title")
+
+    assert values == [
+        {"pk": saved_todos[1].pk, "title": "todo 1"},
+        {"pk": saved_todos[2].pk, "title": "todo 2"},
+    ]
+
+
+def test_raw_values_list__should_return_tuples_or_flat_values(todo, saved_todos):
+    ordered = todo.objects.order_by("title")
+
+    assert ordered.raw_values_list("title", "done")[0] == ("todo 0", False)
+    assert ordered.raw_values_list("title") == [f"todo {index}" for index in range(5)]
+    assert ordered.raw_values_list("title", flat=False)[0] == ("todo 0",)
+    with pytest.raises(ValueError):
+        ordered.raw_values_list("title", "done", flat=True)
+
+
+def test_values_list__should_keep_mongoengine_behaviour(db):
+    class Author(db.Document):
+        name = db.StringField()
+
+    class Book(db.Document):
+        author = db.ReferenceField(document_type=Author)
+
+    author = Author(name="author").save()
+    Book(author=author).save()
+
+    assert [book_author.pk for book_author in Book.objects.values_list("author")] == [
+        author.pk
+    ]
+    assert Book.objects.raw_values_list("author") == [author.pk]
+
+
+def test_raw_values_list__should_map_paths_through_lists(db):
+    class Item(db.EmbeddedDocument):
+        name = db.StringField()
+        price = db.DecimalField(precision=2)
+
+    class Order(db.Document):
+        items = db.EmbeddedDocumentListField(document_type=Item)
+
+    Order(
+        items=[Item(name="a", price=Decimal("1.50")), Item(price=Decimal("2"))]
+    ).save()
+    Order(items=[]).save()
+
+    assert Order.objects.order_by("id").raw_values_list("items.name") == [["a"], []]
+    assert Order.objects.order_by("id").values("items.price") == [
+        {"items.price": [Decimal("1.50"), Decimal("2.00")]},
+        {"items.price": []},
+    ]
+
+
+def test_values__should_convert_stored_values_of_special_fields(db):
+    class Product(db.Document):
+        price = db.DecimalField(precision=2)
+        name = db.StringField()
+
+    Product(price=Decimal("10.50"), name="product").save()
+
+    assert Product.objects.raw_values_list("price") == [Decimal("10.50")]
+    assert Product.objects.values("name", "price") == [
+        {"name": "product", "price": Decimal("10.50")}
+    ]
+
+
+def test_cache__should_serve_results_from_backend_until_collection_write(
+    app, todo, saved_todos
+):
+    app.config["MONGODB_QUERY_CACHE"] = LRUCache()
+    cached = todo.objects(done=False).order_by("title").only("title").cache()
+
+    assert [document.title for document in cached][:2] == ["todo 0", "todo 1"]
+    todo.objects.filter(title="todo 0").as_pymongo()._collection.update_one(
+        {"title": "todo 0"}, {"$set": {"title": "raw update"}}
+    )
+    # Raw pymongo writes are not tracked, cached results returned.
+    same_query = todo.objects(done=False).order_by("title").only("title").cache()
+    assert list(same_query)[0].title == "todo 0"
+
+    saved_todos[1].title = "saved"
+    saved_todos[1].save()
+
+    titles = [document.title for document in cached.clone()]
+    assert "saved" in titles
+    assert "raw update" in titles
+
+
+def test_cache__should_drop_results_cached_during_write(app, todo, saved_todos, mocker):
+    app.config["MONGODB_QUERY_CACHE"] = LRUCache()
+    collection_class = type(todo._get_collection())
+    update_many = collection_class.update_many
+
+    def read_concurrently_and_update(collection, *args, **kwargs):
+        # Concurrent request caches results between invalidation and write.
+        list(todo.objects.order_by("title").cache())
+        return update_many(collection, *args, **kwargs)
+
+    mocker.patch.object(collection_class, "update_many", read_concurrently_and_update)
+    todo.objects(title="todo 0").update(set__title="updated")
+
+    titles = [document.title for document in todo.objects.order_by("title").cache()]
+    assert "updated" in titles
+
+
+def test_cache__should_load_only_indexed_and_sliced_documents(app, todo, saved_todos):
+    backend = app.config["MONGODB_QUERY_CACHE"] = LRUCache()
+    cached = todo.objects.order_by("title").cache()
+
+    assert cached.first().title == "todo 0"
+    assert cached[3].title == "todo 3"
+    assert bool(cached)
+    assert [document.title for document in cached[1:3]] == ["todo 1", "todo 2"]
+    with pytest.raises(IndexError):
+        cached[10]
+
+    results = [
+        value
+        for key, (value, _) in backend._data.items()
+        if key.startswith("flask_mongoengine:query:")
+    ]
+    assert results
+    assert max(len(documents) for documents in results) == 2
+
+
+def test_cache__should_execute_commands_on_database(app, todo, saved_todos, mocker):
+    backend = app.config["MONGODB_QUERY_CACHE"] = LRUCache()
+    cursor_class = type(todo.objects._cursor)
+    mocker.patch.object(cursor_class, "explain", return_value={"ok": 1}, create=True)
+    cached = todo.objects(done=False).cache()
+
+    assert cached.count() == 5
+    assert sorted(cached.distinct("title")) == [f"todo {i}" for i in range(5)]
+    assert cached.explain()
+    assert not backend._data
+    assert len(list(cached)) == 5
+    assert backend._data
+    assert cached.count() == 5
+    assert len(cached.distinct("title")) == 5
+    assert cached.explain()
+
+
+def test_cache__should_use_custom_key(app, todo, saved_todos):
+    app.config["MONGODB_QUERY_CACHE"] = LRUCache()
+
+    first = list(todo.objects(title="todo 0").cache(key="todos"))
+    second = list(todo.objects(title="todo 1").cache(key="todos"))
+
+    assert first[0].pk == second[0].pk
+
+
+def test_lru_cache__should_evict_least_recently_used_and_expired_keys(monkeypatch):
+    cache = LRUCache(max_size=2)
+    cache.set("a", 1)
+    cache.set("b", 2, timeout=10)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    cache.set("d", 4, timeout=10)
+    monkeypatch.setattr(time, "monotonic", lambda: float("inf"))
+    assert cache.get("d") is None
+    assert cache.get("a") == 1
@@ -0,0 +1,109 @@
+import logging
+import weakref
+from types import SimpleNamespace
+
+import pytest
+from pymongo import monitoring
+
+from flask_mongoengine.server_timing import MongoServerTiming, RequestBudgetExceeded
+
+
+def emit_commands(command_logger, count: int, duration_micros: int = 1000):
+    """Send fake monitoring events to command logger."""
+    for index in range(count):
+        command_logger.started(
+            SimpleNamespace(request_id=index, operation_id=index, command={})
+        )
+        command_logger.succeeded(
+            SimpleNamespace(
+                request_id=index,
+                operation_id=index,
+                duration_micros=duration_micros,
+                command_name="find",
+            )
+        )
+
+
+@pytest.fixture()
+def timed_app(app):
+    app.config["MONGODB_REQUEST_BUDGET"] = {"ops": 3, "ms": 200}
+    server_timing = MongoServerTiming(app)
+
+    @app.route("/ops/<int:count>")
+    def ops(count):
+        emit_commands(server_timing.command_logger, count)
+        return "ok"
+
+    return app
+
+
+def test_server_timing__should_add_header_with_ops_and_duration(timed_app):
+    response = timed_app.test_client().get("/ops/2")
+
+    assert response.headers["Server-Timing"] == 'mongo;dur=2.000;desc="2 ops"'
+
+
+def test_server_timing__should_count_each_request_separately(timed_app):
+    client = timed_app.test_client()
+    client.get("/ops/2")
+    response = client.get("/ops/1")
+
+    assert response.headers["Server-Timing"] == 'mongo;dur=1.000;desc="1 ops"'
+
+
+def test_server_timing__should_not_keep_events(app):
+    class Event(SimpleNamespace):
+        pass
+
+    server_timing = MongoServerTiming(app)
+    events = [
+        Event(request_id=1, operation_id=1, duration_micros=1000, reply={"x": "y"})
+    ]
+    event_ref = weakref.ref(events[0])
+
+    @app.route("/")
+    def index():
+        server_timing.command_logger.succeeded(events.pop())
+        return "ok"
+
+    response = app.test_client().get("/")
+
+    assert response.headers["Server-Timing"] == 'mongo;dur=1.000;desc="1 ops"'
+    assert event_ref() is None
+
+
+def test_server_timing__should_register_single_listener(app):
+    extensions = [MongoServerTiming(app), MongoServerTiming()]
+
+    # noinspection PyProtectedMember
+    listeners = monitoring._LISTENERS.command_listeners
+    assert extensions[0].command_logger is extensions[1].command_logger
+    assert listeners.count(extensions[0].command_logger) == 1
+
+
+def test_server_timing__should_raise__if_budget_exceeded_in_testing(timed_app):
+    with pytest.raises(RequestBudgetExceeded) as error:
+        timed_app.test_client().get("/ops/4")
+
+    assert "4 ops (budget 3)" in str(error.value)
+
+
+def test_server_timing__should_log__if_budget_exceeded_and_raise_disabled(
+    timed_app, caplog
+):
+    timed_app.extensions["mongoengine_server_timing"].raise_on_budget = False
+
+    with caplog.at_level(logging.WARNING, logger="flask_mongoengine"):
+        response = timed_app.test_client().get("/ops/4")
+
+    assert response.status_code == 200
+    assert "exceeded mongo budget: 4 ops (budget 3)" in caplog.text
+
+
+def test_server_timing__should_raise__if_budget_has_unknown_keys(app):
+    app.config["MONGODB_REQUEST_BUDGET"] = {"queries": 10}
+
+    with pytest.raises(ValueError) as error:
+        MongoServerTiming(app)
+
+    assert str(error.value).startswith("Unknown MONGODB_REQUEST_BUDGET keys: queries.")